@@ -12,6 +12,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.models.user import User
 from app.models.opord import OPORD
 from app.models.tactical_task import TacticalTask
+from app.models.opord_task_mention import OPORDTaskMention
+from app.models.opord_revision import OPORDRevision
 from db.database import Base
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,48 @@
+"""Add keyset listing index to opords
+
+Revision ID: 2c3d4e5f6a7b
+Revises: 1b2c3d4e5f6a
+Create Date: 2025-06-02 09:12:31.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c3d4e5f6a7b'
+down_revision: Union[str, None] = '1b2c3d4e5f6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination orders by updated_at, so it must always be set
+    op.execute('UPDATE opords SET updated_at = created_at WHERE updated_at IS NULL')
+    op.alter_column(
+        'opords', 'updated_at',
+        existing_type=sa.DateTime(timezone=True),
+        server_default=sa.text('now()'),
+        nullable=False
+    )
+    op.create_index(
+        'ix_opords_user_id_updated_at_id',
+        'opords',
+        ['user_id', 'updated_at', 'id'],
+        unique=False,
+        postgresql_include=['title', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_opords_user_id_updated_at_id', table_name='opords')
+    op.alter_column(
+        'opords', 'updated_at',
+        existing_type=sa.DateTime(timezone=True),
+        server_default=None,
+        nullable=True
+    )
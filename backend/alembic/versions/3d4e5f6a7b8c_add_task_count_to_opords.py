@@ -0,0 +1,55 @@
+"""Add task_count to opords table
+
+Revision ID: 3d4e5f6a7b8c
+Revises: 2c3d4e5f6a7b
+Create Date: 2025-06-03 14:27:05.518342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d4e5f6a7b8c'
+down_revision: Union[str, None] = '2c3d4e5f6a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('opords', sa.Column('task_count', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE opords
+        SET task_count = (
+            SELECT count(*) FROM jsonb_array_elements(analysis_results) AS result
+            WHERE NOT result ? 'error'
+        )
+        WHERE jsonb_typeof(analysis_results) = 'array'
+        """
+    )
+    # Rebuild the listing index so summary pages can be served from the index alone
+    op.drop_index('ix_opords_user_id_updated_at_id', table_name='opords')
+    op.create_index(
+        'ix_opords_user_id_updated_at_id',
+        'opords',
+        ['user_id', 'updated_at', 'id'],
+        unique=False,
+        postgresql_include=['title', 'created_at', 'task_count']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_opords_user_id_updated_at_id', table_name='opords')
+    op.create_index(
+        'ix_opords_user_id_updated_at_id',
+        'opords',
+        ['user_id', 'updated_at', 'id'],
+        unique=False,
+        postgresql_include=['title', 'created_at']
+    )
+    op.drop_column('opords', 'task_count')
@@ -0,0 +1,57 @@
+"""Add opord_task_mentions table
+
+Revision ID: 4e5f6a7b8c9d
+Revises: 3d4e5f6a7b8c
+Create Date: 2025-06-05 11:48:52.730915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e5f6a7b8c9d'
+down_revision: Union[str, None] = '3d4e5f6a7b8c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'opord_task_mentions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('opord_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('start', sa.Integer(), nullable=False),
+        sa.Column('end', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['opord_id'], ['opords.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['task_id'], ['tactical_tasks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_opord_task_mentions_opord_id'), 'opord_task_mentions', ['opord_id'], unique=False)
+    op.create_index('ix_opord_task_mentions_task_id_opord_id', 'opord_task_mentions', ['task_id', 'opord_id'], unique=False)
+
+    # Backfill from the mentions already stored in opords.analysis_results
+    op.execute(
+        """
+        INSERT INTO opord_task_mentions (opord_id, task_id, start, "end")
+        SELECT o.id, t.id, (m->'position'->>'start')::int, (m->'position'->>'end')::int
+        FROM opords o
+        CROSS JOIN LATERAL jsonb_array_elements(o.analysis_results) AS m
+        JOIN tactical_tasks t ON t.id = (m->>'id')::int
+        WHERE jsonb_typeof(o.analysis_results) = 'array'
+          AND NOT m ? 'error'
+          AND m->'position'->>'start' IS NOT NULL
+          AND m->'position'->>'end' IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_opord_task_mentions_task_id_opord_id', table_name='opord_task_mentions')
+    op.drop_index(op.f('ix_opord_task_mentions_opord_id'), table_name='opord_task_mentions')
+    op.drop_table('opord_task_mentions')
@@ -0,0 +1,85 @@
+"""Store compact task mention references in opords.analysis_results
+
+Revision ID: 5f6a7b8c9d0e
+Revises: 4e5f6a7b8c9d
+Create Date: 2025-06-06 09:21:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f6a7b8c9d0e'
+down_revision: Union[str, None] = '4e5f6a7b8c9d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('opords', sa.Column('analysis_catalog_version', sa.String(length=16), nullable=True))
+
+    # Rewrite full mentions as {"task_id", "start", "end"} and error entries as {"error", "details"};
+    # mentions without a task id are dropped, as they were never shown
+    op.execute(
+        """
+        UPDATE opords o
+        SET analysis_results = (
+            SELECT coalesce(jsonb_agg(
+                CASE
+                    WHEN m ? 'error' THEN jsonb_build_object('error', m->'error', 'details', m->'details')
+                    WHEN m ? 'task_id' THEN m
+                    ELSE jsonb_build_object(
+                        'task_id', (m->>'id')::int,
+                        'start', (m->'position'->>'start')::int,
+                        'end', (m->'position'->>'end')::int
+                    )
+                END
+                ORDER BY e.ordinality
+            ), '[]'::jsonb)
+            FROM jsonb_array_elements(o.analysis_results) WITH ORDINALITY AS e(m, ordinality)
+            WHERE m ? 'error'
+               OR m ? 'task_id'
+               OR (coalesce((m->>'id')::int, 0) > 0
+                   AND m->'position'->>'start' IS NOT NULL
+                   AND m->'position'->>'end' IS NOT NULL)
+        )
+        WHERE jsonb_typeof(o.analysis_results) = 'array'
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Hydrate compact mentions back to the full format from tactical_tasks
+    op.execute(
+        """
+        UPDATE opords o
+        SET analysis_results = (
+            SELECT coalesce(jsonb_agg(
+                CASE
+                    WHEN m ? 'error' THEN jsonb_build_object(
+                        'error', m->'error', 'details', m->'details', 'task', 'ERROR',
+                        'position', jsonb_build_object('start', 0, 'end', 0),
+                        'definition', m->'details', 'page_number', 'N/A', 'image_path', NULL, 'id', 0
+                    )
+                    ELSE jsonb_build_object(
+                        'task', t.name,
+                        'position', jsonb_build_object('start', m->'start', 'end', m->'end'),
+                        'definition', t.definition, 'page_number', t.page_number,
+                        'image_path', t.image_path, 'id', t.id
+                    )
+                END
+                ORDER BY e.ordinality
+            ), '[]'::jsonb)
+            FROM jsonb_array_elements(o.analysis_results) WITH ORDINALITY AS e(m, ordinality)
+            LEFT JOIN tactical_tasks t ON t.id = (m->>'task_id')::int
+            WHERE m ? 'error' OR t.id IS NOT NULL
+        )
+        WHERE jsonb_typeof(o.analysis_results) = 'array'
+        """
+    )
+    op.drop_column('opords', 'analysis_catalog_version')
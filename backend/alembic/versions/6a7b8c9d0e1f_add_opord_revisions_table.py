@@ -0,0 +1,79 @@
+"""Add opord_revisions table
+
+Revision ID: 6a7b8c9d0e1f
+Revises: 5f6a7b8c9d0e
+Create Date: 2025-06-06 15:02:11.604873
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a7b8c9d0e1f'
+down_revision: Union[str, None] = '5f6a7b8c9d0e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# OPORDs whose first revision is written per round trip
+BACKFILL_BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'opord_revisions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('opord_id', sa.Integer(), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=8), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('content_length', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['opord_id'], ['opords.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('opord_id', 'revision', name='uq_opord_revisions_opord_id_revision')
+    )
+    op.add_column('opords', sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+
+    # Start the history of every existing OPORD with a snapshot of its current content,
+    # in batches of BACKFILL_BATCH_SIZE so the contents are never all in memory at once
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        opords = connection.execute(
+            sa.text(
+                "SELECT id, title, content, updated_at FROM opords WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).all()
+        if not opords:
+            break
+        connection.execute(
+            sa.text(
+                "INSERT INTO opord_revisions (opord_id, revision, kind, title, data, content_length, created_at) "
+                "VALUES (:opord_id, 1, 'snapshot', :title, :data, :content_length, :created_at)"
+            ),
+            [
+                {
+                    "opord_id": opord_id,
+                    "title": title,
+                    "data": zlib.compress((content or "").encode("utf-8"), 6),
+                    "content_length": len(content or ""),
+                    "created_at": updated_at,
+                }
+                for opord_id, title, content, updated_at in opords
+            ]
+        )
+        last_id = opords[-1].id
+    op.execute("UPDATE opords SET revision = 1")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('opords', 'revision')
+    op.drop_table('opord_revisions')
@@ -1,75 +1,329 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, tuple_, func, or_, case
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 from fastapi import HTTPException, status
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from app.models.opord import OPORD
 from app.models.schemas import OPORDCreate, OPORDUpdate
+from app.crud.opord_task_mention import replace_opord_task_mentions
+from app.crud.opord_revision import add_opord_revision, add_initial_opord_revisions
+from app.utils.analysis_results import compact_analysis_results
 
-def get_opord(db: Session, opord_id: int) -> Optional[OPORD]:
+def count_task_mentions(analysis_results: Optional[List[Dict[str, Any]]]) -> Optional[int]:
+    """Number of task mentions in analysis results, ignoring error entries; None if not analyzed."""
+    if analysis_results is None:
+        return None
+    return sum(1 for result in analysis_results if "error" not in result)
+
+async def get_opord(db: AsyncSession, opord_id: int) -> Optional[OPORD]:
     """Get OPORD by ID."""
-    return db.query(OPORD).filter(OPORD.id == opord_id).first()
+    result = await db.execute(select(OPORD).where(OPORD.id == opord_id))
+    return result.scalars().first()
+
+async def get_opord_content(db: AsyncSession, opord_id: int) -> Optional[Dict[str, Any]]:
+    """Get only an OPORD's owner, title, content, revision and update time, for applying edits."""
+    result = await db.execute(
+        select(OPORD.user_id, OPORD.title, OPORD.content, OPORD.revision, OPORD.updated_at).where(OPORD.id == opord_id)
+    )
+    row = result.mappings().first()
+    return dict(row) if row is not None else None
+
+async def store_analysis_results(
+    db: AsyncSession,
+    opord_id: int,
+    revision: int,
+    analysis_results: List[Dict[str, Any]],
+    catalog_version: Optional[str],
+    task_count: Optional[int]
+) -> bool:
+    """
+    Store the analysis of an OPORD's content at a revision, with its task mentions.
+
+    The UPDATE only applies while the OPORD is still at that revision, so an
+    analysis that finishes after a newer save cannot overwrite the results for
+    the newer content. Does not commit.
+
+    Returns:
+        Whether the results were stored
+    """
+    stored_id = await db.scalar(
+        update(OPORD)
+        .where(OPORD.id == opord_id, OPORD.revision == revision)
+        .values(analysis_results=analysis_results, analysis_catalog_version=catalog_version, task_count=task_count)
+        .returning(OPORD.id)
+        .execution_options(synchronize_session=False)
+    )
+    if stored_id is None:
+        return False
+    await replace_opord_task_mentions(db, opord_id, analysis_results)
+    return True
+
+async def get_opords_by_user(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[OPORD]:
+    """
+    Get a page of OPORDs for a user, most recently updated first.
+
+    Keyset pagination over ix_opords_user_id_updated_at_id: `after` is the
+    (updated_at, id) of the last OPORD of the previous page.
+    """
+    stmt = select(OPORD).where(OPORD.user_id == user_id)
+    if after is not None:
+        stmt = stmt.where(tuple_(OPORD.updated_at, OPORD.id) < tuple_(*after))
+    stmt = stmt.order_by(OPORD.updated_at.desc(), OPORD.id.desc()).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
 
-def get_opords_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[OPORD]:
-    """Get list of OPORDs for a user."""
-    return db.query(OPORD).filter(OPORD.user_id == user_id).offset(skip).limit(limit).all()
+async def get_opord_summaries_by_user(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    preview_chars: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Get a page of OPORD summaries for a user, most recently updated first.
 
-def create_opord(db: Session, opord: OPORDCreate, user_id: int) -> OPORD:
-    """Create new OPORD."""
+    Only the listing columns are loaded; content and analysis_results stay in
+    the database (and raise if accessed), except for an optional content
+    prefix of preview_chars characters. Pagination matches get_opords_by_user.
+    """
+    listing_columns = load_only(
+        OPORD.id, OPORD.title, OPORD.user_id, OPORD.created_at, OPORD.updated_at, OPORD.task_count,
+        raiseload=True
+    )
+    preview = func.left(OPORD.content, preview_chars) if preview_chars > 0 else None
+    stmt = select(OPORD, preview) if preview is not None else select(OPORD)
+    stmt = stmt.options(listing_columns).where(OPORD.user_id == user_id)
+    if after is not None:
+        stmt = stmt.where(tuple_(OPORD.updated_at, OPORD.id) < tuple_(*after))
+    stmt = stmt.order_by(OPORD.updated_at.desc(), OPORD.id.desc()).limit(limit)
+
+    result = await db.execute(stmt)
+    summaries = []
+    for row in result.all():
+        db_opord = row[0]
+        summaries.append({
+            "id": db_opord.id,
+            "title": db_opord.title,
+            "user_id": db_opord.user_id,
+            "created_at": db_opord.created_at,
+            "updated_at": db_opord.updated_at,
+            "task_count": db_opord.task_count,
+            "preview": row[1] if preview is not None else None,
+        })
+    return summaries
+
+async def create_opord(
+    db: AsyncSession,
+    opord: OPORDCreate,
+    user_id: int,
+    catalog_version: Optional[str] = None
+) -> OPORD:
+    """
+    Create new OPORD.
+
+    Analysis results are stored as compact task mentions; catalog_version is the
+    version of the task catalog they refer to.
+    """
     db_opord = OPORD(**opord.model_dump(), user_id=user_id)
+    db_opord.analysis_results = compact_analysis_results(db_opord.analysis_results)
+    if db_opord.analysis_results is not None:
+        db_opord.analysis_catalog_version = catalog_version
+    db_opord.task_count = count_task_mentions(db_opord.analysis_results)
+    db_opord.revision = 1
     try:
         db.add(db_opord)
-        db.commit()
-        db.refresh(db_opord)
+        await db.flush()
+        await add_opord_revision(db, db_opord.id, 1, db_opord.title, db_opord.content)
+        if db_opord.analysis_results is not None:
+            await replace_opord_task_mentions(db, db_opord.id, db_opord.analysis_results)
+        await db.commit()
         return db_opord
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error creating OPORD"
         )
 
-def update_opord(db: Session, opord_id: int, opord: OPORDUpdate, user_id: int) -> Optional[OPORD]:
-    """Update OPORD."""
-    db_opord = get_opord(db, opord_id)
-    if not db_opord:
+async def bulk_create_opords(db: AsyncSession, opords: List[OPORDCreate], user_id: int) -> Optional[List[int]]:
+    """
+    Create a batch of OPORDs in one transaction and return their IDs in input order.
+
+    Uses one multi-row INSERT for the OPORDs and one for their first revisions.
+    Analysis results are not imported; the OPORDs are analyzed afresh.
+    Returns None, with the transaction rolled back, if the batch violates a constraint;
+    batches committed earlier on the same session are kept.
+    """
+    if not opords:
+        return []
+    rows = [
+        {"title": opord.title, "content": opord.content, "user_id": user_id, "revision": 1}
+        for opord in opords
+    ]
+    try:
+        result = await db.execute(
+            insert(OPORD).returning(OPORD.id, sort_by_parameter_order=True),
+            rows
+        )
+        opord_ids = list(result.scalars().all())
+        await add_initial_opord_revisions(
+            db,
+            [{"id": opord_id, "title": row["title"], "content": row["content"]} for opord_id, row in zip(opord_ids, rows)]
+        )
+        await db.commit()
+        return opord_ids
+    except IntegrityError:
+        await db.rollback()
         return None
-    if db_opord.user_id != user_id:
+
+async def stream_opords_by_user(
+    db: AsyncSession,
+    user_id: int,
+    batch_size: int = 500
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Stream a user's OPORDs in batches through a server-side cursor, oldest first.
+
+    Only the exported columns are read; memory use is bounded by batch_size.
+    """
+    stmt = (
+        select(OPORD.id, OPORD.title, OPORD.content, OPORD.revision, OPORD.created_at, OPORD.updated_at)
+        .where(OPORD.user_id == user_id)
+        .order_by(OPORD.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.mappings().partitions():
+        yield partition
+
+# Sent with 409 responses to writes against a stale revision
+CURRENT_REVISION_HEADER = "X-Current-Revision"
+
+def revision_conflict(current_revision: int, expected_revision: int) -> HTTPException:
+    """409 for a write made against an older revision; the client should rebase on current_revision."""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"OPORD is at revision {current_revision}, not {expected_revision}",
+        headers={CURRENT_REVISION_HEADER: str(current_revision)}
+    )
+
+async def _raise_if_not_owner(db: AsyncSession, opord_id: int, user_id: int, action: str) -> None:
+    """
+    After a write matched no row, tell "not found" from "owned by another user".
+
+    Raises 403 if the OPORD exists but belongs to someone else; returns otherwise.
+    Only runs on the failure path, so successful writes stay a single statement.
+    """
+    owner_id = await db.scalar(select(OPORD.user_id).where(OPORD.id == opord_id))
+    if owner_id is not None and owner_id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this OPORD"
+            detail=f"Not authorized to {action} this OPORD"
         )
-    
+
+async def update_opord(
+    db: AsyncSession,
+    opord_id: int,
+    opord: OPORDUpdate,
+    user_id: int,
+    catalog_version: Optional[str] = None,
+    expected_revision: Optional[int] = None
+) -> Optional[OPORD]:
+    """
+    Update OPORD. Analysis results are compacted as in create_opord.
+
+    Issues one UPDATE ... RETURNING with the ownership check in its WHERE
+    clause. A change of title or content bumps the revision and stores it in
+    the OPORD's history; the previous content for the revision delta comes
+    back from the same statement.
+
+    With expected_revision, the update only applies if the OPORD is still at
+    that revision (checked in the same WHERE clause); otherwise 409 is raised.
+    """
     update_data = opord.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_opord, key, value)
-    
+    if "analysis_results" in update_data:
+        update_data["analysis_results"] = compact_analysis_results(update_data["analysis_results"])
+        update_data["analysis_catalog_version"] = catalog_version if update_data["analysis_results"] is not None else None
+        update_data["task_count"] = count_task_mentions(update_data["analysis_results"])
+    if not update_data:
+        db_opord = await get_opord(db, opord_id)
+        if db_opord is None or db_opord.user_id != user_id:
+            await _raise_if_not_owner(db, opord_id, user_id, "update")
+            return None
+        return db_opord
+
+    # The current row, locked so the returned previous content is the one this update replaces
+    previous = (
+        select(OPORD.id, OPORD.content.label("previous_content"), OPORD.revision.label("previous_revision"))
+        .where(OPORD.id == opord_id, OPORD.user_id == user_id)
+        .with_for_update()
+    )
+    if expected_revision is not None:
+        previous = previous.where(OPORD.revision == expected_revision)
+    previous = previous.subquery()
+    values = dict(update_data)
+    revised_fields = [key for key in ("title", "content") if key in update_data]
+    if revised_fields:
+        changed = or_(*(getattr(OPORD, key).is_distinct_from(update_data[key]) for key in revised_fields))
+        values["revision"] = case((changed, OPORD.revision + 1), else_=OPORD.revision)
+    stmt = (
+        update(OPORD)
+        .where(OPORD.id == previous.c.id)
+        .values(**values)
+        .returning(OPORD, previous.c.previous_content, previous.c.previous_revision)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
     try:
-        db.commit()
-        db.refresh(db_opord)
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            await db.rollback()
+            await _raise_if_not_owner(db, opord_id, user_id, "update")
+            if expected_revision is not None:
+                current_revision = await db.scalar(select(OPORD.revision).where(OPORD.id == opord_id))
+                if current_revision is not None:
+                    raise revision_conflict(current_revision, expected_revision)
+            return None
+        db_opord, previous_content, previous_revision = row
+        if db_opord.revision != previous_revision:
+            await add_opord_revision(
+                db, db_opord.id, db_opord.revision, db_opord.title, db_opord.content,
+                previous_content if previous_revision else None
+            )
+        if "analysis_results" in update_data:
+            await replace_opord_task_mentions(db, db_opord.id, update_data["analysis_results"])
+        await db.commit()
         return db_opord
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error updating OPORD"
         )
 
-def delete_opord(db: Session, opord_id: int, user_id: int) -> bool:
-    """Delete OPORD."""
-    db_opord = get_opord(db, opord_id)
-    if not db_opord:
-        return False
-    if db_opord.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this OPORD"
-        )
-    
+async def delete_opord(db: AsyncSession, opord_id: int, user_id: int) -> bool:
+    """Delete OPORD with a single DELETE ... RETURNING; mentions and revisions cascade in the database."""
     try:
-        db.delete(db_opord)
-        db.commit()
+        deleted_id = await db.scalar(
+            delete(OPORD)
+            .where(OPORD.id == opord_id, OPORD.user_id == user_id)
+            .returning(OPORD.id)
+            .execution_options(synchronize_session=False)
+        )
+        if deleted_id is None:
+            await db.rollback()
+            await _raise_if_not_owner(db, opord_id, user_id, "delete")
+            return False
+        await db.commit()
         return True
     except IntegrityError:
-        db.rollback()
-        return False 
\ No newline at end of file
+        await db.rollback()
+        return False
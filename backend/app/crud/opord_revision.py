@@ -0,0 +1,132 @@
+import os
+from sqlalchemy import select, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.opord_revision import OPORDRevision
+from app.utils.text_delta import (
+    make_delta, apply_delta, compress_text, decompress_text, compress_delta, decompress_delta
+)
+
+# A full snapshot is stored every N revisions; rebuilding a revision applies at most N - 1 deltas
+OPORD_REVISION_SNAPSHOT_INTERVAL = int(os.getenv("OPORD_REVISION_SNAPSHOT_INTERVAL", "20"))
+
+def _encode_revision(content: str, previous_content: Optional[str]) -> Tuple[str, bytes]:
+    # A delta from previous_content if there is one and it is smaller than a snapshot
+    kind, data = "snapshot", compress_text(content)
+    if previous_content is not None:
+        delta = compress_delta(make_delta(previous_content, content))
+        if len(delta) < len(data):
+            kind, data = "delta", delta
+    return kind, data
+
+async def add_opord_revision(
+    db: AsyncSession,
+    opord_id: int,
+    revision: int,
+    title: Optional[str],
+    content: Optional[str],
+    previous_content: Optional[str] = None
+) -> None:
+    """
+    Store a revision of an OPORD.
+    
+    The revision is stored as a delta from previous_content unless a snapshot
+    is due or the delta would not be smaller than a snapshot. Does not commit,
+    so the revision is written in the same transaction as the OPORD update.
+    """
+    content = content or ""
+    if previous_content is not None and (revision - 1) % OPORD_REVISION_SNAPSHOT_INTERVAL == 0:
+        previous_content = None
+    # Diffing and compressing a long order takes milliseconds; keep it off the event loop
+    kind, data = await run_in_threadpool(_encode_revision, content, previous_content)
+    await db.execute(
+        insert(OPORDRevision).values(
+            opord_id=opord_id,
+            revision=revision,
+            kind=kind,
+            title=title,
+            data=data,
+            content_length=len(content)
+        )
+    )
+
+async def add_initial_opord_revisions(db: AsyncSession, opords: List[Dict[str, Any]]) -> None:
+    """Store revision 1 snapshots for newly created OPORDs (dicts with id, title and content) in one statement."""
+    if not opords:
+        return
+    await db.execute(
+        insert(OPORDRevision),
+        [
+            {
+                "opord_id": opord["id"],
+                "revision": 1,
+                "kind": "snapshot",
+                "title": opord["title"],
+                "data": compress_text(opord["content"] or ""),
+                "content_length": len(opord["content"] or ""),
+            }
+            for opord in opords
+        ]
+    )
+
+async def get_opord_revisions(
+    db: AsyncSession,
+    opord_id: int,
+    limit: int = 100,
+    before: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """List an OPORD's revisions, newest first, without their content. `before` is the last revision of the previous page."""
+    stmt = select(
+        OPORDRevision.revision,
+        OPORDRevision.kind,
+        OPORDRevision.title,
+        OPORDRevision.content_length,
+        func.length(OPORDRevision.data).label("stored_bytes"),
+        OPORDRevision.created_at,
+    ).where(OPORDRevision.opord_id == opord_id)
+    if before is not None:
+        stmt = stmt.where(OPORDRevision.revision < before)
+    result = await db.execute(stmt.order_by(OPORDRevision.revision.desc()).limit(limit))
+    return [dict(row) for row in result.mappings().all()]
+
+async def get_opord_revision(db: AsyncSession, opord_id: int, revision: int) -> Optional[Dict[str, Any]]:
+    """
+    Rebuild the title and content of an OPORD at a revision.
+    
+    Loads the nearest snapshot at or before the revision and the deltas after
+    it in a single query. Returns None if the revision does not exist.
+    """
+    snapshot_revision = (
+        select(func.max(OPORDRevision.revision))
+        .where(
+            OPORDRevision.opord_id == opord_id,
+            OPORDRevision.kind == "snapshot",
+            OPORDRevision.revision <= revision
+        )
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(OPORDRevision)
+        .where(
+            OPORDRevision.opord_id == opord_id,
+            OPORDRevision.revision >= snapshot_revision,
+            OPORDRevision.revision <= revision
+        )
+        .order_by(OPORDRevision.revision)
+    )
+    chain = result.scalars().all()
+    if not chain or chain[-1].revision != revision:
+        return None
+
+    content = decompress_text(chain[0].data)
+    for delta in chain[1:]:
+        content = apply_delta(content, decompress_delta(delta.data))
+    target = chain[-1]
+    return {
+        "revision": target.revision,
+        "title": target.title,
+        "content": content,
+        "created_at": target.created_at,
+    }
@@ -0,0 +1,87 @@
+from datetime import datetime
+from sqlalchemy import select, delete, insert, func, distinct
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+
+from app.models.opord import OPORD
+from app.models.opord_task_mention import OPORDTaskMention
+from app.models.tactical_task import TacticalTask
+from app.utils.analysis_results import compact_analysis_results, is_error_entry
+
+def mentions_from_analysis_results(analysis_results: Optional[List[Dict[str, Any]]]) -> List[Dict[str, int]]:
+    """Extract (task_id, start, end) rows from analysis results, skipping error and unknown-task entries."""
+    return [
+        entry for entry in compact_analysis_results(analysis_results or [])
+        if not is_error_entry(entry)
+    ]
+
+async def replace_opord_task_mentions(
+    db: AsyncSession,
+    opord_id: int,
+    analysis_results: Optional[List[Dict[str, Any]]]
+) -> None:
+    """
+    Replace the stored mentions of an OPORD with those in analysis_results.
+    
+    Does not commit, so the mentions are written in the same transaction as
+    the analysis results themselves.
+    """
+    await db.execute(delete(OPORDTaskMention).where(OPORDTaskMention.opord_id == opord_id))
+    mentions = mentions_from_analysis_results(analysis_results)
+    if mentions:
+        await db.execute(
+            insert(OPORDTaskMention),
+            [{"opord_id": opord_id, **mention} for mention in mentions]
+        )
+
+async def get_task_usage(
+    db: AsyncSession,
+    user_id: int,
+    since: Optional[datetime] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Most-mentioned tactical tasks across a user's OPORDs, optionally only OPORDs updated since a time."""
+    mention_count = func.count(OPORDTaskMention.id).label("mention_count")
+    stmt = (
+        select(
+            TacticalTask.id.label("task_id"),
+            TacticalTask.name.label("task"),
+            mention_count,
+            func.count(distinct(OPORDTaskMention.opord_id)).label("opord_count"),
+        )
+        .join(OPORD, OPORD.id == OPORDTaskMention.opord_id)
+        .join(TacticalTask, TacticalTask.id == OPORDTaskMention.task_id)
+        .where(OPORD.user_id == user_id)
+        .group_by(TacticalTask.id, TacticalTask.name)
+        .order_by(mention_count.desc(), TacticalTask.name)
+        .limit(limit)
+    )
+    if since is not None:
+        stmt = stmt.where(OPORD.updated_at >= since)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings().all()]
+
+async def get_opords_using_task(
+    db: AsyncSession,
+    user_id: int,
+    task_name: str,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    """A user's OPORDs that mention a tactical task, with the number of mentions in each."""
+    mention_count = func.count(OPORDTaskMention.id).label("mention_count")
+    stmt = (
+        select(
+            OPORD.id.label("opord_id"),
+            OPORD.title,
+            OPORD.updated_at,
+            mention_count,
+        )
+        .join(OPORDTaskMention, OPORDTaskMention.opord_id == OPORD.id)
+        .join(TacticalTask, TacticalTask.id == OPORDTaskMention.task_id)
+        .where(OPORD.user_id == user_id, TacticalTask.name == task_name.strip().upper())
+        .group_by(OPORD.id, OPORD.title, OPORD.updated_at)
+        .order_by(OPORD.updated_at.desc(), OPORD.id.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings().all()]
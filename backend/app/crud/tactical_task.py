@@ -1,50 +1,62 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import defer
 from typing import List, Optional
 from app.models.tactical_task import TacticalTask
 from app.models.schemas import TacticalTaskCreate
-from pgvector.sqlalchemy import Vector
-from app.models.tactical_task import TacticalTask
 
-def create_tactical_task(db: Session, task: TacticalTaskCreate) -> TacticalTask:
+async def create_tactical_task(db: AsyncSession, task: TacticalTaskCreate) -> TacticalTask:
     db_task = TacticalTask(**task.model_dump())
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
     return db_task
 
-def get_tactical_task(db: Session, task_id: int) -> Optional[TacticalTask]:
-    return db.query(TacticalTask).filter(TacticalTask.id == task_id).first()
+async def get_tactical_task(db: AsyncSession, task_id: int) -> Optional[TacticalTask]:
+    result = await db.execute(select(TacticalTask).where(TacticalTask.id == task_id))
+    return result.scalars().first()
 
-def get_tactical_task_by_name(db: Session, name: str) -> Optional[TacticalTask]:
-    return db.query(TacticalTask).filter(TacticalTask.name == name).first()
+async def get_tactical_task_by_name(db: AsyncSession, name: str) -> Optional[TacticalTask]:
+    result = await db.execute(select(TacticalTask).where(TacticalTask.name == name))
+    return result.scalars().first()
 
-def get_all_tactical_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[TacticalTask]:
-    return db.query(TacticalTask).offset(skip).limit(limit).all()
+async def get_all_tactical_tasks(db: AsyncSession, limit: int = 100, after_id: Optional[int] = None) -> List[TacticalTask]:
+    # Keyset pagination on the primary key: after_id is the last id of the previous page.
+    # Listings never return embeddings, which are most of each row, so they are not loaded.
+    stmt = select(TacticalTask).options(defer(TacticalTask.embedding))
+    if after_id is not None:
+        stmt = stmt.where(TacticalTask.id > after_id)
+    result = await db.execute(stmt.order_by(TacticalTask.id).limit(limit))
+    return result.scalars().all()
 
-def search_similar_tasks(db: Session, embedding: List[float], limit: int = 5) -> List[TacticalTask]:
+async def search_similar_tasks(db: AsyncSession, embedding: List[float], limit: int = 5) -> List[TacticalTask]:
     # Search for similar tasks using cosine similarity
     stmt = select(TacticalTask).order_by(TacticalTask.embedding.cosine_distance(embedding)).limit(limit)
-    return db.execute(stmt).scalars().all()
-
-def update_tactical_task(db: Session, task_id: int, task: TacticalTaskCreate) -> Optional[TacticalTask]:
-    db_task = get_tactical_task(db, task_id)
-    if db_task:
-        for key, value in task.dict(exclude_unset=True).items():
-            setattr(db_task, key, value)
-        db.commit()
-        db.refresh(db_task)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+async def update_tactical_task(db: AsyncSession, task_id: int, task: TacticalTaskCreate) -> Optional[TacticalTask]:
+    # Single UPDATE ... RETURNING; None if the task does not exist
+    db_task = await db.scalar(
+        update(TacticalTask)
+        .where(TacticalTask.id == task_id)
+        .values(**task.model_dump(exclude_unset=True))
+        .returning(TacticalTask)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    await db.commit()
     return db_task
 
-def delete_tactical_task(db: Session, task_id: int) -> bool:
-    db_task = get_tactical_task(db, task_id)
-    if db_task:
-        db.delete(db_task)
-        db.commit()
-        return True
-    return False
-
-def get_all_tactical_task_names(db: Session) -> List[str]:
+async def delete_tactical_task(db: AsyncSession, task_id: int) -> bool:
+    deleted_id = await db.scalar(
+        delete(TacticalTask)
+        .where(TacticalTask.id == task_id)
+        .returning(TacticalTask.id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return deleted_id is not None
+
+async def get_all_tactical_task_names(db: AsyncSession) -> List[str]:
     """Retrieve a list of all unique tactical task names from the database."""
-    results = db.query(TacticalTask.name).distinct().all()
-    return [result[0] for result in results] 
\ No newline at end of file
+    result = await db.execute(select(TacticalTask.name).distinct())
+    return list(result.scalars().all())
@@ -1,89 +1,122 @@
-from sqlalchemy.orm import Session
+import os
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from typing import Optional
 
 from app.models.user import User
 from app.models.schemas import UserCreate
-from app.utils.security import get_password_hash, verify_password
+from app.utils.security import get_password_hash_async, verify_and_update_password_async
+from app.utils.cache import TTLCache
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
+# Resolved principals (User schemas) keyed by email, the access token subject.
+# Each process keeps its own cache, so another worker may see a changed user for up to the TTL.
+principal_cache = TTLCache(
+    "principals",
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")),
+    max_size=int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+)
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a user's cached principal, whatever email it was cached under."""
+    principal_cache.invalidate_matching(lambda principal: principal.id == user_id)
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
     """Get user by ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get user by email."""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
     """Get list of users."""
-    return db.query(User).offset(skip).limit(limit).all()
+    result = await db.execute(select(User).offset(skip).limit(limit))
+    return result.scalars().all()
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Create new user."""
-    if get_user_by_email(db, user.email):
+    if await get_user_by_email(db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
         return db_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error creating user"
         )
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    """Authenticate user."""
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """
+    Authenticate user.
+
+    Verification runs off the event loop. A password hashed with an outdated
+    bcrypt cost is transparently rehashed with the current BCRYPT_ROUNDS.
+    """
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+        user.hashed_password = new_hash
     return user
 
-def update_user(db: Session, user_id: int, user_data: dict) -> Optional[User]:
-    """Update user."""
-    db_user = get_user(db, user_id)
-    if not db_user:
-        return None
-    
-    for key, value in user_data.items():
-        if key == "password":
-            setattr(db_user, "hashed_password", get_password_hash(value))
-        else:
-            setattr(db_user, key, value)
+async def update_user(db: AsyncSession, user_id: int, user_data: dict) -> Optional[User]:
+    """Update user with a single UPDATE ... RETURNING."""
+    values = {
+        ("hashed_password" if key == "password" else key): (await get_password_hash_async(value) if key == "password" else value)
+        for key, value in user_data.items()
+    }
+    if not values:
+        return await get_user(db, user_id)
     
     try:
-        db.commit()
-        db.refresh(db_user)
+        db_user = await db.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .returning(User)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        await db.commit()
+        invalidate_principal(user_id)
         return db_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error updating user"
         )
 
-def delete_user(db: Session, user_id: int) -> bool:
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
     """Delete user."""
-    db_user = get_user(db, user_id)
+    # Loaded through the ORM on purpose: deleting the User detaches its OPORDs (user_id set to NULL)
+    db_user = await get_user(db, user_id)
     if not db_user:
         return False
     
     try:
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        invalidate_principal(user_id)
         return True
     except IntegrityError:
-        db.rollback()
-        return False 
\ No newline at end of file
+        await db.rollback()
+        return False
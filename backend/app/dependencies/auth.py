@@ -1,11 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional
 
-from app.dependencies.database import get_db
+from app.dependencies.database import get_db, get_read_db, is_replica_session
 from app.models.schemas import TokenData, User
 from app.crud import user as user_crud
 
@@ -27,24 +27,61 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def decode_token_subject(token: str) -> Optional[str]:
+    """The email an access token was issued to, or None if the token is invalid or expired."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Resolve the bearer token to a user.
+
+    Principals are cached by token subject (user_crud.principal_cache), so most
+    requests need no user query. On a cache miss the lookup is served by the
+    read replica when the request is routed there; a user the replica does not
+    know yet (e.g. just registered) is looked up on the primary.
+    """
+    return await resolve_token_user(token, db, primary_db)
+
+async def resolve_token_user(token: str, db: AsyncSession, primary_db: Optional[AsyncSession] = None) -> User:
+    """
+    Resolve an access token to a user outside of the HTTP dependency chain (e.g. for WebSockets).
+
+    Args:
+        token: JWT access token
+        db: Session for the user lookup
+        primary_db: Primary session to retry on when db is a replica session
+
+    Raises:
+        HTTPException: 401 if the token is invalid or its user does not exist
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
+    email = decode_token_subject(token)
+    if email is None:
         raise credentials_exception
-    db_user = user_crud.get_user_by_email(db, email=token_data.email)
+    token_data = TokenData(email=email)
+    principal = user_crud.principal_cache.get(token_data.email)
+    if principal is not None:
+        return principal
+    db_user = await user_crud.get_user_by_email(db, email=token_data.email)
+    if db_user is None and primary_db is not None and is_replica_session(db):
+        db_user = await user_crud.get_user_by_email(primary_db, email=token_data.email)
     if db_user is None:
         raise credentials_exception
-    return db_user
+    principal = User.model_validate(db_user)
+    user_crud.principal_cache.set(token_data.email, principal)
+    return principal
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
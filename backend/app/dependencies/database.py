@@ -1,10 +1,74 @@
-from typing import Generator
-from db.database import SessionLocal
+import os
+import time
+from typing import AsyncGenerator
+from fastapi import Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from db.database import AsyncSessionLocal, AsyncReplicaSessionLocal
+from db.replica import replica_health
 
-def get_db() -> Generator:
-    """Get database session."""
-    db = SessionLocal()
+# After a write, the client's reads stay on the primary for this long (read-your-writes)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session on the primary.
+
+    When a replica is configured, a write request also pins the client's
+    following reads to the primary through the read_primary_until cookie.
+    """
+    if AsyncReplicaSessionLocal is not None and request.method not in SAFE_METHODS:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(int(time.time()) + REPLICA_STICKY_SECONDS),
+            max_age=REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="lax"
+        )
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _reads_pinned_to_primary(request: Request) -> bool:
     try:
+        return int(request.cookies.get(READ_PRIMARY_COOKIE, "0")) > time.time()
+    except ValueError:
+        return False
+
+async def _use_replica(request: Request) -> bool:
+    # GET/HEAD requests go to the replica unless none is configured, the client
+    # wrote recently, or the replica is down or lagging
+    return (
+        AsyncReplicaSessionLocal is not None
+        and request.method in SAFE_METHODS
+        and not _reads_pinned_to_primary(request)
+        and await replica_health.is_usable()
+    )
+
+async def get_read_db(
+    request: Request,
+    primary_db: AsyncSession = Depends(get_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for read-only work.
+
+    Uses the replica when the request can be routed there; otherwise shares
+    the request's primary session (which only connects if used).
+    """
+    if not await _use_replica(request):
+        yield primary_db
+        return
+    async with AsyncReplicaSessionLocal() as db:
+        db.info["replica"] = True
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
+
+async def get_read_sessionmaker(request: Request) -> async_sessionmaker:
+    """
+    Session factory for read-only work that outlives the request's dependencies,
+    such as a streaming response body. Routed like get_read_db.
+    """
+    return AsyncReplicaSessionLocal if await _use_replica(request) else AsyncSessionLocal
+
+def is_replica_session(db: AsyncSession) -> bool:
+    return db.info.get("replica", False)
@@ -0,0 +1,190 @@
+import os
+import zlib
+import logging
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are sent uncompressed; the framing overhead is not worth it
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESSION_LEVEL = int(os.getenv("GZIP_COMPRESSION_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+# Chunks at least this large are compressed in a worker thread instead of on the event loop
+COMPRESSION_THREAD_MINIMUM_SIZE = int(os.getenv("COMPRESSION_THREAD_MINIMUM_SIZE", str(256 * 1024)))
+
+# Only text formats are worth compressing; images and archives are already compressed
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+def available_encodings() -> tuple:
+    """Content codings this server can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the content coding for a request from its Accept-Encoding header.
+
+    Codings are ranked by the client's q-values, ties going to the server's
+    preference (br over gzip). Returns None when the response should be sent as is.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    best, best_q = None, 0.0
+    for coding in available_encodings():
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # A sync flush after each streamed chunk lets the client decode it right away
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+_STREAMS = {"gzip": _GzipStream, "br": _BrotliStream}
+
+def _is_compressible(media_type: str) -> bool:
+    media_type = media_type.partition(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_CONTENT_TYPES
+
+def negotiated_etag(etag: str, accept_encoding: str, media_type: str) -> str:
+    """
+    The ETag a response of `media_type` carries for a request with this Accept-Encoding.
+
+    A compressible response to a request that negotiates a content coding varies by
+    encoding, so its validator is weakened whether or not this body was large enough
+    to be compressed. 304 responses built with http_cache.not_modified apply the same
+    rule, so a revalidation returns the tag the 200 carried.
+    """
+    if etag.startswith("W/") or negotiate_encoding(accept_encoding) is None or not _is_compressible(media_type):
+        return etag
+    return f"W/{etag}"
+
+class _CompressingSender:
+    """Rewrites one response's messages, compressing the body once it is known to be worth it."""
+
+    def __init__(self, send: Send, accept_encoding: str, encoding: str, minimum_size: int):
+        self.send = send
+        self.accept_encoding = accept_encoding
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.stream = None
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= COMPRESSION_THREAD_MINIMUM_SIZE:
+            return await run_in_threadpool(self.stream.compress, data, final)
+        return self.stream.compress(data, final)
+
+    async def __call__(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            # 204/304 have no body, 206 ranges refer to the identity body
+            self.passthrough = (
+                message["status"] in (204, 206, 304)
+                or "content-encoding" in headers
+                or not _is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+        if self.passthrough or message_type != "http.response.body":
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is None:
+            # Later chunks of a streamed response already being compressed
+            message["body"] = await self._compress(body, final=not more_body)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        # The body depends on the negotiated coding, so the validator is weakened (even when this
+        # body is too small to compress); If-None-Match compares weakly, so W/"x" matches "x"
+        etag = headers.get("etag")
+        if etag:
+            headers["ETag"] = negotiated_etag(etag, self.accept_encoding, headers.get("content-type", ""))
+        if not more_body and len(body) < self.minimum_size:
+            self.passthrough = True
+        else:
+            self.stream = _STREAMS[self.encoding]()
+            body = await self._compress(body, final=not more_body)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            message["body"] = body
+        await self.send(self.start_message)
+        self.start_message = None
+        await self.send(message)
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression (brotli when installed, otherwise gzip).
+
+    Compresses text responses of at least `minimum_size` bytes, including
+    streamed ones such as the NDJSON export, and sets Vary: Accept-Encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        logger.info(f"Response compression enabled: {', '.join(available_encodings())}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, accept_encoding, encoding, self.minimum_size))
@@ -0,0 +1,90 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from prometheus_client import Gauge, Histogram
+
+from app.utils.metrics import DEFAULT_BUCKETS, start_request_stats
+
+# Per-request statement counts, from a cached read to a bulk import
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ("method", "route", "status"),
+    buckets=DEFAULT_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ("method",),
+    multiprocess_mode="livesum",
+)
+REQUEST_STAGE_DURATION = Histogram(
+    "http_request_stage_seconds",
+    "Time a request spent in a stage: db (statements), llm (Gemini calls), serialization (JSON encoding)",
+    ("route", "stage"),
+    buckets=DEFAULT_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per request",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+def _route_label(scope: Scope) -> str:
+    # The route template, not the raw path, keeps one series per endpoint (/opords/{opord_id})
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Records latency per route and status and a per-request breakdown of time
+    spent in the database, LLM calls and serialization.
+
+    The request is measured up to its last response body message, so
+    background tasks run after the response (tactical analysis) are not
+    counted; they are reported by the background job metrics.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = start_request_stats()
+        started = time.perf_counter()
+        status_code = 500
+        finished = False
+
+        def observe() -> None:
+            nonlocal finished
+            finished = True
+            route = _route_label(scope)
+            REQUEST_DURATION.labels(method=method, route=route, status=str(status_code)).observe(time.perf_counter() - started)
+            REQUEST_DB_QUERIES.labels(route=route).observe(stats.db_queries)
+            for stage, seconds in stats.stage_seconds.items():
+                REQUEST_STAGE_DURATION.labels(route=route, stage=stage).observe(seconds)
+            REQUESTS_IN_PROGRESS.labels(method=method).dec()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                observe()
+
+        REQUESTS_IN_PROGRESS.labels(method=method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                observe()
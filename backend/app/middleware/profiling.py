@@ -0,0 +1,108 @@
+import sys
+import random
+import logging
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.dependencies.auth import decode_token_subject
+from app.services.profiling_service import (
+    PROFILING_ADMIN_EMAILS, PROFILING_INTERVAL_MS, PROFILING_MAX_CONCURRENT, PROFILING_MIN_DURATION_MS,
+    PROFILING_SAMPLE_RATE, build_report, is_profiling_admin, new_profile_id, save_report
+)
+from app.utils.profiler import AsyncStackSampler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_REQUEST_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+def _profile_requested(scope: Scope) -> bool:
+    """True when an admin asked for this request to be profiled (X-Profile: 1 or ?profile=1)."""
+    headers = Headers(scope=scope)
+    flag = headers.get(PROFILE_REQUEST_HEADER)
+    if flag is None and b"profile=" in scope.get("query_string", b""):
+        flag = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM, [None])[0]
+    if flag not in ("1", "true"):
+        return False
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and is_profiling_admin(decode_token_subject(token))
+
+class ProfilingMiddleware:
+    """
+    Profiles requests on demand or at random, storing a call-stack report per request.
+
+    A request is profiled when an admin (PROFILING_ADMIN_EMAILS) sends
+    "X-Profile: 1" or "?profile=1"; its response then carries X-Profile-Id, the
+    id the report is read back under at GET /profiles/{id}. Other requests are
+    profiled with probability PROFILING_SAMPLE_RATE and their report is kept
+    if they took at least PROFILING_MIN_DURATION_MS.
+
+    Unprofiled requests only pay for the flag check.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._active = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if PROFILING_ADMIN_EMAILS and _profile_requested(scope):
+            trigger = "requested"
+        elif PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+            trigger = "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+        if self._active >= PROFILING_MAX_CONCURRENT:
+            logger.info(f"Not profiling {scope['path']}: {self._active} requests already being profiled")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+        sampler = AsyncStackSampler(PROFILING_INTERVAL_MS / 1000, root_frame=sys._getframe())
+        started_at = datetime.now(timezone.utc).isoformat()
+        status_code = 500
+        finished = False
+
+        async def finish() -> None:
+            nonlocal finished
+            finished = True
+            sampler.stop()
+            self._active -= 1
+            if trigger == "sampled" and sampler.duration * 1000 < PROFILING_MIN_DURATION_MS:
+                return
+            route = scope.get("route")
+            await save_report(build_report(sampler, profile_id, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path_format", None),
+                "status": status_code,
+                "trigger": trigger,
+                "started_at": started_at,
+            }))
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trigger == "requested":
+                    MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            elif message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                # Stored before the response completes, so the client can fetch the report right away
+                await finish()
+            await send(message)
+
+        self._active += 1
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                await finish()
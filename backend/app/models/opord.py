@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB # For PostgreSQL
 from sqlalchemy.types import JSON # Fallback for other DBs like SQLite if needed during dev
 from sqlalchemy.orm import relationship
@@ -16,18 +16,32 @@ class OPORD(Base):
         user_id: Foreign key to the user who created the OPORD
         created_at: Timestamp of OPORD creation
         updated_at: Timestamp of last OPORD update
-        analysis_results: JSON field storing tactical task analysis results
+        analysis_results: JSON list of compact task mentions ({"task_id", "start", "end"}) or error entries
+        analysis_catalog_version: Version of the tactical task catalog the analysis results refer to
+        task_count: Number of tactical task mentions in analysis_results, kept for listings
+        revision: Current revision number; history is kept in opord_revisions
         user: Relationship to the OPORD's creator
     """
     __tablename__ = "opords"
+    __table_args__ = (
+        # Keyset pagination of a user's OPORDs by (updated_at, id); covers the listing columns
+        Index(
+            "ix_opords_user_id_updated_at_id",
+            "user_id", "updated_at", "id",
+            postgresql_include=["title", "created_at", "task_count"]
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     content = Column(Text)
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     analysis_results = Column(JSONB, nullable=True) # Or JSON for broader compatibility
+    analysis_catalog_version = Column(String(16), nullable=True)
+    task_count = Column(Integer, nullable=True)
+    revision = Column(Integer, nullable=False, server_default="0")
 
     # Relationships
     user = relationship("User", back_populates="opords") 
\ No newline at end of file
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from db.database import Base
+
+class OPORDRevision(Base):
+    """
+    One saved revision of an OPORD's title and content.
+    
+    Content is stored either as a zlib-compressed snapshot or as a compressed
+    line delta from the previous revision. A snapshot is written every
+    OPORD_REVISION_SNAPSHOT_INTERVAL revisions, so rebuilding any revision
+    applies a bounded number of deltas.
+    
+    Attributes:
+        id: Primary key
+        opord_id: Foreign key to the revised OPORD
+        revision: Revision number, starting at 1 for the created OPORD
+        kind: "snapshot" or "delta"
+        title: Title of the OPORD at this revision
+        data: Compressed content (snapshot) or compressed delta from the previous revision
+        content_length: Length of the content at this revision in characters
+        created_at: Timestamp of the revision
+    """
+    __tablename__ = "opord_revisions"
+    __table_args__ = (
+        UniqueConstraint("opord_id", "revision", name="uq_opord_revisions_opord_id_revision"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    opord_id = Column(Integer, ForeignKey("opords.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)
+    kind = Column(String(8), nullable=False)
+    title = Column(String)
+    data = Column(LargeBinary, nullable=False)
+    content_length = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
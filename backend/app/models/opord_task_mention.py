@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, ForeignKey, Index
+from db.database import Base
+
+class OPORDTaskMention(Base):
+    """
+    A tactical task mention identified by analysis in an OPORD.
+    
+    Normalized copy of the mentions in OPORD.analysis_results, kept in sync by
+    the analysis job so cross-order task reports are index lookups.
+    
+    Attributes:
+        id: Primary key
+        opord_id: Foreign key to the analyzed OPORD
+        task_id: Foreign key to the mentioned tactical task
+        start: Start character index of the mention in the OPORD content
+        end: End character index of the mention in the OPORD content
+    """
+    __tablename__ = "opord_task_mentions"
+    __table_args__ = (
+        # "Which OPORDs use task X" and per-task aggregates
+        Index("ix_opord_task_mentions_task_id_opord_id", "task_id", "opord_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    opord_id = Column(Integer, ForeignKey("opords.id", ondelete="CASCADE"), nullable=False, index=True)
+    task_id = Column(Integer, ForeignKey("tactical_tasks.id", ondelete="CASCADE"), nullable=False)
+    start = Column(Integer, nullable=False)
+    end = Column(Integer, nullable=False)
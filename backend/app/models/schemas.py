@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from enum import Enum
 
 # User schemas
 class UserBase(BaseModel):
@@ -35,7 +36,8 @@ class OPORDBase(BaseModel):
     Attributes:
         title: Title of the OPORD
         content: Full text content of the OPORD
-        analysis_results: Optional list of tactical task analysis results
+        analysis_results: Optional list of tactical task analysis results; on input either full
+            results from /analysis/tasks or compact {"task_id", "start", "end"} mentions
     """
     title: str
     content: str
@@ -55,6 +57,72 @@ class OPORDUpdate(OPORDBase):
     content: Optional[str] = None
     analysis_results: Optional[List[Dict[str, Any]]] = None
 
+class TextEdit(BaseModel):
+    """
+    Replacement of a character range of an OPORD's content.
+    
+    Attributes:
+        start: Offset of the first replaced character in the base content
+        end: Offset just past the last replaced character (start for a pure insertion)
+        text: Replacement text (empty for a deletion)
+    """
+    start: int
+    end: int
+    text: str = ""
+
+class OPORDContentPatch(BaseModel):
+    """
+    Incremental OPORD update: text edits against the content of a known revision.
+    
+    Attributes:
+        base_revision: Revision the edits were made against; must be the current one
+        edits: Sorted, non-overlapping edits, offsets relative to the base revision's content
+        title: Optional new title
+    """
+    base_revision: int
+    edits: List[TextEdit] = []
+    title: Optional[str] = None
+
+class OPORDPatchResult(BaseModel):
+    """
+    Result of an incremental OPORD update.
+    
+    Attributes:
+        id: OPORD's unique identifier
+        revision: Revision after the update (unchanged if the edits changed nothing)
+        updated_at: Timestamp of last update
+        content_length: Length of the updated content, for clients to check their copy
+    """
+    id: int
+    revision: int
+    updated_at: Optional[datetime] = None
+    content_length: int
+
+class AnalysisFormat(str, Enum):
+    """
+    How analysis results are returned with an OPORD.
+    
+    references: each mention holds task, position and id; task details are sent once in analysis_tasks
+    full: each mention repeats the task's definition, page_number and image_path
+    """
+    REFERENCES = "references"
+    FULL = "full"
+
+class AnalysisTask(BaseModel):
+    """
+    Details of a tactical task referenced by analysis results.
+    
+    Attributes:
+        name: Name of the tactical task
+        definition: Full definition of the task
+        page_number: Page number in source document
+        image_path: Optional path to associated diagram/image
+    """
+    name: str
+    definition: str
+    page_number: str
+    image_path: Optional[str] = None
+
 class OPORD(OPORDBase):
     """
     Schema for OPORD responses, extends OPORDBase with system fields.
@@ -64,15 +132,116 @@ class OPORD(OPORDBase):
         user_id: ID of the OPORD's creator
         created_at: Timestamp of OPORD creation
         updated_at: Optional timestamp of last update
+        analysis_tasks: Details of each task referenced by analysis_results, keyed by task ID
+            (only with the "references" analysis format)
+        revision: Current revision number
+    """
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    analysis_tasks: Optional[Dict[int, AnalysisTask]] = None
+    revision: int = 0
+
+    class Config:
+        from_attributes = True
+
+class OPORDSummary(BaseModel):
+    """
+    Lightweight OPORD listing entry without content or analysis results.
+    
+    Attributes:
+        id: OPORD's unique identifier
+        title: Title of the OPORD
+        user_id: ID of the OPORD's creator
+        created_at: Timestamp of OPORD creation
+        updated_at: Optional timestamp of last update
+        task_count: Number of tactical task mentions found by analysis, if analyzed
+        preview: Leading characters of the content, when requested
     """
     id: int
+    title: str
     user_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    task_count: Optional[int] = None
+    preview: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+class OPORDImportError(BaseModel):
+    """
+    A line of an NDJSON import that could not be imported.
+    
+    Attributes:
+        line: 1-based line number in the import body
+        detail: Why the line was rejected
+    """
+    line: int
+    detail: str
+
+class OPORDImportResult(BaseModel):
+    """
+    Outcome of an NDJSON OPORD import.
+    
+    Attributes:
+        imported: Number of OPORDs created (committed)
+        failed: Number of rejected lines, including the lines of batches the database rejected
+        errors: Details of the first rejected lines or batches
+    """
+    imported: int
+    failed: int
+    errors: List[OPORDImportError]
+
+# OPORD revision schemas
+class OPORDRevision(BaseModel):
+    """
+    Revision history entry without content.
+    
+    Attributes:
+        revision: Revision number
+        kind: "snapshot" or "delta", how the revision is stored
+        title: Title of the OPORD at this revision
+        content_length: Length of the content at this revision in characters
+        stored_bytes: Compressed size of the stored revision
+        created_at: Timestamp of the revision
+    """
+    revision: int
+    kind: str
+    title: Optional[str] = None
+    content_length: int
+    stored_bytes: int
+    created_at: datetime
+
+class OPORDRevisionContent(BaseModel):
+    """
+    Title and content of an OPORD at a revision.
+    
+    Attributes:
+        revision: Revision number
+        title: Title of the OPORD at this revision
+        content: Content of the OPORD at this revision
+        created_at: Timestamp of the revision
+    """
+    revision: int
+    title: Optional[str] = None
+    content: str
+    created_at: datetime
+
+class OPORDRevisionDiff(BaseModel):
+    """
+    Unified diff between two revisions of an OPORD.
+    
+    Attributes:
+        from_revision: Older revision number
+        to_revision: Newer revision number
+        diff: Unified diff of the content, empty if unchanged
+    """
+    from_revision: int
+    to_revision: int
+    diff: str
+
 # TacticalTask schemas
 class TacticalTaskBase(BaseModel):
     """
@@ -110,6 +279,37 @@ class TacticalTask(TacticalTaskBase):
     class Config:
         from_attributes = True
 
+# Task usage schemas
+class TaskUsage(BaseModel):
+    """
+    Usage of a tactical task across a user's OPORDs.
+    
+    Attributes:
+        task_id: Tactical task ID
+        task: Tactical task name
+        mention_count: Total mentions of the task
+        opord_count: Number of OPORDs mentioning the task
+    """
+    task_id: int
+    task: str
+    mention_count: int
+    opord_count: int
+
+class OPORDTaskUsage(BaseModel):
+    """
+    An OPORD that mentions a given tactical task.
+    
+    Attributes:
+        opord_id: OPORD's unique identifier
+        title: Title of the OPORD
+        updated_at: Timestamp of last update
+        mention_count: Mentions of the task in the OPORD
+    """
+    opord_id: int
+    title: str
+    updated_at: Optional[datetime] = None
+    mention_count: int
+
 # Token schemas
 class Token(BaseModel):
     """Schema for authentication tokens."""
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from typing import List, Any, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Any, Dict, Optional
 
 from app.dependencies.auth import get_current_active_user
-from app.dependencies.database import get_db
+from app.dependencies.database import get_db, get_read_db
 from app.services.tactical_analysis_service import identify_and_retrieve_tactical_tasks
 from app.models.user import User # For current user dependency
+from app.models.schemas import TaskUsage, OPORDTaskUsage
+from app.crud import opord_task_mention as mention_crud
 
 router = APIRouter(
     prefix="/analysis",
@@ -20,7 +23,7 @@ class TextForAnalysis(BaseModel):
 @router.post("/tasks", response_model=List[Dict[str, Any]])
 async def analyze_text_for_tactical_tasks(
     payload: TextForAnalysis = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -39,3 +42,28 @@ async def analyze_text_for_tactical_tasks(
     except Exception as e:
         # In a production environment, we want more sophisticated error logging
         raise HTTPException(status_code=500, detail=f"An error occurred during text analysis: {str(e)}")
+
+@router.get("/task-usage", response_model=List[TaskUsage])
+async def get_task_usage(
+    since: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Most-used tactical tasks across the current user's OPORDs.
+    Restrict to OPORDs updated since a timestamp with `since`.
+    """
+    return await mention_crud.get_task_usage(db, current_user.id, since=since, limit=limit)
+
+@router.get("/task-usage/{task_name}", response_model=List[OPORDTaskUsage])
+async def get_opords_using_task(
+    task_name: str,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    The current user's OPORDs that mention a tactical task, most recently updated first.
+    """
+    return await mention_crud.get_opords_using_task(db, current_user.id, task_name, limit=limit)
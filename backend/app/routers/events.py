@@ -0,0 +1,67 @@
+import os
+import json
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+
+from db.database import AsyncSessionLocal
+from app.dependencies.auth import resolve_token_user
+from app.services.event_broker import event_broker
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"]
+)
+
+# Idle connections get a {"type": "ping"} event this often, keeping proxies from closing them
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "30"))
+
+async def _send_events(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    while True:
+        try:
+            event = await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            event = {"type": "ping"}
+        await websocket.send_text(json.dumps(event, default=str))
+
+async def _receive_until_disconnect(websocket: WebSocket) -> None:
+    # The channel is server-to-client; client messages are read only to notice the disconnect
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.websocket("/ws")
+async def events_socket(websocket: WebSocket, token: str = Query(...)):
+    """
+    Push channel for the current user's events.
+
+    Browsers cannot set headers on a WebSocket, so the access token is passed
+    as the token query parameter. Events are JSON objects with a "type":
+
+    analysis.completed / analysis.failed: background analysis of an OPORD finished;
+        carries opord_id, revision, and analysis_results/analysis_tasks in the
+        "references" format of GET /opords/{id}. Events marked "truncated" omit
+        the results; re-fetch the OPORD.
+    ping: heartbeat, sent when the connection is idle
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await resolve_token_user(token, db)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    async with event_broker.subscribe(user.id) as queue:
+        # Accept only once subscribed, so events published after the handshake are not missed
+        await websocket.accept()
+        tasks = {
+            asyncio.create_task(_send_events(websocket, queue)),
+            asyncio.create_task(_receive_until_disconnect(websocket)),
+        }
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, (WebSocketDisconnect, RuntimeError)):
+                logger.error(f"Event channel for user {user.id} failed: {error}", exc_info=error)
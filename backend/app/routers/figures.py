@@ -0,0 +1,38 @@
+import mimetypes
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.services.figure_service import get_figure_path
+from app.utils.http_cache import PUBLIC_IMMUTABLE, etag_matches, not_modified
+
+router = APIRouter(
+    prefix="/figures",
+    tags=["figures"]
+)
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
+async def get_figure(filename: str, request: Request):
+    """
+    Serve a tactical task figure by content-addressed name.
+
+    "<digest>.<ext>" is the original raster and "<digest>.<variant>.webp" a
+    resized WebP derivative ("thumb", "display" or "w<width>" for widths in
+    FIGURE_WIDTHS), rendered on first request and cached on disk.
+
+    A URL's bytes never change, so responses are cacheable forever
+    (Cache-Control: immutable) and any conditional request is answered with
+    304. Range requests are supported.
+    """
+    path = await get_figure_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Figure not found")
+    # The name embeds the content digest, so it is a strong validator as is
+    etag = f'"{filename}"'
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if etag_matches(request, etag) or "if-modified-since" in request.headers:
+        return not_modified(request, etag, cache_control=PUBLIC_IMMUTABLE, media_type=media_type)
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={"ETag": etag, "Cache-Control": PUBLIC_IMMUTABLE}
+    )
@@ -1,86 +1,494 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+import difflib
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from opentelemetry import trace
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.crud import opord as opord_crud
+from app.crud import opord_revision as revision_crud
 from app.crud import user as user_crud
-from app.models.schemas import OPORD, OPORDCreate, OPORDUpdate, User
-from app.dependencies.database import get_db
+from app.models.opord import OPORD as OPORDModel
+from app.models.schemas import (
+    OPORD, OPORDCreate, OPORDUpdate, OPORDSummary, User, AnalysisFormat,
+    OPORDRevision, OPORDRevisionContent, OPORDRevisionDiff, OPORDImportResult,
+    OPORDContentPatch, OPORDPatchResult
+)
+from app.dependencies.database import get_db, get_read_db, get_read_sessionmaker
 from app.dependencies.auth import get_current_active_user
-from app.services.opord_processing_service import run_tactical_analysis_and_store_results
+from app.services.opord_processing_service import schedule_analysis
+from app.services.task_catalog_service import TaskCatalog, get_task_catalog
+from app.utils.analysis_results import hydrate_analysis_results, reference_analysis_results
+from app.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.utils.http_cache import compute_etag, etag_matches, not_modified, set_cache_headers
+from app.utils.json_response import trusted_json_response
+from app.utils.text_delta import apply_text_edits
 
 router = APIRouter(prefix="/opords", tags=["opords"])
+tracer = trace.get_tracer(__name__)
+
+# OPORDs inserted per transaction by POST /opords/import
+IMPORT_BATCH_SIZE = 500
+# Rejected import lines reported back in detail
+IMPORT_MAX_REPORTED_ERRORS = 100
+# Longest import line accepted; longer lines are discarded as they stream in and reported as errors
+IMPORT_MAX_LINE_BYTES = 16 * 1024 * 1024
+
+def _opord_response(db_opord: OPORDModel, catalog: TaskCatalog, analysis: AnalysisFormat) -> Dict[str, Any]:
+    """
+    OPORD response with its stored task mentions hydrated from the task catalog.
+
+    Built with every field of the OPORD schema, in schema order, so it can be
+    encoded directly by trusted_json_response without response_model validation.
+    """
+    with tracer.start_as_current_span("opord.hydrate_analysis", attributes={"opord.id": db_opord.id, "analysis.format": analysis.value}):
+        if analysis == AnalysisFormat.FULL:
+            analysis_results = hydrate_analysis_results(db_opord.analysis_results, catalog.tasks)
+            analysis_tasks = None
+        else:
+            analysis_results, analysis_tasks = reference_analysis_results(db_opord.analysis_results, catalog.tasks)
+    return {
+        "title": db_opord.title,
+        "content": db_opord.content,
+        "analysis_results": analysis_results,
+        "id": db_opord.id,
+        "user_id": db_opord.user_id,
+        "created_at": db_opord.created_at,
+        "updated_at": db_opord.updated_at,
+        "analysis_tasks": analysis_tasks,
+        "revision": db_opord.revision,
+    }
+
+def _opord_etag(db_opord: OPORDModel, catalog: TaskCatalog, analysis: AnalysisFormat) -> str:
+    # updated_at moves on every write (content, title or stored analysis); the catalog
+    # version covers task details hydrated into the response
+    return compute_etag(db_opord.id, db_opord.updated_at, db_opord.revision, catalog.version, analysis.value)
+
+async def _get_owned_opord(db: AsyncSession, opord_id: int, current_user: User) -> OPORDModel:
+    db_opord = await opord_crud.get_opord(db, opord_id)
+    if db_opord is None:
+        raise HTTPException(status_code=404, detail="OPORD not found")
+    if db_opord.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this OPORD")
+    return db_opord
 
 @router.get("/", response_model=List[OPORD])
-def get_opords(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def get_opords(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    analysis: AnalysisFormat = AnalysisFormat.REFERENCES,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get OPORDs for the current user, most recently updated first.
+
+    Results are keyset-paginated. When more results exist, the X-Next-Cursor
+    response header holds the cursor to pass back for the next page.
+    The page carries an ETag; a matching If-None-Match is answered with 304.
+    """
+    after = tuple(decode_cursor(cursor, datetime, int)) if cursor else None
+    opords = await opord_crud.get_opords_by_user(db, current_user.id, limit=limit + 1, after=after)
+    headers = {}
+    if len(opords) > limit:
+        opords = opords[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(opords[-1].updated_at, opords[-1].id)
+    catalog = await get_task_catalog(db)
+    etag = compute_etag(
+        [(db_opord.id, db_opord.updated_at, db_opord.revision) for db_opord in opords],
+        headers.get(NEXT_CURSOR_HEADER), catalog.version, analysis.value
+    )
+    if etag_matches(request, etag):
+        return not_modified(request, etag, headers)
+    response.headers.update(headers)
+    set_cache_headers(response, etag)
+    return trusted_json_response([_opord_response(db_opord, catalog, analysis) for db_opord in opords], response)
+
+@router.get("/summary", response_model=List[OPORDSummary])
+async def get_opord_summaries(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    preview_chars: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all OPORDs for the current user."""
-    return opord_crud.get_opords_by_user(db, current_user.id, skip=skip, limit=limit)
+    """
+    Get lightweight OPORD summaries for the dashboard, most recently updated first.
+
+    Content and analysis results are not loaded; set preview_chars to include
+    the start of the content. Paginated like GET /opords/.
+    """
+    after = tuple(decode_cursor(cursor, datetime, int)) if cursor else None
+    summaries = await opord_crud.get_opord_summaries_by_user(
+        db, current_user.id, limit=limit + 1, after=after, preview_chars=preview_chars
+    )
+    if len(summaries) > limit:
+        summaries = summaries[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(summaries[-1]["updated_at"], summaries[-1]["id"])
+    return summaries
+
+async def _export_lines(sessionmaker: async_sessionmaker, user_id: int) -> AsyncIterator[str]:
+    # The response body outlives the request's dependencies, so it reads through its own session
+    async with sessionmaker() as db:
+        async for batch in opord_crud.stream_opords_by_user(db, user_id, batch_size=IMPORT_BATCH_SIZE):
+            yield "".join(
+                json.dumps({
+                    "id": row["id"],
+                    "title": row["title"],
+                    "content": row["content"],
+                    "revision": row["revision"],
+                    "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+                    "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None,
+                }) + "\n"
+                for row in batch
+            )
+
+@router.get("/export")
+async def export_opords(
+    sessionmaker: async_sessionmaker = Depends(get_read_sessionmaker),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Export all of the current user's OPORDs as NDJSON, one OPORD per line, oldest first.
+
+    Rows are streamed from a server-side cursor, so memory use does not grow
+    with the number of OPORDs. Analysis results are not exported.
+    """
+    return StreamingResponse(
+        _export_lines(sessionmaker, current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="opords.ndjson"'}
+    )
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[Optional[bytes]]:
+    # Split the streamed request body into lines without reading it whole. Only the new chunk is
+    # searched for line breaks, so a line spread over many chunks costs time linear in its length;
+    # a line longer than IMPORT_MAX_LINE_BYTES is yielded as None
+    pending = bytearray()
+    oversized = False
+    async for chunk in request.stream():
+        view = memoryview(chunk)
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if oversized or len(pending) + end - start > IMPORT_MAX_LINE_BYTES:
+                yield None
+            elif pending:
+                pending += view[start:end]
+                yield bytes(pending)
+            else:
+                yield bytes(view[start:end])
+            pending.clear()
+            oversized = False
+            start = end + 1
+        if not oversized:
+            pending += view[start:]
+            if len(pending) > IMPORT_MAX_LINE_BYTES:
+                pending.clear()
+                oversized = True
+    if oversized:
+        yield None
+    elif pending:
+        yield bytes(pending)
+
+@router.post("/import", response_model=OPORDImportResult)
+async def import_opords(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Import OPORDs from an NDJSON request body, one {"title", "content"} object per line.
+
+    The body is parsed as it streams in and inserted in transactions of
+    IMPORT_BATCH_SIZE OPORDs; lines that fail to parse or are longer than
+    IMPORT_MAX_LINE_BYTES are skipped and reported. A batch the database
+    rejects is rolled back and reported as failed while the other batches are
+    kept, so `imported` is always the number of OPORDs that were committed.
+    Every imported OPORD with content is analyzed by one bulk background task.
+    Other fields (such as those written by GET /opords/export) are ignored.
+    """
+    imported = 0
+    failed = 0
+    errors = []
+    to_analyze: List[int] = []
+    batch: List[OPORDCreate] = []
+    batch_lines: List[int] = []
+
+    async def flush() -> None:
+        nonlocal imported, failed
+        opord_ids = await opord_crud.bulk_create_opords(db, batch, current_user.id)
+        if opord_ids is None:
+            failed += len(batch)
+            if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                errors.append({
+                    "line": batch_lines[0],
+                    "detail": f"Lines {batch_lines[0]}-{batch_lines[-1]} were not imported: "
+                              f"the batch of {len(batch)} OPORDs violates a database constraint"
+                })
+        else:
+            imported += len(opord_ids)
+            to_analyze.extend(opord_id for opord_id, opord in zip(opord_ids, batch) if opord.content)
+        batch.clear()
+        batch_lines.clear()
+
+    line_number = 0
+    async for line in _ndjson_lines(request):
+        line_number += 1
+        if line is None:
+            failed += 1
+            if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "detail": f"Line exceeds {IMPORT_MAX_LINE_BYTES} bytes"})
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            batch.append(OPORDCreate(title=data.get("title"), content=data.get("content")))
+            batch_lines.append(line_number)
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        except ValueError as e:
+            detail = f"Invalid JSON: {e}"
+        else:
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+            continue
+        failed += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "detail": detail})
+    if batch:
+        await flush()
+
+    schedule_analysis(background_tasks, to_analyze)
+    return {"imported": imported, "failed": failed, "errors": errors}
 
 @router.post("/", response_model=OPORD)
-def create_opord(
+async def create_opord(
     opord: OPORDCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    response: Response,
+    analysis: AnalysisFormat = AnalysisFormat.REFERENCES,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new OPORD and schedule background tactical analysis."""
-    db_opord = opord_crud.create_opord(db, opord, current_user.id)
+    catalog = await get_task_catalog(db)
+    db_opord = await opord_crud.create_opord(db, opord, current_user.id, catalog_version=catalog.version)
     if db_opord and db_opord.content:
-        background_tasks.add_task(
-            run_tactical_analysis_and_store_results, 
-            db=db, 
-            opord_id=db_opord.id
-        )
-    return db_opord
+        schedule_analysis(background_tasks, [db_opord.id])
+    return trusted_json_response(_opord_response(db_opord, catalog, analysis), response)
 
 @router.get("/{opord_id}", response_model=OPORD)
-def get_opord(
+async def get_opord(
     opord_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    analysis: AnalysisFormat = AnalysisFormat.REFERENCES,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get a specific OPORD."""
-    db_opord = opord_crud.get_opord(db, opord_id)
-    if db_opord is None:
-        raise HTTPException(status_code=404, detail="OPORD not found")
-    if db_opord.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to access this OPORD")
-    return db_opord
+    """
+    Get a specific OPORD.
+
+    By default each analysis mention carries only its task, position and id, and
+    the details of every distinct task are returned once in analysis_tasks.
+    Pass analysis=full for mentions that repeat the task details.
+
+    The response carries an ETag; a matching If-None-Match is answered with 304
+    without building the body.
+    """
+    db_opord = await _get_owned_opord(db, opord_id, current_user)
+    catalog = await get_task_catalog(db)
+    etag = _opord_etag(db_opord, catalog, analysis)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    set_cache_headers(response, etag)
+    return trusted_json_response(_opord_response(db_opord, catalog, analysis), response)
 
 @router.put("/{opord_id}", response_model=OPORD)
-def update_opord(
+async def update_opord(
     opord_id: int,
     opord: OPORDUpdate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    response: Response,
+    analysis: AnalysisFormat = AnalysisFormat.REFERENCES,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update an OPORD and schedule background tactical analysis if content changes."""
-    db_opord = opord_crud.update_opord(db, opord_id, opord, current_user.id)
+    catalog = await get_task_catalog(db)
+    db_opord = await opord_crud.update_opord(db, opord_id, opord, current_user.id, catalog_version=catalog.version)
     if db_opord is None:
         raise HTTPException(status_code=404, detail="OPORD not found")
     
     if opord.content and db_opord.content:
-        background_tasks.add_task(
-            run_tactical_analysis_and_store_results, 
-            db=db, 
-            opord_id=db_opord.id
-        )
-    return db_opord
+        schedule_analysis(background_tasks, [db_opord.id])
+    return trusted_json_response(_opord_response(db_opord, catalog, analysis), response)
+
+@router.patch("/{opord_id}", response_model=OPORDPatchResult)
+async def patch_opord_content(
+    opord_id: int,
+    patch: OPORDContentPatch,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Update an OPORD's content by sending only the edited ranges.
+
+    Edits are applied to the content of base_revision, which must still be the
+    current revision; otherwise 409 is returned with the current revision in the
+    X-Current-Revision header, and the client should rebase its edits on it.
+    Offsets count characters (Unicode code points), like analysis positions.
+    Returns the new revision; tactical analysis is rerun if the content changed.
+    """
+    current = await opord_crud.get_opord_content(db, opord_id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="OPORD not found")
+    if current["user_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to update this OPORD")
+    if current["revision"] != patch.base_revision:
+        raise opord_crud.revision_conflict(current["revision"], patch.base_revision)
+    try:
+        content = apply_text_edits(current["content"] or "", [(edit.start, edit.end, edit.text) for edit in patch.edits])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    content_changed = content != (current["content"] or "")
+    title_changed = patch.title is not None and patch.title != current["title"]
+    if not content_changed and not title_changed:
+        # Nothing changed (e.g. an autosave without edits, or resending the same title); no write
+        return {
+            "id": opord_id,
+            "revision": current["revision"],
+            "updated_at": current["updated_at"],
+            "content_length": len(content),
+        }
+
+    update = OPORDUpdate()
+    if content_changed:
+        update.content = content
+    if title_changed:
+        update.title = patch.title
+    # The revision is checked again in the UPDATE, so a concurrent save between the read and the write also gets 409
+    db_opord = await opord_crud.update_opord(
+        db, opord_id, update, current_user.id, expected_revision=patch.base_revision
+    )
+    if db_opord is None:
+        raise HTTPException(status_code=404, detail="OPORD not found")
+    # A title change alone leaves the task mentions as they are
+    if content_changed and db_opord.content:
+        schedule_analysis(background_tasks, [db_opord.id])
+    return {
+        "id": db_opord.id,
+        "revision": db_opord.revision,
+        "updated_at": db_opord.updated_at,
+        "content_length": len(db_opord.content or ""),
+    }
+
+@router.get("/{opord_id}/revisions", response_model=List[OPORDRevision])
+async def get_opord_revisions(
+    opord_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """List the revision history of an OPORD, newest first. Paginated like GET /opords/."""
+    await _get_owned_opord(db, opord_id, current_user)
+    before = decode_cursor(cursor, int)[0] if cursor else None
+    revisions = await revision_crud.get_opord_revisions(db, opord_id, limit=limit + 1, before=before)
+    if len(revisions) > limit:
+        revisions = revisions[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(revisions[-1]["revision"])
+    return revisions
+
+@router.get("/{opord_id}/revisions/diff", response_model=OPORDRevisionDiff)
+async def diff_opord_revisions(
+    opord_id: int,
+    from_revision: int = Query(..., ge=1),
+    to_revision: int = Query(..., ge=1),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Unified diff of an OPORD's content between two revisions."""
+    await _get_owned_opord(db, opord_id, current_user)
+    old = await revision_crud.get_opord_revision(db, opord_id, from_revision)
+    new = await revision_crud.get_opord_revision(db, opord_id, to_revision)
+    if old is None or new is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    diff = difflib.unified_diff(
+        old["content"].splitlines(keepends=True),
+        new["content"].splitlines(keepends=True),
+        fromfile=f"revision {from_revision}",
+        tofile=f"revision {to_revision}"
+    )
+    return {"from_revision": from_revision, "to_revision": to_revision, "diff": "".join(diff)}
+
+@router.get("/{opord_id}/revisions/{revision}", response_model=OPORDRevisionContent)
+async def get_opord_revision(
+    opord_id: int,
+    revision: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the title and content of an OPORD at a revision."""
+    await _get_owned_opord(db, opord_id, current_user)
+    db_revision = await revision_crud.get_opord_revision(db, opord_id, revision)
+    if db_revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return db_revision
+
+@router.post("/{opord_id}/revisions/{revision}/restore", response_model=OPORD)
+async def restore_opord_revision(
+    opord_id: int,
+    revision: int,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    analysis: AnalysisFormat = AnalysisFormat.REFERENCES,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Restore an OPORD to an earlier revision.
+
+    The restored title and content are saved as a new revision, so the
+    history is kept, and tactical analysis is rerun.
+    """
+    await _get_owned_opord(db, opord_id, current_user)
+    restored = await revision_crud.get_opord_revision(db, opord_id, revision)
+    if restored is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    update = OPORDUpdate(content=restored["content"])
+    if restored["title"] is not None:
+        update.title = restored["title"]
+    catalog = await get_task_catalog(db)
+    db_opord = await opord_crud.update_opord(db, opord_id, update, current_user.id, catalog_version=catalog.version)
+    if db_opord is None:
+        # Deleted since the ownership check
+        raise HTTPException(status_code=404, detail="OPORD not found")
+    if db_opord.content:
+        schedule_analysis(background_tasks, [db_opord.id])
+    return trusted_json_response(_opord_response(db_opord, catalog, analysis), response)
 
 @router.delete("/{opord_id}")
-def delete_opord(
+async def delete_opord(
     opord_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Delete an OPORD."""
-    success = opord_crud.delete_opord(db, opord_id, current_user.id)
+    success = await opord_crud.delete_opord(db, opord_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="OPORD not found")
     return {"message": "OPORD deleted successfully"} 
\ No newline at end of file
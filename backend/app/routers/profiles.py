@@ -0,0 +1,42 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.dependencies.auth import get_current_active_user
+from app.models.user import User
+from app.services.profiling_service import is_profiling_admin, list_reports, load_report
+
+async def get_profiling_admin(current_user: User = Depends(get_current_active_user)) -> User:
+    """Require a user listed in PROFILING_ADMIN_EMAILS."""
+    if not is_profiling_admin(current_user.email):
+        raise HTTPException(status_code=403, detail="Not authorized to read profiles")
+    return current_user
+
+router = APIRouter(
+    prefix="/profiles",
+    tags=["profiles"],
+    dependencies=[Depends(get_profiling_admin)]
+)
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def get_profiles(limit: int = Query(50, ge=1, le=500)):
+    """Most recent request profiles, newest first, without their stacks."""
+    return await list_reports(limit)
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, format: str = Query("json", pattern="^(json|folded)$")):
+    """
+    A request profile by the id returned in X-Profile-Id (or listed by GET /profiles/).
+
+    format=json returns the report: request details, duration, time spent waiting,
+    top functions by inclusive time, hot spots by self time, and the folded stacks.
+    format=folded returns only the stacks, one "outer;...;inner count" line each,
+    for flame graph tools such as speedscope or flamegraph.pl.
+    """
+    report = await load_report(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(report["folded"])
+    return report
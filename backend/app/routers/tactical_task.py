@@ -1,77 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.dependencies.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.dependencies.database import get_db, get_read_db
 from app.dependencies.auth import get_current_user
 from app.models.schemas import TacticalTask, TacticalTaskCreate, User
 from app.crud import tactical_task
+from app.services.task_catalog_service import invalidate_task_catalog
+from app.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.utils.http_cache import compute_etag, etag_matches, not_modified, set_cache_headers
 
 router = APIRouter(
     prefix="/tactical-tasks",
     tags=["tactical-tasks"]
 )
 
+def _task_fingerprint(db_task) -> tuple:
+    # Tasks have no update timestamp, so the ETag hashes the response fields themselves
+    return (
+        db_task.id, db_task.name, db_task.definition, db_task.page_number,
+        db_task.source_reference, db_task.image_path, db_task.related_figures
+    )
+
 @router.post("/", response_model=TacticalTask)
-def create_tactical_task(
+async def create_tactical_task(
     task: TacticalTaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_task = tactical_task.get_tactical_task_by_name(db, name=task.name)
+    db_task = await tactical_task.get_tactical_task_by_name(db, name=task.name)
     if db_task:
         raise HTTPException(status_code=400, detail="Task name already registered")
-    return tactical_task.create_tactical_task(db=db, task=task)
+    db_task = await tactical_task.create_tactical_task(db=db, task=task)
+    invalidate_task_catalog()
+    return db_task
 
 @router.get("/{task_id}", response_model=TacticalTask)
-def read_tactical_task(
+async def read_tactical_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_task = tactical_task.get_tactical_task(db, task_id=task_id)
+    db_task = await tactical_task.get_tactical_task(db, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    etag = compute_etag(_task_fingerprint(db_task))
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    set_cache_headers(response, etag)
     return db_task
 
 @router.get("/", response_model=List[TacticalTask])
-def read_tactical_tasks(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def read_tactical_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    tasks = tactical_task.get_all_tactical_tasks(db, skip=skip, limit=limit)
+    """
+    Get tactical tasks in id order, keyset-paginated like GET /opords/.
+
+    The page carries an ETag; a matching If-None-Match is answered with 304.
+    """
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    tasks = await tactical_task.get_all_tactical_tasks(db, limit=limit + 1, after_id=after_id)
+    headers = {}
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(tasks[-1].id)
+    etag = compute_etag([_task_fingerprint(db_task) for db_task in tasks], headers.get(NEXT_CURSOR_HEADER))
+    if etag_matches(request, etag):
+        return not_modified(request, etag, headers)
+    response.headers.update(headers)
+    set_cache_headers(response, etag)
     return tasks
 
 @router.put("/{task_id}", response_model=TacticalTask)
-def update_tactical_task(
+async def update_tactical_task(
     task_id: int,
     task: TacticalTaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_task = tactical_task.update_tactical_task(db=db, task_id=task_id, task=task)
+    db_task = await tactical_task.update_tactical_task(db=db, task_id=task_id, task=task)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    invalidate_task_catalog()
     return db_task
 
 @router.delete("/{task_id}")
-def delete_tactical_task(
+async def delete_tactical_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    success = tactical_task.delete_tactical_task(db=db, task_id=task_id)
+    success = await tactical_task.delete_tactical_task(db=db, task_id=task_id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
+    invalidate_task_catalog()
     return {"detail": "Task deleted successfully"}
 
 @router.post("/search/similar", response_model=List[TacticalTask])
-def search_similar_tasks(
+async def search_similar_tasks(
     embedding: List[float],
     limit: int = 5,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    tasks = tactical_task.search_similar_tasks(db=db, embedding=embedding, limit=limit)
+    tasks = await tactical_task.search_similar_tasks(db=db, embedding=embedding, limit=limit)
     return tasks 
\ No newline at end of file
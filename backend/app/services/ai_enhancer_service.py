@@ -1,20 +1,16 @@
 import os
 import logging
-import google.generativeai as genai
 
 from app.models.ai import AIEnhancementRequest, AIEnhancementResponse, EnhancementType
+from app.services.llm_client import generate_content_async, get_generative_model
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
+# Configure Gemini (LLM_MODE=record/replay serves calls through the LLM cassette)
+TEXT_ENHANCEMENT_MODEL_NAME = os.getenv("TEXT_ENHANCEMENT_MODEL_NAME", "gemini-2.0-flash")
+enhancer_model = get_generative_model(TEXT_ENHANCEMENT_MODEL_NAME)
+if not enhancer_model:
     logger.error("GOOGLE_API_KEY not found. AI Enhancer service will not function.")
-    enhancer_model = None
-else:
-    genai.configure(api_key=GOOGLE_API_KEY)
-    TEXT_ENHANCEMENT_MODEL_NAME = os.getenv("TEXT_ENHANCEMENT_MODEL_NAME", "gemini-2.0-flash")
-    enhancer_model = genai.GenerativeModel(TEXT_ENHANCEMENT_MODEL_NAME)
 
 async def enhance_text_with_ai(
     request: AIEnhancementRequest
@@ -58,7 +54,7 @@ Enhanced version:"""
 
     try:
         logger.debug(f"Sending text to Gemini for enhancement. Type: {request.enhancement_type.value}. Text length: {len(request.text)} chars.")
-        response = enhancer_model.generate_content(prompt)
+        response = await generate_content_async(enhancer_model, prompt, prompt_type="enhancement")
         enhanced_suggestion = response.text.strip()
         
         if not enhanced_suggestion:
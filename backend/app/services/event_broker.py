@@ -0,0 +1,177 @@
+import os
+import json
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from db.database import SQLALCHEMY_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# "memory" delivers events within this process only; "postgres" fans them out to
+# every API worker through LISTEN/NOTIFY
+EVENT_BROKER_BACKEND = os.getenv("EVENT_BROKER_BACKEND", "memory")
+# LISTEN needs a session-level connection, so point this past PgBouncer in transaction mode
+EVENT_BROKER_DATABASE_URL = os.getenv("EVENT_BROKER_DATABASE_URL", SQLALCHEMY_DATABASE_URL)
+EVENT_BROKER_CHANNEL = os.getenv("EVENT_BROKER_CHANNEL", "opord_events")
+# Events buffered per connected client; a client that falls further behind loses events
+EVENT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "100"))
+# pg_notify rejects payloads of 8000 bytes or more
+NOTIFY_MAX_BYTES = 7900
+RECONNECT_MAX_DELAY_SECONDS = 30
+
+def truncate_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop an event's list and object fields, keeping its type and ids, and flag it as truncated."""
+    truncated = {key: value for key, value in event.items() if not isinstance(value, (list, dict))}
+    truncated["truncated"] = True
+    return truncated
+
+class EventBroker:
+    """
+    In-process publish/subscribe of per-user events, e.g. background analysis completion.
+
+    Each subscriber (one WebSocket connection) gets its own bounded queue of events
+    published for its user.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    async def start(self) -> None:
+        """Connect the broker's transport, if it has one."""
+
+    async def close(self) -> None:
+        """Release the broker's transport, if it has one."""
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        """Receive the user's events on a queue for the duration of the context."""
+        await self.start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[user_id].discard(queue)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    async def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        """Send an event to every subscriber of the user."""
+        self.published += 1
+        self._deliver(user_id, event)
+
+    def _deliver(self, user_id: int, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.warning(f"Dropped {event.get('type')} event for user {user_id}: subscriber queue full")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": EVENT_BROKER_BACKEND,
+            "users": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+class PostgresEventBroker(EventBroker):
+    """
+    EventBroker whose events travel through Postgres NOTIFY, so a publish in any
+    API worker reaches subscribers connected to every worker.
+
+    Uses one dedicated asyncpg connection per process for LISTEN and NOTIFY.
+    Events too large for a NOTIFY payload are sent truncated (see truncate_event);
+    clients then re-fetch the OPORD.
+    """
+
+    def __init__(self, database_url: str, channel: str):
+        super().__init__()
+        # asyncpg takes a plain postgresql:// DSN
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._channel = channel
+        self._connection: Optional[asyncpg.Connection] = None
+        self._lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def _connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self) -> None:
+        if self._connected():
+            return
+        async with self._lock:
+            if self._connected():
+                return
+            connection = await asyncpg.connect(self._dsn)
+            await connection.add_listener(self._channel, self._on_notify)
+            connection.add_termination_listener(self._on_terminated)
+            self._connection = connection
+            self._closing = False
+            logger.info(f"Event broker listening on Postgres channel {self._channel}")
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._connected():
+            await self._connection.close()
+        self._connection = None
+
+    async def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        payload = json.dumps({"user_id": user_id, "event": event}, default=str)
+        if len(payload.encode("utf-8")) > NOTIFY_MAX_BYTES:
+            payload = json.dumps({"user_id": user_id, "event": truncate_event(event)}, default=str)
+        await self.start()
+        # An asyncpg connection runs one statement at a time
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self._channel, payload)
+        self.published += 1
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            self._deliver(message["user_id"], message["event"])
+        except (ValueError, KeyError) as e:
+            logger.error(f"Ignoring malformed event notification: {e}")
+
+    def _on_terminated(self, connection) -> None:
+        if self._closing:
+            return
+        logger.warning("Event broker lost its Postgres connection; reconnecting")
+        self._connection = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 1
+        while not self._closing and not self._connected():
+            try:
+                await self.start()
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"Event broker reconnect failed: {e}; retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+
+def _create_event_broker() -> EventBroker:
+    if EVENT_BROKER_BACKEND == "postgres":
+        return PostgresEventBroker(EVENT_BROKER_DATABASE_URL, EVENT_BROKER_CHANNEL)
+    if EVENT_BROKER_BACKEND != "memory":
+        raise ValueError(f"Unknown EVENT_BROKER_BACKEND: {EVENT_BROKER_BACKEND}")
+    return EventBroker()
+
+event_broker = _create_event_broker()
@@ -0,0 +1,63 @@
+import os
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.figures import (
+    DERIVATIVE_FILENAME_PATTERN, FIGURE_FILENAME_PATTERN, derivative_filename, ensure_derivative
+)
+
+logger = logging.getLogger(__name__)
+
+# Figure store written by scripts/extract_tactical_tasks.py; on-demand variants are cached alongside
+FIGURE_STORE_DIR = Path(os.getenv(
+    "FIGURE_STORE_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "scripts" / "public" / "task_images")
+))
+# Variants rendered at once; Pillow resizing is CPU-bound
+FIGURE_RENDER_CONCURRENCY = int(os.getenv("FIGURE_RENDER_CONCURRENCY", "2"))
+
+_render_semaphore = asyncio.Semaphore(FIGURE_RENDER_CONCURRENCY)
+# One lock per variant being rendered, so concurrent first requests render it once
+_render_locks: Dict[str, asyncio.Lock] = {}
+
+async def _render_variant(digest: str, variant: str) -> Optional[Path]:
+    name = derivative_filename(digest, variant)
+    lock = _render_locks.setdefault(name, asyncio.Lock())
+    try:
+        async with lock:
+            path = FIGURE_STORE_DIR / name
+            if path.exists():
+                return path
+            async with _render_semaphore:
+                path = await run_in_threadpool(ensure_derivative, FIGURE_STORE_DIR, digest, variant)
+            if path is not None:
+                logger.info(f"Rendered figure variant {name}")
+            return path
+    finally:
+        if not lock.locked():
+            _render_locks.pop(name, None)
+
+async def get_figure_path(filename: str) -> Optional[Path]:
+    """
+    Resolve a content-addressed figure URL name to a file in the figure store.
+
+    "<digest>.<ext>" names the original; "<digest>.<variant>.webp" names a web
+    derivative ("thumb", "display" or "w<width>"), rendered on first request.
+
+    Returns:
+        The file's path, or None if the name is invalid or the figure does not exist
+    """
+    if FIGURE_FILENAME_PATTERN.match(filename):
+        path = FIGURE_STORE_DIR / filename
+        return path if path.is_file() else None
+    match = DERIVATIVE_FILENAME_PATTERN.match(filename)
+    if match is None:
+        return None
+    path = FIGURE_STORE_DIR / filename
+    if path.is_file():
+        return path
+    return await _render_variant(match.group("digest"), match.group("variant"))
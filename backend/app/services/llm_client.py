@@ -0,0 +1,288 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from prometheus_client import Counter, Histogram
+
+from app.utils.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# LLM_MODE selects how Gemini calls are served:
+#   live   - call Gemini (default)
+#   record - call Gemini and append every prompt/response pair to the cassette
+#   replay - serve responses from the cassette without network access
+#   stub   - answer every call with a canned response after LLM_STUB_LATENCY_MS (benchmarks, load tests)
+LLM_MODE = os.getenv("LLM_MODE", "live").lower()
+LLM_CASSETTE_PATH = Path(os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl"))
+# LLM_REPLAY_LATENCY is "original" to sleep for the recorded call duration or "zero" to answer immediately
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "zero").lower()
+# Fixed latency of every stubbed call; read per call so benchmarks can change it
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "0"))
+# Dimension of stubbed embeddings, matching the tactical_tasks.embedding column
+LLM_STUB_EMBEDDING_DIMENSION = 1536
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+if GOOGLE_API_KEY:
+    genai.configure(api_key=GOOGLE_API_KEY)
+
+# Gemini calls take from a fraction of a second to tens of seconds for long documents
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Gemini generate_content latency per prompt type",
+    ("prompt_type",),
+    buckets=LLM_LATENCY_BUCKETS,
+)
+LLM_CALL_ERRORS = Counter(
+    "llm_call_errors_total",
+    "Gemini generate_content calls that raised, per prompt type",
+    ("prompt_type",),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens billed per prompt type; kind is prompt or completion",
+    ("prompt_type", "kind"),
+)
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when the cassette holds no recording for a request."""
+
+class CassetteResponse:
+    """Minimal stand-in for a Gemini response served from the cassette."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+def _cassette_key(kind: str, model_name: str, payload: str) -> str:
+    return hashlib.sha256(f"{kind}\x00{model_name}\x00{payload}".encode("utf-8")).hexdigest()
+
+class Cassette:
+    """
+    Append-only JSON Lines store of LLM interactions.
+
+    Each line holds one interaction keyed by a hash of call kind, model and prompt.
+    Identical prompts recorded several times are replayed in recording order, the
+    last recording being repeated once they are exhausted.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._replay_positions: Dict[str, int] = {}
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._entries is None:
+            entries: Dict[str, List[Dict[str, Any]]] = {}
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries.setdefault(entry["key"], []).append(entry)
+            logger.info(f"Loaded {sum(len(v) for v in entries.values())} LLM recordings from {self.path}")
+            self._entries = entries
+        return self._entries
+
+    def record(self, kind: str, model_name: str, payload: str, response: Dict[str, Any], latency: float) -> None:
+        entry = {
+            "key": _cassette_key(kind, model_name, payload),
+            "kind": kind,
+            "model": model_name,
+            "prompt": payload,
+            "response": response,
+            "latency": latency,
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # One write per line keeps appends from concurrent ingest workers intact
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def lookup(self, kind: str, model_name: str, payload: str) -> Dict[str, Any]:
+        key = _cassette_key(kind, model_name, payload)
+        with self._lock:
+            recordings = self._load().get(key)
+            if not recordings:
+                raise CassetteMissError(f"No {kind} recording for model {model_name} in {self.path}")
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+            return recordings[min(position, len(recordings) - 1)]
+
+cassette = Cassette(LLM_CASSETTE_PATH)
+
+def _replay_delay(entry: Dict[str, Any]) -> float:
+    return entry.get("latency", 0.0) if LLM_REPLAY_LATENCY == "original" else 0.0
+
+class RecordingModel:
+    """Wraps a Gemini model and records every generate_content call to the cassette."""
+
+    def __init__(self, model, model_name: str):
+        self._model = model
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str):
+        started = time.perf_counter()
+        response = self._model.generate_content(prompt)
+        cassette.record("generate", self.model_name, prompt, {"text": response.text}, time.perf_counter() - started)
+        return response
+
+    async def generate_content_async(self, prompt: str):
+        started = time.perf_counter()
+        response = await self._model.generate_content_async(prompt)
+        cassette.record("generate", self.model_name, prompt, {"text": response.text}, time.perf_counter() - started)
+        return response
+
+class ReplayModel:
+    """Serves generate_content calls from the cassette."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str) -> CassetteResponse:
+        entry = cassette.lookup("generate", self.model_name, prompt)
+        time.sleep(_replay_delay(entry))
+        return CassetteResponse(entry["response"]["text"])
+
+    async def generate_content_async(self, prompt: str) -> CassetteResponse:
+        entry = cassette.lookup("generate", self.model_name, prompt)
+        await asyncio.sleep(_replay_delay(entry))
+        return CassetteResponse(entry["response"]["text"])
+
+# Runs of upper-case words, e.g. "SEIZE" or "ATTACK BY FIRE", are what the stub reports as task mentions
+_STUB_TASK_PATTERN = re.compile(r"\b[A-Z]{2,}(?: [A-Z]{2,})*\b")
+
+def _prompt_section(prompt: str, start: str, end: str) -> Optional[str]:
+    """The part of a prompt between two markers, or None if the prompt has no start marker."""
+    if start not in prompt:
+        return None
+    return prompt.split(start, 1)[1].split(end, 1)[0]
+
+class StubModel:
+    """
+    Answers generate_content calls with canned responses after a fixed delay.
+
+    NER prompts (with an "Input Text:" section) get every run of upper-case
+    words in the input as a candidate task, with its position; the catalog
+    lookup drops names that are not tasks, as it does for Gemini's answers.
+    Other prompts get their "Text to enhance:" section back, or the prompt.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def _respond(self, prompt: str) -> CassetteResponse:
+        text = _prompt_section(prompt, "Input Text:\n", "\n\nExpected JSON format")
+        if text is not None:
+            mentions = [
+                {"task_name": match.group(), "start_index": match.start(), "end_index": match.end()}
+                for match in _STUB_TASK_PATTERN.finditer(text)
+            ]
+            return CassetteResponse(f"```json\n{json.dumps(mentions)}\n```")
+        text = _prompt_section(prompt, "Text to enhance:\n", "\n\nEnhanced version:")
+        return CassetteResponse(text if text is not None else prompt)
+
+    def generate_content(self, prompt: str) -> CassetteResponse:
+        time.sleep(LLM_STUB_LATENCY_MS / 1000)
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt: str) -> CassetteResponse:
+        await asyncio.sleep(LLM_STUB_LATENCY_MS / 1000)
+        return self._respond(prompt)
+
+def get_generative_model(model_name: str):
+    """
+    Returns a Gemini generative model honoring LLM_MODE.
+
+    Returns None when live or record mode is selected and GOOGLE_API_KEY is not set.
+    """
+    if LLM_MODE == "stub":
+        logger.info(f"Serving {model_name} from the LLM stub ({LLM_STUB_LATENCY_MS:g} ms per call)")
+        return StubModel(model_name)
+    if LLM_MODE == "replay":
+        logger.info(f"Serving {model_name} from LLM cassette {LLM_CASSETTE_PATH}")
+        return ReplayModel(model_name)
+    if not GOOGLE_API_KEY:
+        return None
+    model = genai.GenerativeModel(model_name)
+    if LLM_MODE == "record":
+        logger.info(f"Recording {model_name} calls to LLM cassette {LLM_CASSETTE_PATH}")
+        return RecordingModel(model, model_name)
+    return model
+
+async def generate_content_async(model, prompt: str, prompt_type: str):
+    """
+    Call model.generate_content_async, recording latency, token usage and errors,
+    in an "llm <prompt_type>" span.
+
+    Args:
+        model: A model returned by get_generative_model
+        prompt: Prompt text
+        prompt_type: Metrics label naming the kind of prompt, e.g. "ner" or "enhancement"
+
+    Returns:
+        The model's response
+    """
+    with tracer.start_as_current_span(f"llm {prompt_type}", kind=SpanKind.CLIENT, attributes={
+        "llm.prompt_type": prompt_type,
+        "llm.model": getattr(model, "model_name", type(model).__name__),
+        "llm.mode": LLM_MODE,
+        "llm.prompt_chars": len(prompt),
+    }) as span:
+        started = time.perf_counter()
+        try:
+            response = await model.generate_content_async(prompt)
+        except Exception:
+            LLM_CALL_ERRORS.labels(prompt_type=prompt_type).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            LLM_CALL_DURATION.labels(prompt_type=prompt_type).observe(elapsed)
+            record_stage("llm", elapsed)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+            completion_tokens = getattr(usage, "candidates_token_count", 0) or 0
+            LLM_TOKENS.labels(prompt_type=prompt_type, kind="prompt").inc(prompt_tokens)
+            LLM_TOKENS.labels(prompt_type=prompt_type, kind="completion").inc(completion_tokens)
+            span.set_attributes({"llm.prompt_tokens": prompt_tokens, "llm.completion_tokens": completion_tokens})
+        return response
+
+def embed_content(model: str, content: str, task_type: str) -> Dict[str, Any]:
+    """genai.embed_content honoring LLM_MODE. Returns a dict with an "embedding" list."""
+    payload = f"{task_type}\x00{content}"
+    if LLM_MODE == "stub":
+        # Deterministic per content, so identical texts embed identically
+        time.sleep(LLM_STUB_LATENCY_MS / 1000)
+        rng = random.Random(_cassette_key("embed", model, payload))
+        return {"embedding": [rng.gauss(0.0, 1.0) for _ in range(LLM_STUB_EMBEDDING_DIMENSION)]}
+    if LLM_MODE == "replay":
+        entry = cassette.lookup("embed", model, payload)
+        time.sleep(_replay_delay(entry))
+        return {"embedding": list(entry["response"]["embedding"])}
+
+    started = time.perf_counter()
+    result = genai.embed_content(model=model, content=content, task_type=task_type)
+    if LLM_MODE == "record":
+        cassette.record("embed", model, payload, {"embedding": list(result["embedding"])}, time.perf_counter() - started)
+    return result
+
+def is_available() -> bool:
+    """True when LLM calls can be served (an API key is configured or replay or stub mode is active)."""
+    return LLM_MODE in ("replay", "stub") or bool(GOOGLE_API_KEY)
@@ -1,75 +1,226 @@
+import os
+import time
+import asyncio
 import logging
-from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from fastapi import BackgroundTasks
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.ext.asyncio import AsyncSession
+from opentelemetry import context as otel_context, trace
+
+from db.database import AsyncSessionLocal
 from app.services.tactical_analysis_service import identify_and_retrieve_tactical_tasks
-from app.crud.opord import get_opord, update_opord
+from app.crud.opord import get_opord_content, count_task_mentions, store_analysis_results
+from app.services.task_catalog_service import get_task_catalog
+from app.services.event_broker import event_broker
+from app.utils.analysis_results import compact_analysis_results, reference_analysis_results
+from app.utils.metrics import detached_from_request
+from app.utils.tracing import mark_error
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# Number of OPORDs analyzed at once by run_bulk_tactical_analysis
+BULK_ANALYSIS_CONCURRENCY = int(os.getenv("BULK_ANALYSIS_CONCURRENCY", "4"))
+
+# Analyses wait behind the response and, in bulk, behind other OPORDs; each includes an LLM call
+JOB_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+ANALYSIS_JOBS_QUEUED = Gauge("analysis_jobs_queued", "OPORD analyses scheduled but not yet started", multiprocess_mode="livesum")
+ANALYSIS_JOBS_RUNNING = Gauge("analysis_jobs_running", "OPORD analyses in progress", multiprocess_mode="livesum")
+ANALYSIS_JOB_WAIT = Histogram(
+    "analysis_job_wait_seconds",
+    "Time from scheduling an OPORD analysis to its start",
+    buckets=JOB_LATENCY_BUCKETS,
+)
+ANALYSIS_JOB_DURATION = Histogram(
+    "analysis_job_duration_seconds",
+    "Time to analyze one OPORD and store the results",
+    buckets=JOB_LATENCY_BUCKETS,
+)
+
+@contextmanager
+def _analysis_job(opord_id: int, queued_at: Optional[float], trace_context: Optional[otel_context.Context]) -> Iterator[None]:
+    attributes = {"opord.id": opord_id}
+    if queued_at is not None:
+        ANALYSIS_JOBS_QUEUED.dec()
+        wait = time.perf_counter() - queued_at
+        ANALYSIS_JOB_WAIT.observe(wait)
+        attributes["job.wait_ms"] = round(wait * 1000, 3)
+    ANALYSIS_JOBS_RUNNING.inc()
+    # Background tasks run inside the request's context; keep their queries out of its stats
+    with detached_from_request(), ANALYSIS_JOB_DURATION.time(), \
+            tracer.start_as_current_span("analysis.job", context=trace_context, attributes=attributes):
+        try:
+            yield
+        finally:
+            ANALYSIS_JOBS_RUNNING.dec()
+
+def schedule_analysis(background_tasks: BackgroundTasks, opord_ids: List[int]) -> None:
+    """
+    Queue tactical analysis of OPORDs to run once the response has been sent.
+
+    A single OPORD is analyzed by run_tactical_analysis_and_store_results, several
+    by one run_bulk_tactical_analysis task. Queued analyses are reported by the
+    analysis_jobs_queued gauge until they start. The jobs carry the request's
+    trace context, so their spans join the trace of the request that queued them.
+
+    Args:
+        background_tasks: The endpoint's BackgroundTasks
+        opord_ids: IDs of the OPORDs to analyze
+    """
+    if not opord_ids:
+        return
+    queued_at = time.perf_counter()
+    trace_context = otel_context.get_current()
+    ANALYSIS_JOBS_QUEUED.inc(len(opord_ids))
+    if len(opord_ids) == 1:
+        background_tasks.add_task(
+            run_tactical_analysis_and_store_results,
+            opord_id=opord_ids[0], queued_at=queued_at, trace_context=trace_context
+        )
+    else:
+        background_tasks.add_task(
+            run_bulk_tactical_analysis,
+            opord_ids=opord_ids, queued_at=queued_at, trace_context=trace_context
+        )
+
+async def _publish_analysis(
+    owner: Tuple[Optional[int], int],
+    opord_id: int,
+    analysis_results: List[Dict[str, Any]],
+    event_type: str,
+    tasks: Dict[int, Dict[str, Any]]
+) -> None:
+    # Push the stored results to the owner's open event channels so clients need not re-fetch
+    user_id, revision = owner
+    if user_id is None:
+        return
+    mentions, analysis_tasks = reference_analysis_results(analysis_results, tasks)
+    try:
+        await event_broker.publish(user_id, {
+            "type": event_type,
+            "opord_id": opord_id,
+            "revision": revision,
+            "analysis_results": mentions,
+            "analysis_tasks": analysis_tasks,
+        })
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} for OPORD ID {opord_id}: {e}", exc_info=True)
 
 async def run_tactical_analysis_and_store_results(
-    db: Session,
-    opord_id: int
+    opord_id: int,
+    queued_at: Optional[float] = None,
+    trace_context: Optional[otel_context.Context] = None
 ):
     """
     Performs tactical task analysis on an OPORD's content and stores the results.
     
-    This function is designed to be run as a background task. It:
-    1. Retrieves the OPORD from the database
+    This function is designed to be run as a background task. It opens its own
+    database sessions, since the request's session is closed once the response is sent. It:
+    1. Reads the OPORD's content and revision, then releases the connection
     2. Checks for valid content
-    3. Performs tactical analysis using NLP
-    4. Stores the analysis results back in the OPORD
+    3. Performs tactical analysis using NLP, holding no connection during the LLM call
+    4. Stores the analysis results back in the OPORD as compact task mentions,
+       unless the OPORD was revised meanwhile (its newer content has its own analysis queued)
+    5. Publishes an analysis.completed (or analysis.failed) event to the owner
     
     Args:
-        db: Database session
         opord_id: ID of the OPORD to analyze
+        queued_at: perf_counter() time the analysis was queued by schedule_analysis
+        trace_context: Trace context of the request that queued the analysis;
+            defaults to the current context
     
     Note:
         If the OPORD has no content, an empty analysis result will be stored.
         Any errors during analysis are logged but won't stop the application.
     """
+    with _analysis_job(opord_id, queued_at, trace_context):
+        await _analyze_and_store(opord_id)
+
+async def _analyze_and_store(opord_id: int) -> None:
     logger.info(f"Starting background tactical analysis for OPORD ID: {opord_id}")
-    db_opord = get_opord(db=db, opord_id=opord_id)
+    # Only read here: a session kept open through the LLM call would hold a pooled
+    # connection idle in transaction for the whole round trip
+    async with AsyncSessionLocal() as db:
+        current = await get_opord_content(db, opord_id)
 
-    if not db_opord:
+    if current is None:
         logger.error(f"OPORD ID: {opord_id} not found for background analysis. Skipping.")
         return
+    owner = (current["user_id"], current["revision"])
+
+    async def store(db: AsyncSession, analysis_results: List[Dict[str, Any]], catalog_version: Optional[str], task_count: Optional[int]) -> bool:
+        if not await store_analysis_results(db, opord_id, current["revision"], analysis_results, catalog_version, task_count):
+            await db.rollback()
+            logger.info(f"OPORD ID: {opord_id} was revised during analysis. Discarding results for revision {current['revision']}.")
+            return False
+        await db.commit()
+        return True
+
+    # A session only checks out a connection when first used: by a catalog reload after
+    # the LLM call returns, or to store the results
+    async with AsyncSessionLocal() as db:
+        if not current["content"]:
+            logger.info(f"OPORD ID: {opord_id} has no content. Skipping analysis.")
+            try:
+                if await store(db, [], None, 0):
+                    logger.info(f"Stored empty analysis results for OPORD ID: {opord_id} due to no content.")
+                    await _publish_analysis(owner, opord_id, [], "analysis.completed", {})
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error storing empty analysis for OPORD ID {opord_id}: {e}", exc_info=True)
+            return
 
-    if not db_opord.content:
-        logger.info(f"OPORD ID: {opord_id} has no content. Skipping analysis.")
-        db_opord.analysis_results = []
         try:
-            db.commit()
-            logger.info(f"Stored empty analysis results for OPORD ID: {opord_id} due to no content.")
+            logger.debug(f"Performing tactical analysis for OPORD ID: {opord_id}...")
+            analysis_results = await identify_and_retrieve_tactical_tasks(
+                db=db, 
+                text=current["content"]
+            )
+            catalog = await get_task_catalog(db)
+            mentions = compact_analysis_results(analysis_results)
+            if await store(db, mentions, catalog.version, count_task_mentions(mentions)):
+                logger.info(f"Successfully performed analysis and stored results for OPORD ID: {opord_id}")
+                await _publish_analysis(owner, opord_id, mentions, "analysis.completed", catalog.tasks)
         except Exception as e:
-            db.rollback()
-            logger.error(f"Error storing empty analysis for OPORD ID {opord_id}: {e}", exc_info=True)
-        return
+            await db.rollback()
+            logger.error(f"Error during background tactical analysis for OPORD ID {opord_id}: {e}", exc_info=True)
+            mark_error(trace.get_current_span(), e)
+            # Store error state in analysis_results as a list to maintain schema compatibility
+            error_results = [{"error": "Analysis failed", "details": str(e)}]
+            try:
+                if await store(db, error_results, None, None):
+                    await _publish_analysis(owner, opord_id, error_results, "analysis.failed", {})
+            except Exception as commit_error:
+                logger.error(f"Failed to store error state for OPORD ID {opord_id}: {commit_error}", exc_info=True)
 
-    try:
-        logger.debug(f"Performing tactical analysis for OPORD ID: {opord_id}...")
-        analysis_results = await identify_and_retrieve_tactical_tasks(
-            db=db, 
-            text=db_opord.content
-        )
-        
-        db_opord.analysis_results = analysis_results
-        db.commit()
-        logger.info(f"Successfully performed analysis and stored results for OPORD ID: {opord_id}")
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error during background tactical analysis for OPORD ID {opord_id}: {e}", exc_info=True)
-        # Store error state in analysis_results as a list to maintain schema compatibility
-        db_opord.analysis_results = [{
-            "error": "Analysis failed",
-            "details": str(e),
-            "task": "ERROR",
-            "position": {"start": 0, "end": 0},
-            "definition": str(e),
-            "page_number": "N/A",
-            "image_path": None,
-            "id": 0
-        }]
-        try:
-            db.commit()
-        except Exception as commit_error:
-            logger.error(f"Failed to store error state for OPORD ID {opord_id}: {commit_error}", exc_info=True)
\ No newline at end of file
+async def run_bulk_tactical_analysis(
+    opord_ids: List[int],
+    queued_at: Optional[float] = None,
+    trace_context: Optional[otel_context.Context] = None
+):
+    """
+    Analyzes many OPORDs, e.g. after a bulk import, as a single background task.
+    
+    A fixed pool of BULK_ANALYSIS_CONCURRENCY workers takes OPORDs from the list
+    so LLM calls and database connections stay bounded however large the import.
+    
+    Args:
+        opord_ids: IDs of the OPORDs to analyze
+        queued_at: perf_counter() time the analyses were queued by schedule_analysis
+        trace_context: Trace context of the request that queued the analyses;
+            each OPORD's analysis.job span is a child of the analysis.bulk span
+    """
+    logger.info(f"Starting bulk tactical analysis of {len(opord_ids)} OPORDs")
+    pending = iter(opord_ids)
+
+    async def worker():
+        for opord_id in pending:
+            await run_tactical_analysis_and_store_results(opord_id, queued_at=queued_at)
+
+    with tracer.start_as_current_span("analysis.bulk", context=trace_context, attributes={"opord.count": len(opord_ids)}):
+        await asyncio.gather(*(worker() for _ in range(min(BULK_ANALYSIS_CONCURRENCY, len(opord_ids)))))
+    logger.info(f"Finished bulk tactical analysis of {len(opord_ids)} OPORDs")
@@ -0,0 +1,113 @@
+import os
+import re
+import json
+import uuid
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.profiler import AWAIT_MARKER, AsyncStackSampler
+
+logger = logging.getLogger(__name__)
+
+# Users (by email) allowed to request profiles and read reports; empty disables on-demand profiling
+PROFILING_ADMIN_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("PROFILING_ADMIN_EMAILS", "").split(",") if email.strip()
+)
+# Fraction of all requests profiled without being asked to; 0 profiles only on demand
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+# Sampled (not requested) profiles are kept only for requests at least this slow
+PROFILING_MIN_DURATION_MS = float(os.getenv("PROFILING_MIN_DURATION_MS", "500"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+# Requests profiled at once per process; further requests run unprofiled
+PROFILING_MAX_CONCURRENT = int(os.getenv("PROFILING_MAX_CONCURRENT", "4"))
+PROFILING_REPORT_DIR = Path(os.getenv(
+    "PROFILING_REPORT_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "profiles")
+))
+# Oldest reports are deleted beyond this many
+PROFILING_MAX_REPORTS = int(os.getenv("PROFILING_MAX_REPORTS", "200"))
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def is_profiling_admin(email: Optional[str]) -> bool:
+    return email is not None and email.lower() in PROFILING_ADMIN_EMAILS
+
+def new_profile_id() -> str:
+    return uuid.uuid4().hex
+
+def build_report(sampler: AsyncStackSampler, profile_id: str, request_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Profile report for one request.
+
+    Args:
+        sampler: Stopped sampler that profiled the request
+        profile_id: Id the report is stored under (see new_profile_id)
+        request_info: Request details (method, path, route, status, trigger) to store with the profile
+
+    Returns:
+        Report with its id, request details, duration, sample counts, the time
+        spent waiting (suspended on I/O or threads), functions by inclusive time
+        (top_functions) and by self time (hot_spots), and the folded stacks
+    """
+    waiting = sum(count for stack, count in sampler.stacks.items() if stack and stack[-1] == AWAIT_MARKER)
+    seconds_per_sample = sampler.duration / sampler.samples if sampler.samples else 0.0
+    return {
+        "id": profile_id,
+        **request_info,
+        "duration_ms": round(sampler.duration * 1000, 3),
+        "interval_ms": sampler.interval * 1000,
+        "samples": sampler.samples,
+        "waiting_ms": round(waiting * seconds_per_sample * 1000, 3),
+        "top_functions": sampler.top_functions(by="total"),
+        "hot_spots": sampler.top_functions(limit=15, by="self"),
+        "folded": sampler.folded(),
+    }
+
+def _write_report(report: Dict[str, Any]) -> None:
+    PROFILING_REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILING_REPORT_DIR / f"{report['id']}.json"
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(report), encoding="utf-8")
+    tmp_path.replace(path)
+    reports = sorted(PROFILING_REPORT_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in reports[:max(len(reports) - PROFILING_MAX_REPORTS, 0)]:
+        old.unlink(missing_ok=True)
+
+async def save_report(report: Dict[str, Any]) -> None:
+    """Store a report under its id in PROFILING_REPORT_DIR, pruning the oldest beyond PROFILING_MAX_REPORTS."""
+    try:
+        await run_in_threadpool(_write_report, report)
+    except OSError as e:
+        logger.error(f"Failed to store profile {report['id']}: {e}")
+
+def _read_report(profile_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((PROFILING_REPORT_DIR / f"{profile_id}.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+async def load_report(profile_id: str) -> Optional[Dict[str, Any]]:
+    """The stored report with this id, or None."""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    return await run_in_threadpool(_read_report, profile_id)
+
+def _list_reports(limit: int) -> List[Dict[str, Any]]:
+    if not PROFILING_REPORT_DIR.exists():
+        return []
+    paths = sorted(PROFILING_REPORT_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    summaries = []
+    for path in paths[:limit]:
+        try:
+            report = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        summaries.append({key: value for key, value in report.items() if key not in ("top_functions", "hot_spots", "folded")})
+    return summaries
+
+async def list_reports(limit: int) -> List[Dict[str, Any]]:
+    """Summaries (without stacks) of the most recent reports, newest first."""
+    return await run_in_threadpool(_list_reports, limit)
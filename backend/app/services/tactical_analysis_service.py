@@ -1,27 +1,25 @@
 import os
 import logging
 import json
-import google.generativeai as genai
-from sqlalchemy.orm import Session
+from opentelemetry import trace
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 
-from app.crud.tactical_task import get_tactical_task_by_name
 from app.models.schemas import TacticalTask as TacticalTaskSchema
+from app.services.task_catalog_service import get_task_catalog
+from app.services.llm_client import generate_content_async, get_generative_model
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
 
-# Configure Gemini
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
+# Configure Gemini (LLM_MODE=record/replay serves calls through the LLM cassette)
+TEXT_GENERATION_MODEL_NAME = os.getenv("TEXT_GENERATION_MODEL_NAME", "gemini-2.0-flash")
+generative_model = get_generative_model(TEXT_GENERATION_MODEL_NAME)
+if not generative_model:
     logger.error("GOOGLE_API_KEY not found. NER service will not function.")
-    generative_model = None
-else:
-    genai.configure(api_key=GOOGLE_API_KEY)
-    TEXT_GENERATION_MODEL_NAME = os.getenv("TEXT_GENERATION_MODEL_NAME", "gemini-2.0-flash")
-    generative_model = genai.GenerativeModel(TEXT_GENERATION_MODEL_NAME)
 
 async def identify_and_retrieve_tactical_tasks(
-    db: Session,
+    db: AsyncSession,
     text: str
 ) -> List[Dict[str, Any]]:
     """
@@ -29,7 +27,7 @@ async def identify_and_retrieve_tactical_tasks(
     
     Uses Gemini AI to perform Named Entity Recognition (NER) on military text,
     identifying potential tactical tasks. For each identified task, retrieves
-    full details from the database.
+    full details from the cached task catalog.
     
     Args:
         db: Database session
@@ -41,6 +39,12 @@ async def identify_and_retrieve_tactical_tasks(
     Note:
         If the AI service is unavailable, returns an empty list.
     """
+    with tracer.start_as_current_span("tactical_analysis.identify_tasks", attributes={"text.length": len(text)}) as span:
+        results = await _identify_and_retrieve(db, text)
+        span.set_attribute("tactical_analysis.task_mentions", len(results))
+        return results
+
+async def _identify_and_retrieve(db: AsyncSession, text: str) -> List[Dict[str, Any]]:
     if not generative_model:
         logger.error("Generative model not initialized. Cannot perform NER.")
         return []
@@ -72,7 +76,7 @@ Expected JSON format (replace with actual values):
 
     try:
         logger.debug(f"Sending text to Gemini for NER. Text length: {len(text)} chars.")
-        response = generative_model.generate_content(prompt)
+        response = await generate_content_async(generative_model, prompt, prompt_type="ner")
         
         cleaned_response_text = response.text.strip()
         if cleaned_response_text.startswith("```json"):
@@ -96,17 +100,19 @@ Expected JSON format (replace with actual values):
             return []
             
         # Validate and enrich the recognized tasks
+        catalog = await get_task_catalog(db)
         enriched_results = []
         for entity in recognized_entities:
             task_name = entity.get("task_name", "").strip().upper()
             if not task_name:
                 continue
                 
-            # Get full task details from database
-            db_task = get_tactical_task_by_name(db, task_name)
-            if not db_task:
+            # Get full task details from the catalog
+            task_id = catalog.by_name.get(task_name)
+            if task_id is None:
                 logger.debug(f"Task '{task_name}' not found in database, skipping.")
                 continue
+            task = catalog.tasks[task_id]
                 
             # Add task details and position to results
             enriched_results.append({
@@ -115,10 +121,10 @@ Expected JSON format (replace with actual values):
                     "start": entity["start_index"],
                     "end": entity["end_index"]
                 },
-                "definition": db_task.definition,
-                "page_number": db_task.page_number,
-                "image_path": db_task.image_path,
-                "id": db_task.id
+                "definition": task["definition"],
+                "page_number": task["page_number"],
+                "image_path": task["image_path"],
+                "id": task_id
             })
             
         return enriched_results
@@ -0,0 +1,83 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from prometheus_client import Counter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+
+from app.models.tactical_task import TacticalTask
+
+logger = logging.getLogger(__name__)
+
+# How long a loaded catalog is served before it is reloaded from the database
+TASK_CATALOG_TTL_SECONDS = float(os.getenv("TASK_CATALOG_TTL_SECONDS", "300"))
+
+class TaskCatalog:
+    """
+    In-memory snapshot of the tactical task catalog used to hydrate analysis results.
+
+    Attributes:
+        tasks: Task details (name, definition, page_number, image_path) keyed by task ID
+        by_name: Task ID keyed by task name
+        version: Digest of the catalog contents; changes whenever a task changes
+    """
+
+    def __init__(self, tasks: Dict[int, Dict[str, Any]]):
+        self.tasks = tasks
+        self.by_name = {task["name"]: task_id for task_id, task in tasks.items()}
+        digest = hashlib.sha256()
+        for task_id in sorted(tasks):
+            task = tasks[task_id]
+            digest.update(repr((task_id, task["name"], task["definition"], task["page_number"], task["image_path"])).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+_catalog: Optional[TaskCatalog] = None
+_loaded_at = 0.0
+_load_lock = asyncio.Lock()
+
+CATALOG_LOOKUPS = Counter(
+    "task_catalog_lookups_total",
+    "Task catalog reads, answered from memory (hit) or by reloading from the database (miss)",
+    ("result",),
+)
+
+async def _load_catalog(db: AsyncSession) -> TaskCatalog:
+    # Embeddings are not needed for hydration and dominate row size, so only the detail columns are read
+    result = await db.execute(
+        select(
+            TacticalTask.id,
+            TacticalTask.name,
+            TacticalTask.definition,
+            TacticalTask.page_number,
+            TacticalTask.image_path
+        )
+    )
+    tasks = {row.id: dict(row._mapping) for row in result.all()}
+    for task in tasks.values():
+        del task["id"]
+    catalog = TaskCatalog(tasks)
+    logger.info(f"Loaded task catalog with {len(tasks)} tasks (version {catalog.version}).")
+    return catalog
+
+async def get_task_catalog(db: AsyncSession) -> TaskCatalog:
+    """Return the cached task catalog, reloading it once TASK_CATALOG_TTL_SECONDS have passed."""
+    global _catalog, _loaded_at
+    if _catalog is not None and time.monotonic() - _loaded_at < TASK_CATALOG_TTL_SECONDS:
+        CATALOG_LOOKUPS.labels(result="hit").inc()
+        return _catalog
+    async with _load_lock:
+        if _catalog is None or time.monotonic() - _loaded_at >= TASK_CATALOG_TTL_SECONDS:
+            CATALOG_LOOKUPS.labels(result="miss").inc()
+            _catalog = await _load_catalog(db)
+            _loaded_at = time.monotonic()
+        else:
+            CATALOG_LOOKUPS.labels(result="hit").inc()
+        return _catalog
+
+def invalidate_task_catalog() -> None:
+    """Drop the cached catalog so the next read reloads it (call after any tactical task change)."""
+    global _catalog
+    _catalog = None
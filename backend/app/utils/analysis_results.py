@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Stored analysis_results entries are compact mention references:
+#   {"task_id": 12, "start": 45, "end": 50}
+# or error markers:
+#   {"error": "Analysis failed", "details": "..."}
+# Task definitions, page numbers and images are looked up in the task catalog at read time.
+
+def is_error_entry(entry: Dict[str, Any]) -> bool:
+    return "error" in entry
+
+def compact_entry(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert an analysis entry in full or compact form to the compact stored form.
+
+    Returns None for entries that do not reference a catalog task.
+    """
+    if is_error_entry(entry):
+        return {"error": entry.get("error"), "details": entry.get("details")}
+    if "task_id" in entry:
+        return {"task_id": entry["task_id"], "start": entry["start"], "end": entry["end"]}
+    position = entry.get("position") or {}
+    task_id = entry.get("id")
+    if not task_id or "start" not in position or "end" not in position:
+        return None
+    return {"task_id": task_id, "start": position["start"], "end": position["end"]}
+
+def compact_analysis_results(results: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """Convert analysis results to the compact stored form, keeping None as None."""
+    if results is None:
+        return None
+    compacted = (compact_entry(entry) for entry in results)
+    return [entry for entry in compacted if entry is not None]
+
+def _error_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    # Same shape as a task mention so clients can render it uniformly
+    return {
+        "error": entry.get("error"),
+        "details": entry.get("details"),
+        "task": "ERROR",
+        "position": {"start": 0, "end": 0},
+        "definition": entry.get("details"),
+        "page_number": "N/A",
+        "image_path": None,
+        "id": 0
+    }
+
+def hydrate_analysis_results(
+    results: Optional[List[Dict[str, Any]]],
+    tasks: Dict[int, Dict[str, Any]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Expand stored analysis results to the full per-mention format with task details.
+
+    Mentions of tasks no longer in the catalog are dropped.
+    """
+    if results is None:
+        return None
+    hydrated = []
+    for entry in compact_analysis_results(results):
+        if is_error_entry(entry):
+            hydrated.append(_error_result(entry))
+            continue
+        task = tasks.get(entry["task_id"])
+        if task is None:
+            continue
+        hydrated.append({
+            "task": task["name"],
+            "position": {"start": entry["start"], "end": entry["end"]},
+            "definition": task["definition"],
+            "page_number": task["page_number"],
+            "image_path": task["image_path"],
+            "id": entry["task_id"]
+        })
+    return hydrated
+
+def reference_analysis_results(
+    results: Optional[List[Dict[str, Any]]],
+    tasks: Dict[int, Dict[str, Any]]
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[Dict[int, Dict[str, Any]]]]:
+    """
+    Split stored analysis results into lightweight mentions and the details of each distinct task.
+
+    Mentions keep the "task", "position" and "id" keys of the full format; definition,
+    page_number and image_path are sent once per task in the returned task map.
+    """
+    if results is None:
+        return None, None
+    mentions = []
+    referenced: Dict[int, Dict[str, Any]] = {}
+    for entry in compact_analysis_results(results):
+        if is_error_entry(entry):
+            mentions.append(_error_result(entry))
+            continue
+        task = tasks.get(entry["task_id"])
+        if task is None:
+            continue
+        mentions.append({
+            "task": task["name"],
+            "position": {"start": entry["start"], "end": entry["end"]},
+            "id": entry["task_id"]
+        })
+        referenced[entry["task_id"]] = task
+    return mentions, referenced
@@ -0,0 +1,123 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from prometheus_client import Counter, Gauge
+
+# Updated as the caches are used, so worker processes' values aggregate in multiprocess mode
+CACHE_HITS = Counter("cache_hits_total", "Lookups answered from an in-process cache", ("cache",))
+CACHE_MISSES = Counter("cache_misses_total", "Lookups that found no valid entry", ("cache",))
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Entries dropped to stay within the cache's max_size", ("cache",))
+# Ratios do not add up across worker processes; each worker's is exposed with a pid label
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Hits over lookups since startup", ("cache",), multiprocess_mode="liveall")
+CACHE_ENTRIES = Gauge("cache_entries", "Entries currently cached", ("cache",), multiprocess_mode="livesum")
+
+class TTLCache:
+    """
+    Bounded in-process cache whose entries expire after a fixed time.
+
+    Least recently used entries are evicted once max_size is reached. Every
+    cache registers itself in CACHES so its statistics are reported at
+    /health/caches.
+
+    Attributes:
+        name: Name the cache is reported under
+        ttl: Seconds an entry stays valid
+        max_size: Maximum number of entries
+        hits: Lookups answered from the cache
+        misses: Lookups that found no valid entry
+        evictions: Entries dropped to stay within max_size
+        invalidations: Entries dropped by invalidate/invalidate_matching
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._hits_metric = CACHE_HITS.labels(name)
+        self._misses_metric = CACHE_MISSES.labels(name)
+        self._evictions_metric = CACHE_EVICTIONS.labels(name)
+        self._hit_ratio_metric = CACHE_HIT_RATIO.labels(name)
+        self._entries_metric = CACHE_ENTRIES.labels(name)
+        CACHES[name] = self
+
+    def _record_lookup(self, hit: bool) -> None:
+        # Called with the lock held
+        if hit:
+            self.hits += 1
+            self._hits_metric.inc()
+        else:
+            self.misses += 1
+            self._misses_metric.inc()
+        self._hit_ratio_metric.set(self.hits / (self.hits + self.misses))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    self._entries_metric.set(len(self._entries))
+                self._record_lookup(hit=False)
+                return None
+            self._entries.move_to_end(key)
+            self._record_lookup(hit=True)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                self._evictions_metric.inc()
+            self._entries_metric.set(len(self._entries))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+                self._entries_metric.set(len(self._entries))
+
+    def invalidate_matching(self, predicate: Callable[[Any], bool]) -> None:
+        """Drop every entry whose value satisfies predicate (scans the whole cache)."""
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+                self.invalidations += 1
+            self._entries_metric.set(len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._entries_metric.set(0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+# Every TTLCache, keyed by name
+CACHES: Dict[str, TTLCache] = {}
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics for every cache."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
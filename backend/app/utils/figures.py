@@ -0,0 +1,131 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image
+
+# Web derivatives generated for every stored figure: variant name -> max edge in pixels
+FIGURE_VARIANTS: Dict[str, int] = {
+    "thumb": 160,
+    "display": 640,
+}
+# Widths that can be requested as "w<width>" variants and are rendered on first request;
+# a fixed set keeps the number of cached files per figure bounded
+FIGURE_WIDTHS = (160, 320, 480, 640, 960, 1280)
+DERIVATIVE_FORMAT = "webp"
+DERIVATIVE_QUALITY = 80
+
+# Content-addressed figure names: "<digest>.<ext>" for originals, "<digest>.<variant>.webp" for derivatives
+DIGEST_LENGTH = 32
+FIGURE_FILENAME_PATTERN = re.compile(rf"^(?P<digest>[0-9a-f]{{{DIGEST_LENGTH}}})\.(?P<ext>[a-z0-9]+)$")
+DERIVATIVE_FILENAME_PATTERN = re.compile(
+    rf"^(?P<digest>[0-9a-f]{{{DIGEST_LENGTH}}})\.(?P<variant>[a-z0-9]+)\.{DERIVATIVE_FORMAT}$"
+)
+
+def content_digest(data: bytes) -> str:
+    """Return the content address (truncated SHA-256 hex digest) of image bytes."""
+    return hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+
+def original_filename(digest: str, ext: str) -> str:
+    """Filename of the original raster for a digest."""
+    return f"{digest}.{ext.lower()}"
+
+def derivative_filename(digest: str, variant: str) -> str:
+    """Filename of a web derivative for a digest."""
+    return f"{digest}.{variant}.{DERIVATIVE_FORMAT}"
+
+def digest_from_filename(filename: str) -> Optional[str]:
+    """Return the digest of a content-addressed original filename, or None for legacy names."""
+    match = FIGURE_FILENAME_PATTERN.match(Path(filename).name)
+    return match.group("digest") if match else None
+
+def variant_max_edge(variant: str) -> Optional[int]:
+    """Longest edge in pixels of a named ("display") or width ("w320") variant, or None if unknown."""
+    if variant in FIGURE_VARIANTS:
+        return FIGURE_VARIANTS[variant]
+    if variant.startswith("w") and variant[1:].isdigit() and int(variant[1:]) in FIGURE_WIDTHS:
+        return int(variant[1:])
+    return None
+
+def find_original(store_dir: Path, digest: str) -> Optional[Path]:
+    """Path of the stored original for a digest, whatever its extension, or None."""
+    for path in store_dir.glob(f"{digest}.*"):
+        if FIGURE_FILENAME_PATTERN.match(path.name):
+            return path
+    return None
+
+def ensure_derivative(store_dir: Path, digest: str, variant: str) -> Optional[Path]:
+    """
+    Return the path of a web derivative, rendering and storing it first if needed.
+
+    Blocking (file IO and Pillow); run it in a worker thread from async code.
+
+    Returns:
+        The derivative's path, or None if the variant is unknown or the original is missing
+    """
+    max_edge = variant_max_edge(variant)
+    if max_edge is None:
+        return None
+    derivative_path = store_dir / derivative_filename(digest, variant)
+    if derivative_path.exists():
+        return derivative_path
+    original_path = find_original(store_dir, digest)
+    if original_path is None:
+        return None
+    _write_atomically(derivative_path, render_derivative(original_path.read_bytes(), max_edge))
+    return derivative_path
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    """Write data to path via a temporary file so concurrent writers never expose partial files."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def render_derivative(image_bytes: bytes, max_edge: int) -> bytes:
+    """Downscale an image so its longest edge is at most max_edge and encode it as WebP."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format=DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY, method=6)
+        return buffer.getvalue()
+
+def store_figure(image_bytes: bytes, ext: str, output_dir: Path) -> str:
+    """
+    Store an image under its content address and create its web derivatives.
+
+    Files that already exist are left untouched, so re-running an ingest or storing
+    the same raster under another figure reference costs a hash and a stat.
+
+    Args:
+        image_bytes: Raw image bytes as extracted from the PDF
+        ext: Image file extension reported by the extractor (e.g. "png")
+        output_dir: Directory holding the figure store
+
+    Returns:
+        The filename of the stored original ("<digest>.<ext>")
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    digest = content_digest(image_bytes)
+
+    original_path = output_dir / original_filename(digest, ext)
+    if not original_path.exists():
+        _write_atomically(original_path, image_bytes)
+
+    for variant, max_edge in FIGURE_VARIANTS.items():
+        derivative_path = output_dir / derivative_filename(digest, variant)
+        if not derivative_path.exists():
+            _write_atomically(derivative_path, render_derivative(image_bytes, max_edge))
+
+    return original_path.name
@@ -0,0 +1,67 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response, status
+
+from app.middleware.compression import negotiated_etag
+
+# Responses are per user and must be revalidated before reuse; the ETag makes revalidation cheap
+PRIVATE_REVALIDATE = "private, no-cache"
+# Content-addressed assets never change under the same URL
+PUBLIC_IMMUTABLE = "public, max-age=31536000, immutable"
+
+def compute_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from the values that determine a response body.
+
+    Parts are hashed, not serialized into the tag, so they can be any JSON-encodable
+    values (datetimes are encoded with str()).
+    """
+    raw = json.dumps(parts, default=str, separators=(",", ":")).encode("utf-8")
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+def _opaque_tag(etag: str) -> str:
+    # If-None-Match uses the weak comparison: W/"x" and "x" are the same tag
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header lists `etag` (or is "*")."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    expected = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == expected for candidate in header.split(","))
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = PRIVATE_REVALIDATE) -> None:
+    """Attach the ETag and caching policy to a 200 response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+def not_modified(
+    request: Request,
+    etag: str,
+    headers: Optional[Dict[str, str]] = None,
+    cache_control: str = PRIVATE_REVALIDATE,
+    media_type: str = "application/json"
+) -> Response:
+    """
+    Empty 304 response for a request whose cached representation is still current.
+
+    The ETag is weakened exactly as CompressionMiddleware weakens it on the 200,
+    so the client is sent back the validator it cached.
+
+    Args:
+        request: The conditional request
+        etag: Current ETag of the resource
+        headers: Extra headers the 200 response would have carried (e.g. X-Next-Cursor)
+        cache_control: Caching policy of the 200 response
+        media_type: Content type of the 200 response
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    etag = negotiated_etag(etag, request.headers.get("accept-encoding", ""), media_type)
+    set_cache_headers(response, etag, cache_control)
+    return response
@@ -0,0 +1,39 @@
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from opentelemetry import trace
+from fastapi.responses import JSONResponse
+
+from app.utils.metrics import stage_timer
+
+tracer = trace.get_tracer(__name__)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+
+    Output matches the endpoints' response models: integer dict keys become
+    strings and UTC datetimes end in "Z".
+    """
+
+    def render(self, content: Any) -> bytes:
+        with tracer.start_as_current_span("serialize orjson"), stage_timer("serialization"):
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+def trusted_json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Encode a payload built from our own ORM rows without response_model validation.
+
+    Returning a Response bypasses FastAPI's validate-then-serialize step, so the
+    payload must already have the shape of the route's response model.
+
+    Args:
+        content: Response payload (dicts, lists, datetimes and other JSON values)
+        response: The endpoint's injected Response; headers and cookies set on it
+            (ETag, X-Next-Cursor, the read_primary_until cookie) are carried over
+    """
+    json_response = FastJSONResponse(content)
+    if response is not None:
+        json_response.headers.raw.extend(response.headers.raw)
+    return json_response
@@ -0,0 +1,89 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+# Latency buckets in seconds, from a fast cache hit to a slow LLM-backed request
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Directory shared by the worker processes of one server (uvicorn --workers, gunicorn) for
+# prometheus_client's multiprocess mode; empty for a single process. Read by prometheus_client
+# itself when metrics are created, so it must be set in the environment before the server
+# starts, and emptied between runs.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+def render_metrics() -> bytes:
+    """
+    Every metric in the Prometheus text exposition format.
+
+    With PROMETHEUS_MULTIPROC_DIR set, the metrics of every worker process are
+    aggregated, whichever worker answers the scrape.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges (in progress, queued, pool and cache sizes) when it shuts down."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+class RequestStats:
+    """
+    Time spent per stage (db, llm, serialization) while handling one request.
+
+    Attributes:
+        db_queries: Statements executed for the request
+        stage_seconds: Seconds spent per stage
+    """
+
+    __slots__ = ("db_queries", "stage_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.stage_seconds: Dict[str, float] = {}
+
+# Stats of the request being handled; None outside requests and inside background jobs
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def start_request_stats() -> RequestStats:
+    """Begin collecting stage times for the current request (called by MetricsMiddleware)."""
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+@contextmanager
+def detached_from_request() -> Iterator[None]:
+    """Keep work in the block (e.g. a background job run after the response) out of the request's stats."""
+    token = _request_stats.set(None)
+    try:
+        yield
+    finally:
+        _request_stats.reset(token)
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add time spent in a stage to the current request, if any."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.stage_seconds[stage] = stats.stage_seconds.get(stage, 0.0) + seconds
+
+def record_db_query(seconds: float) -> None:
+    """Count a statement and its duration against the current request, if any."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.stage_seconds["db"] = stats.stage_seconds.get("db", 0.0) + seconds
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Add the duration of the block to the current request's time in a stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException, status
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Range of a PostgreSQL integer column, the type of the ids and revisions used as cursor keys
+PG_INT_MIN = -2**31
+PG_INT_MAX = 2**31 - 1
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+
+    Datetimes are stored as ISO 8601 strings and restored by decode_cursor.
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_value(value: Any, expected: type) -> Any:
+    if expected is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get("dt"), str):
+            raise ValueError("expected a datetime")
+        return datetime.fromisoformat(value["dt"])
+    if expected is int:
+        # bool is an int subclass; ids and revisions must also fit a PostgreSQL integer
+        if isinstance(value, bool) or not isinstance(value, int) or not PG_INT_MIN <= value <= PG_INT_MAX:
+            raise ValueError("expected an integer")
+        return value
+    raise TypeError(f"unsupported cursor value type {expected!r}")
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor into its sort key values.
+
+    Args:
+        cursor: Cursor from a previous page's X-Next-Cursor header
+        types: Expected type of each value, datetime or int
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or its values do not match `types`
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("unexpected cursor shape")
+        return [_decode_value(value, expected) for value, expected in zip(payload, types)]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
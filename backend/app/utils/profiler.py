@@ -0,0 +1,136 @@
+import sys
+import time
+import asyncio
+import sysconfig
+import threading
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+# Frame paths are reported relative to the first of these that contains them
+_PATH_ROOTS = sorted(
+    {str(Path(__file__).resolve().parent.parent.parent), sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"]},
+    key=len,
+    reverse=True,
+)
+# Marks samples taken while the request was suspended (waiting on the database, Gemini, a thread)
+AWAIT_MARKER = "(await)"
+
+def _short_path(filename: str) -> str:
+    for root in _PATH_ROOTS:
+        if filename.startswith(root + "/"):
+            return filename[len(root) + 1:]
+    return filename
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    # Folded stack lines separate frames with ";"
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+def _awaited_frames(awaitable: Any) -> List[FrameType]:
+    """Frames of a suspended coroutine and everything it is awaiting, outermost first."""
+    frames = []
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) or getattr(awaitable, "ag_await", None)
+    return frames
+
+class AsyncStackSampler:
+    """
+    Wall-clock sampling profiler for one asyncio task, i.e. one request.
+
+    A background thread wakes every interval and records the task's call stack:
+    the event loop thread's stack when the task is running, or the chain of
+    coroutines it is suspended in (ending in AWAIT_MARKER) when it waits. Other
+    requests sharing the event loop are not sampled, and nothing runs on the
+    loop itself, so the profiled request is barely slowed down.
+
+    Attributes:
+        interval: Seconds between samples
+        stacks: Sample counts keyed by stack (outermost frame first)
+        samples: Number of samples taken
+        duration: Seconds between start and stop
+    """
+
+    def __init__(self, interval: float, root_frame: Optional[FrameType] = None):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._task = asyncio.current_task()
+        self._loop = self._task.get_loop()
+        self._loop_thread_id = threading.get_ident()
+        # Stacks are cut to start at this frame, leaving out the server and event loop frames below it
+        self._root_frame = root_frame
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        marker: Tuple[str, ...] = ()
+        if asyncio.tasks._current_tasks.get(self._loop) is self._task:
+            frame = sys._current_frames().get(self._loop_thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            frames.reverse()
+        else:
+            frames = _awaited_frames(self._task.get_coro())
+            marker = (AWAIT_MARKER,)
+        for i, frame in enumerate(frames):
+            if frame is self._root_frame:
+                frames = frames[i:]
+                break
+        self.stacks[tuple(_frame_label(frame) for frame in frames) + marker] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope: "outer;...;inner count" per line."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 30, by: str = "total") -> List[Dict[str, Any]]:
+        """
+        Functions by inclusive ("total") or self ("self") time, estimated from their share of the samples.
+
+        Self time is charged to the innermost frame of each sample; for samples
+        taken while waiting that is the frame doing the await.
+        """
+        seconds_per_sample = self.duration / self.samples if self.samples else 0.0
+        total: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack[:-1] if stack and stack[-1] == AWAIT_MARKER else stack
+            if not frames:
+                continue
+            for label in set(frames):
+                total[label] += count
+            own[frames[-1]] += count
+        ranking = own if by == "self" else total
+        return [
+            {
+                "function": label,
+                "total_ms": round(total[label] * seconds_per_sample * 1000, 3),
+                "self_ms": round(own[label] * seconds_per_sample * 1000, 3),
+                "total_samples": total[label],
+                "self_samples": own[label],
+            }
+            for label, _ in ranking.most_common(limit)
+        ]
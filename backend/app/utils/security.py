@@ -1,5 +1,8 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
@@ -11,17 +14,41 @@ ALGORITHM = "HS256"  # Consistent with dependencies/auth.py
 ACCESS_TOKEN_EXPIRE_MINUTES = 30000000  # Updated from 30, consistent with dependencies/auth.py
 
 # Password hashing configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; hashes made with another cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads hashing/verifying passwords; bounds the CPU a login storm can take from the API
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")  # Updated from "token"
 
+# bcrypt releases the GIL, so hashing in these threads leaves the event loop free
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
+    """Verify a password against its hash. Blocks for the bcrypt cost; use verify_and_update_password_async in the API."""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Generate password hash."""
+    """Generate password hash. Blocks for the bcrypt cost; use get_password_hash_async in the API."""
     return pwd_context.hash(password)
 
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash on the password hashing executor."""
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, pwd_context.hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password hashing executor.
+
+    Returns:
+        (valid, new_hash) where new_hash is a fresh hash to store when the
+        password is valid but was hashed with another cost factor, else None
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1,97 @@
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Sequence, Tuple, Union
+
+# A delta turns one text into another with line operations applied in order:
+#   ["=", n]     copy the next n lines of the old text
+#   ["-", n]     skip the next n lines of the old text
+#   ["+", text]  insert text
+DeltaOp = List[Union[str, int]]
+
+def make_delta(old: str, new: str) -> List[DeltaOp]:
+    """
+    Line-level delta from old to new.
+
+    Edits are usually local, so the lines the texts start and end with in common
+    are copied as they are and only the lines between them are diffed.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    common = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < common and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < common - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+
+    ops: List[DeltaOp] = []
+    if prefix:
+        ops.append(["=", prefix])
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_middle, new_middle, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(["-", i2 - i1])
+        if j2 > j1:
+            ops.append(["+", "".join(new_middle[j1:j2])])
+    if suffix:
+        ops.append(["=", suffix])
+    return ops
+
+def apply_delta(old: str, ops: List[DeltaOp]) -> str:
+    """Apply a delta produced by make_delta to old."""
+    old_lines = old.splitlines(keepends=True)
+    position = 0
+    parts = []
+    for op, value in ops:
+        if op == "=":
+            parts.extend(old_lines[position:position + value])
+            position += value
+        elif op == "-":
+            position += value
+        elif op == "+":
+            parts.append(value)
+        else:
+            raise ValueError(f"Unknown delta operation: {op}")
+    return "".join(parts)
+
+def apply_text_edits(text: str, edits: Sequence[Tuple[int, int, str]]) -> str:
+    """
+    Apply character-range replacements to text.
+
+    Each edit (start, end, replacement) replaces text[start:end]. All offsets refer
+    to the original text, so edits must be sorted and must not overlap.
+
+    Raises:
+        ValueError: If an edit is out of range, inverted, out of order or overlapping
+    """
+    parts = []
+    position = 0
+    for start, end, replacement in edits:
+        if not position <= start <= end <= len(text):
+            raise ValueError(
+                f"Edit [{start}, {end}) is out of range, out of order or overlaps the previous edit "
+                f"(text length {len(text)})"
+            )
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+def compress_delta(ops: List[DeltaOp]) -> bytes:
+    return compress_text(json.dumps(ops, separators=(",", ":")))
+
+def decompress_delta(data: bytes) -> List[DeltaOp]:
+    return json.loads(decompress_text(data))
@@ -0,0 +1,103 @@
+import os
+import json
+import base64
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from google.protobuf.json_format import MessageToDict
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+# "none" disables tracing; "file" appends OTLP/JSON lines to TRACING_EXPORT_PATH (readable by an
+# OpenTelemetry Collector otlpjsonfile receiver and scripts/trace_waterfall.py); "otlp" posts
+# OTLP/protobuf to a collector's HTTP endpoint
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_EXPORT_PATH = Path(os.getenv(
+    "TRACING_EXPORT_PATH",
+    str(Path(__file__).resolve().parent.parent.parent / "traces.jsonl")
+))
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Fraction of traces recorded, decided at the root span and inherited by its children
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "opord-canvas-api")
+# Finished spans are exported in batches from a background thread; spans beyond the queue are dropped
+TRACING_EXPORT_INTERVAL_SECONDS = float(os.getenv("TRACING_EXPORT_INTERVAL_SECONDS", "2"))
+TRACING_MAX_QUEUE_SIZE = int(os.getenv("TRACING_MAX_QUEUE_SIZE", "4096"))
+TRACING_MAX_BATCH_SIZE = 512
+
+def _hex_ids(item: Dict[str, Any]) -> None:
+    # The protobuf JSON mapping writes ids in base64; OTLP/JSON writes them in hex
+    for key in ("traceId", "spanId", "parentSpanId"):
+        if key in item:
+            item[key] = base64.b64decode(item[key]).hex()
+
+class OTLPJSONFileSpanExporter(SpanExporter):
+    """Appends each batch of spans to a file as one line of OTLP/JSON."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        request = MessageToDict(encode_spans(spans), use_integers_for_enums=True)
+        for resource_spans in request.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                for span in scope_spans.get("spans", []):
+                    _hex_ids(span)
+                    for link in span.get("links", []):
+                        _hex_ids(link)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to export {len(spans)} spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+def _create_tracer_provider() -> Optional[TracerProvider]:
+    if TRACING_EXPORTER == "none":
+        return None
+    if TRACING_EXPORTER == "file":
+        exporter: SpanExporter = OTLPJSONFileSpanExporter(TRACING_EXPORT_PATH)
+    elif TRACING_EXPORTER == "otlp":
+        exporter = OTLPSpanExporter(endpoint=TRACING_OTLP_ENDPOINT)
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(
+        exporter,
+        max_queue_size=TRACING_MAX_QUEUE_SIZE,
+        schedule_delay_millis=TRACING_EXPORT_INTERVAL_SECONDS * 1000,
+        max_export_batch_size=TRACING_MAX_BATCH_SIZE,
+    ))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled, exporting to {TRACING_EXPORTER} (sample ratio {TRACING_SAMPLE_RATIO})")
+    return provider
+
+# The process-wide provider, or None when tracing is disabled (tracers are then no-ops)
+tracer_provider = _create_tracer_provider()
+
+def tracing_enabled() -> bool:
+    return tracer_provider is not None
+
+def mark_error(span: trace.Span, error: BaseException) -> None:
+    """Record an error that was handled (not raised through the span) on a span."""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
@@ -0,0 +1,189 @@
+"""
+Seeded data for the benchmark suite (benchmarks/suite.py).
+
+Everything is derived from a seed, so two runs against the same scale see the
+same catalog, documents and embeddings. Bulk rows are generated inside
+PostgreSQL with INSERT ... SELECT, which seeds 100k OPORDs or catalog
+embeddings in seconds rather than minutes of client round trips.
+
+The application modules read DATABASE_URL and LLM_MODE on import; suite.py
+sets both before importing this module.
+"""
+import random
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncpg
+from sqlalchemy import func, select, text
+
+from db.database import Base, AsyncSessionLocal, async_engine
+from app.crud import user as user_crud
+from app.models.opord import OPORD
+from app.models.schemas import UserCreate
+from app.models.tactical_task import TacticalTask
+from app.services.llm_client import LLM_STUB_EMBEDDING_DIMENSION
+from app.services.task_catalog_service import invalidate_task_catalog
+
+# Imported for their tables
+from app.models.opord_revision import OPORDRevision  # noqa: F401
+from app.models.opord_task_mention import OPORDTaskMention  # noqa: F401
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+# Filler between task mentions; lower case, so the LLM stub only reports the task names
+_FILLER = (
+    "the battalion maintains contact with adjacent units and reports at each phase line",
+    "fires are cleared through the brigade fire support element before the assault",
+    "casualties are evacuated along the main supply route to the battalion aid station",
+    "the reserve is prepared to assume the main effort on order",
+    "engineers clear lanes through the obstacle belt before the lead company crosses",
+)
+_UNITS = ("alpha company", "bravo company", "charlie company", "the scout platoon", "the mortar section")
+
+def task_name(task_id: int) -> str:
+    """Catalog name of a seeded task: "TASK " and four letters spelling task_id in base 26."""
+    letters = []
+    for _ in range(4):
+        task_id, digit = divmod(task_id, 26)
+        letters.append(chr(ord("A") + digit))
+    return "TASK " + "".join(reversed(letters))
+
+def document_text(size_kb: int, catalog_size: int, seed: int, mention_every: int = 200) -> str:
+    """
+    An OPORD body of size_kb KB with a task mention about every mention_every characters.
+
+    Mentioned tasks are drawn from the first catalog_size seeded tasks.
+    """
+    rng = random.Random(f"{seed}:{size_kb}")
+    target = size_kb * 1024
+    parts = ["1. situation. enemy forces occupy the objective area.\n"]
+    length = len(parts[0])
+    since_mention = 0
+    while length < target:
+        if since_mention >= mention_every:
+            sentence = f"{rng.choice(_UNITS)} will {task_name(rng.randint(1, catalog_size))} the objective. "
+            since_mention = 0
+        else:
+            sentence = f"{rng.choice(_FILLER)}. "
+            since_mention += len(sentence)
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)[:target]
+
+def query_embedding(rng: random.Random) -> List[float]:
+    return [rng.uniform(-0.5, 0.5) for _ in range(LLM_STUB_EMBEDDING_DIMENSION)]
+
+async def prepare_database(database_url: str) -> None:
+    """Create the benchmark database, the vector extension and the schema if they do not exist."""
+    parts = urlsplit(database_url.replace("+asyncpg", ""))
+    database = parts.path.lstrip("/")
+    server = await asyncpg.connect(urlunsplit(parts._replace(path="/postgres")))
+    try:
+        if not await server.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", database):
+            await server.execute(f'CREATE DATABASE "{database}"')
+    finally:
+        await server.close()
+    async with async_engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        # The schema comes from the models: the migration history does not apply to an empty database
+        await conn.run_sync(Base.metadata.create_all)
+
+async def seed_user(email: str) -> int:
+    """ID of the benchmark user with this email, registering it if needed."""
+    async with AsyncSessionLocal() as db:
+        db_user = await user_crud.get_user_by_email(db, email=email)
+        if db_user is None:
+            db_user = await user_crud.create_user(db, UserCreate(email=email, password=BENCHMARK_PASSWORD))
+        return db_user.id
+
+async def seed_opords(user_id: int, count: int) -> None:
+    """
+    Give the user exactly `count` seeded OPORDs of about 1 KB, updated one second apart.
+
+    Seeding is skipped when the user already has that many, so only the first
+    run at a scale pays for it.
+    """
+    async with AsyncSessionLocal() as db:
+        existing = await db.scalar(select(func.count()).select_from(OPORD).where(OPORD.user_id == user_id))
+        if existing == count:
+            return
+        await db.execute(text("DELETE FROM opords WHERE user_id = :user_id"), {"user_id": user_id})
+        await db.execute(
+            text("""
+                INSERT INTO opords (title, content, user_id, revision, task_count, created_at, updated_at)
+                SELECT
+                    'OPORD ' || g,
+                    repeat('1. situation. enemy forces occupy objective ' || g || '. ', 20),
+                    CAST(:user_id AS integer), 1, 0,
+                    timestamptz '2024-01-01' + g * interval '1 second',
+                    timestamptz '2024-01-01' + g * interval '1 second'
+                FROM generate_series(1, CAST(:count AS integer)) AS g
+            """),
+            {"user_id": user_id, "count": count}
+        )
+        await db.execute(text("ANALYZE opords"))
+        await db.commit()
+
+async def seed_catalog(size: int, seed: int, exact: bool = True) -> None:
+    """
+    Seed tactical tasks 1..size named task_name(id), with pseudo-random embeddings.
+
+    A task's embedding is the sum of three seeded basis vectors picked by the
+    digits of its id in base 64, so it is the same whether the catalog was
+    built at once or grown, and only 192 vectors are generated component by
+    component. With exact=False a larger catalog is left as it is.
+    """
+    async with AsyncSessionLocal() as db:
+        count, max_id = (await db.execute(select(func.count(), func.max(TacticalTask.id)))).one()
+        if count == max_id and (count == size or (count > size and not exact)):
+            return
+        if count != (max_id or 0) or count > size:
+            await db.execute(text("TRUNCATE tactical_tasks RESTART IDENTITY CASCADE"))
+            count = 0
+        await db.execute(
+            text("""
+                CREATE TEMPORARY TABLE benchmark_basis ON COMMIT DROP AS
+                SELECT
+                    p, i,
+                    (
+                        SELECT array_agg(sin((p * 64 + i) * 12.9898 + d * 78.233 + CAST(:seed AS double precision)) * 43758.5453
+                            - floor(sin((p * 64 + i) * 12.9898 + d * 78.233 + CAST(:seed AS double precision)) * 43758.5453) - 0.5 ORDER BY d)
+                        FROM generate_series(1, CAST(:dimension AS integer)) AS d
+                    )::vector AS v
+                FROM generate_series(0, 2) AS p, generate_series(0, 63) AS i
+            """),
+            {"seed": seed, "dimension": LLM_STUB_EMBEDDING_DIMENSION}
+        )
+        await db.execute(
+            text("""
+                INSERT INTO tactical_tasks (id, name, definition, page_number, source_reference, embedding)
+                SELECT
+                    g,
+                    'TASK ' || chr(65 + (g / 17576) % 26) || chr(65 + (g / 676) % 26) || chr(65 + (g / 26) % 26) || chr(65 + g % 26),
+                    'A seeded tactical mission task used by the benchmark suite, number ' || g || '.',
+                    'B-' || g,
+                    'benchmark',
+                    b0.v + b1.v + b2.v
+                FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS g
+                JOIN benchmark_basis AS b0 ON b0.p = 0 AND b0.i = g % 64
+                JOIN benchmark_basis AS b1 ON b1.p = 1 AND b1.i = (g / 64) % 64
+                JOIN benchmark_basis AS b2 ON b2.p = 2 AND b2.i = (g / 4096) % 64
+            """),
+            {"first": count + 1, "last": size}
+        )
+        await db.execute(text("SELECT setval(pg_get_serial_sequence('tactical_tasks', 'id'), :size)"), {"size": size})
+        await db.execute(text("ANALYZE tactical_tasks"))
+        await db.commit()
+    invalidate_task_catalog()
+
+async def last_page_cursor(user_id: int, page_size: int) -> Optional[tuple]:
+    """(updated_at, id) keyset cursor selecting the user's oldest page of OPORDs, or None if there is one page."""
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(OPORD.updated_at, OPORD.id)
+            .where(OPORD.user_id == user_id)
+            .order_by(OPORD.updated_at, OPORD.id)
+            .offset(page_size)
+            .limit(1)
+        )).first()
+        return tuple(row) if row is not None else None
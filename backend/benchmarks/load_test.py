@@ -0,0 +1,350 @@
+"""
+Editor session load generator.
+
+Simulates many users working in the editor against one backend, driving the
+HTTP API the way the frontend does (frontend/app/lib/api.ts). Each virtual
+user logs in, then repeats editor sessions until the run ends:
+
+    list        GET /opords/summary, as the dashboard does
+    open        GET /opords/{id}
+    then --session-actions actions drawn from --mix, with exponentially
+    distributed think times of mean --think-time seconds between them:
+    save        PATCH /opords/{id} with the edit of a typed phrase (autosave)
+    hover       GET /tactical-tasks/{id} for a task mentioned in the OPORD
+    analyze     POST /analysis/tasks, then PUT /opords/{id} with the results
+    enhance     POST /ai/enhance_text on a paragraph
+    similar     POST /tactical-tasks/search/similar with an embedding
+
+Users are registered and given --documents OPORDs on first use (not counted
+in the results). Run the server with LLM_MODE=stub to load the backend
+without calling Gemini. Reports throughput, errors and p50/p95/p99 latency
+per endpoint. With --in-process the API runs in this process, and since the
+ASGI transport waits for background tasks, save latencies then include the
+analysis they trigger.
+
+Example:
+    python benchmarks/load_test.py --users 50 --duration 120 --think-time 2
+    python benchmarks/load_test.py --base-url http://staging:8000 --mix save=20 hover=10 enhance=2
+    LLM_MODE=stub python benchmarks/load_test.py --in-process --users 10 --duration 30
+
+Results are printed as JSON.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+backend_root_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_root_path))
+
+ACTIONS = ("save", "hover", "analyze", "enhance", "similar")
+DEFAULT_MIX = {"save": 10, "hover": 6, "analyze": 1, "enhance": 1, "similar": 1}
+ENHANCEMENT_TYPES = ("general", "conciseness", "clarity", "impact")
+EMBEDDING_DIMENSION = 1536
+PASSWORD = "load-test-password"
+
+# Phrases typed between autosaves
+_PHRASES = (
+    "Alpha Company will SEIZE the bridge no later than 0600. ",
+    "The scout platoon screens the northern flank. ",
+    "Fires are cleared through the battalion fire support element. ",
+    "Bravo Company is prepared to BYPASS the town on order. ",
+    "Report phase line ALPHA crossed. ",
+)
+
+class EndpointStats:
+    """Latencies and statuses of the requests to one endpoint (method and route template)."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.errors = 0
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        def pick(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "throughput_rps": round(len(ordered) / elapsed, 2),
+            "p50_ms": round(statistics.median(ordered) * 1000, 2),
+            "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1] * 1000, 2),
+            "statuses": dict(self.statuses),
+        }
+
+class LoadRecorder:
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        """Send a request and record it under `endpoint`; None if it failed without a response."""
+        stats = self.endpoints[endpoint]
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.statuses[type(e).__name__] += 1
+            stats.errors += 1
+            return None
+        stats.latencies.append(time.perf_counter() - started)
+        stats.statuses[str(response.status_code)] += 1
+        if response.status_code >= 400:
+            stats.errors += 1
+        return response
+
+class EditorUser:
+    """One simulated user: their token, OPORDs and the OPORD open in the editor."""
+
+    def __init__(self, index: int, args: argparse.Namespace, recorder: LoadRecorder):
+        self.email = f"{args.user_prefix}-{index}@example.com"
+        self.args = args
+        self.recorder = recorder
+        self.task_names: List[str] = []
+        self.rng = random.Random(f"{args.seed}:{index}")
+        self.headers: Dict[str, str] = {}
+        self.opord: Optional[Dict[str, Any]] = None
+
+    def document_text(self) -> str:
+        words = []
+        length = 0
+        while length < self.args.document_kb * 1024:
+            if self.task_names and self.rng.random() < 0.1:
+                word = self.task_names[self.rng.randrange(len(self.task_names))]
+            else:
+                word = self.rng.choice(("the", "company", "moves", "to", "objective", "north", "and", "reports", "at", "phase", "line"))
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)
+
+    async def register(self, client: httpx.AsyncClient) -> None:
+        """Register the user unless they exist, and log in."""
+        await client.post("/auth/register", json={"email": self.email, "password": PASSWORD})
+        response = await client.post("/auth/token", data={"username": self.email, "password": PASSWORD})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        """Register the user and create their OPORDs if this is their first run."""
+        await self.register(client)
+        response = await client.get("/opords/summary", params={"limit": 100}, headers=self.headers)
+        response.raise_for_status()
+        for i in range(len(response.json()), self.args.documents):
+            created = await client.post(
+                "/opords/", json={"title": f"Load test OPORD {i + 1}", "content": self.document_text()}, headers=self.headers
+            )
+            created.raise_for_status()
+
+    async def think(self) -> None:
+        await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time) if self.args.think_time > 0 else 0)
+
+    async def login(self, client: httpx.AsyncClient) -> bool:
+        response = await self.recorder.request(
+            client, "POST /auth/token", "POST", "/auth/token", data={"username": self.email, "password": PASSWORD}
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def open_document(self, client: httpx.AsyncClient) -> bool:
+        response = await self.recorder.request(
+            client, "GET /opords/summary", "GET", "/opords/summary",
+            params={"limit": 100, "preview_chars": 101}, headers=self.headers
+        )
+        if response is None or response.status_code != 200 or not response.json():
+            return False
+        await self.think()
+        return await self.reload(client, self.rng.choice(response.json())["id"])
+
+    async def reload(self, client: httpx.AsyncClient, opord_id: int) -> bool:
+        response = await self.recorder.request(client, "GET /opords/{id}", "GET", f"/opords/{opord_id}", headers=self.headers)
+        if response is None or response.status_code != 200:
+            return False
+        self.opord = response.json()
+        return True
+
+    async def save(self, client: httpx.AsyncClient) -> None:
+        content = self.opord["content"]
+        position = self.rng.randint(0, len(content))
+        phrase = self.rng.choice(_PHRASES)
+        response = await self.recorder.request(
+            client, "PATCH /opords/{id}", "PATCH", f"/opords/{self.opord['id']}",
+            json={"base_revision": self.opord["revision"], "edits": [{"start": position, "end": position, "text": phrase}]},
+            headers=self.headers
+        )
+        if response is not None and response.status_code == 200:
+            self.opord["content"] = content[:position] + phrase + content[position:]
+            self.opord["revision"] = response.json()["revision"]
+        elif response is not None and response.status_code == 409:
+            # Another tab saved first; the editor reloads and carries on
+            await self.reload(client, self.opord["id"])
+
+    async def hover(self, client: httpx.AsyncClient) -> None:
+        task_ids = [result["id"] for result in self.opord.get("analysis_results") or [] if "id" in result]
+        if not task_ids:
+            return
+        task_id = self.rng.choice(task_ids)
+        await self.recorder.request(client, "GET /tactical-tasks/{id}", "GET", f"/tactical-tasks/{task_id}", headers=self.headers)
+
+    async def analyze(self, client: httpx.AsyncClient) -> None:
+        response = await self.recorder.request(
+            client, "POST /analysis/tasks", "POST", "/analysis/tasks", json={"text": self.opord["content"]}, headers=self.headers
+        )
+        if response is None or response.status_code != 200:
+            return
+        response = await self.recorder.request(
+            client, "PUT /opords/{id}", "PUT", f"/opords/{self.opord['id']}",
+            json={"analysis_results": response.json()}, headers=self.headers
+        )
+        if response is not None and response.status_code == 200:
+            self.opord = response.json()
+
+    async def enhance(self, client: httpx.AsyncClient) -> None:
+        content = self.opord["content"]
+        start = self.rng.randint(0, max(len(content) - 500, 0))
+        await self.recorder.request(
+            client, "POST /ai/enhance_text", "POST", "/ai/enhance_text",
+            json={"text": content[start:start + 500] or "Seize the bridge.", "enhancement_type": self.rng.choice(ENHANCEMENT_TYPES)},
+            headers=self.headers
+        )
+
+    async def similar(self, client: httpx.AsyncClient) -> None:
+        embedding = [self.rng.uniform(-0.5, 0.5) for _ in range(EMBEDDING_DIMENSION)]
+        await self.recorder.request(
+            client, "POST /tactical-tasks/search/similar", "POST", "/tactical-tasks/search/similar",
+            json=embedding, params={"limit": 5}, headers=self.headers
+        )
+
+    async def run(self, client: httpx.AsyncClient, deadline: float, mix: Dict[str, int]) -> None:
+        actions = list(mix)
+        weights = [mix[action] for action in actions]
+        while time.monotonic() < deadline and not await self.login(client):
+            await self.think()
+        while time.monotonic() < deadline:
+            if not await self.open_document(client):
+                await self.think()
+                continue
+            for _ in range(self.args.session_actions):
+                await self.think()
+                if time.monotonic() >= deadline:
+                    return
+                await getattr(self, self.rng.choices(actions, weights)[0])(client)
+
+async def fetch_task_names(client: httpx.AsyncClient, headers: Dict[str, str]) -> List[str]:
+    """Names of catalog tasks, mentioned in generated documents so analysis finds them."""
+    response = await client.get("/tactical-tasks/", params={"limit": 100}, headers=headers)
+    response.raise_for_status()
+    return [task["name"] for task in response.json()]
+
+async def run_load(args: argparse.Namespace, mix: Dict[str, int]) -> Dict[str, Any]:
+    if args.in_process:
+        from main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://load-test"
+    else:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users))
+        base_url = args.base_url
+    recorder = LoadRecorder()
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        # Setup requests go around the recorder, so they are not counted
+        users = [EditorUser(index, args, recorder) for index in range(args.users)]
+        await users[0].register(client)
+        task_names = await fetch_task_names(client, users[0].headers)
+        semaphore = asyncio.Semaphore(16)
+        async def setup(user: EditorUser) -> None:
+            user.task_names = task_names
+            async with semaphore:
+                await user.setup(client)
+        await asyncio.gather(*(setup(user) for user in users))
+
+        started = time.monotonic()
+        deadline = started + args.duration
+
+        async def start(user: EditorUser, delay: float) -> None:
+            await asyncio.sleep(delay)
+            await user.run(client, deadline, mix)
+
+        await asyncio.gather(*(
+            start(user, args.ramp_up * index / args.users) for index, user in enumerate(users)
+        ))
+        elapsed = time.monotonic() - started
+
+    endpoints = {name: stats.report(elapsed) for name, stats in sorted(recorder.endpoints.items()) if stats.latencies}
+    total = sum(stats["requests"] for stats in endpoints.values())
+    return {
+        "target": "in-process" if args.in_process else args.base_url,
+        "settings": {
+            "users": args.users,
+            "duration_s": args.duration,
+            "ramp_up_s": args.ramp_up,
+            "think_time_s": args.think_time,
+            "session_actions": args.session_actions,
+            "mix": mix,
+            "documents": args.documents,
+            "document_kb": args.document_kb,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in endpoints.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+def parse_mix(values: List[str]) -> Dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for value in values:
+        action, _, weight = value.partition("=")
+        if action not in ACTIONS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid mix entry {value!r}; expected <action>=<weight> with action one of {', '.join(ACTIONS)}")
+        mix[action] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("At least one action needs a positive weight")
+    return {action: weight for action, weight in mix.items() if weight > 0}
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate concurrent editor sessions against the API and report per-endpoint latency.")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API to load.")
+    parser.add_argument("--in-process", action="store_true", help="Run the API in this process instead of calling --base-url.")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent simulated users.")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run after the users are set up.")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which users start.")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean seconds between a user's actions.")
+    parser.add_argument("--session-actions", type=int, default=20, help="Actions on an opened OPORD before returning to the list.")
+    parser.add_argument("--mix", nargs="*", default=[], help=f"Action weights as action=weight; defaults: {' '.join(f'{a}={w}' for a, w in DEFAULT_MIX.items())}.")
+    parser.add_argument("--documents", type=int, default=3, help="OPORDs each user owns.")
+    parser.add_argument("--document-kb", type=int, default=4, help="Size of generated OPORDs in KB.")
+    parser.add_argument("--user-prefix", default="load-test", help="Simulated users are <prefix>-<n>@example.com.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the users' choices.")
+    parser.add_argument("--output", type=Path, help="Also write the results to this file.")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        mix = parse_mix(args.mix)
+    except argparse.ArgumentTypeError as e:
+        raise SystemExit(str(e))
+    results = asyncio.run(run_load(args, mix))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
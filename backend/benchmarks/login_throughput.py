@@ -0,0 +1,133 @@
+"""
+Login throughput benchmark.
+
+Runs the API in-process against the configured database, registers a user and
+fires a storm of concurrent POST /auth/token requests while a probe requests
+GET /health every few milliseconds. Reports login throughput and latency and
+the probe latency during the storm, which shows whether password hashing
+stalls unrelated traffic.
+
+Example:
+    python benchmarks/login_throughput.py --logins 200 --concurrency 50
+    python benchmarks/login_throughput.py --inline-hashing   # verify on the event loop, for comparison
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=8 python benchmarks/login_throughput.py
+
+Results are printed as JSON.
+"""
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import logging
+import statistics
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+backend_root_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_root_path))
+
+from main import app
+from app.crud import user as user_crud
+from app.utils import security
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of latency samples in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {
+        "samples": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(pick(0.95), 2),
+        "p99_ms": round(pick(0.99), 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float, samples: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+async def run_benchmark(logins: int, concurrency: int, probe_interval: float) -> Dict[str, object]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        email = f"login-benchmark-{uuid.uuid4().hex[:12]}@example.com"
+        password = uuid.uuid4().hex
+        response = await client.post("/auth/register", json={"email": email, "password": password})
+        response.raise_for_status()
+
+        idle_samples: List[float] = []
+        stop = asyncio.Event()
+        idle_probe = asyncio.create_task(probe(client, stop, probe_interval, idle_samples))
+        await asyncio.sleep(0.5)
+        stop.set()
+        await idle_probe
+
+        storm_samples: List[float] = []
+        login_samples: List[float] = []
+        failures = 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login() -> None:
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth/token", data={"username": email, "password": password})
+                login_samples.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        stop = asyncio.Event()
+        storm_probe = asyncio.create_task(probe(client, stop, probe_interval, storm_samples))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await storm_probe
+
+    return {
+        "bcrypt_rounds": security.BCRYPT_ROUNDS,
+        "hash_workers": security.PASSWORD_HASH_WORKERS,
+        "logins": logins,
+        "concurrency": concurrency,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(logins / elapsed, 2),
+        "login_latency": percentiles(login_samples),
+        "probe_latency_idle": percentiles(idle_samples),
+        "probe_latency_during_storm": percentiles(storm_samples),
+    }
+
+def use_inline_hashing() -> None:
+    # Verify on the event loop, as before hashing moved to the executor
+    async def verify_inline(plain_password: str, hashed_password: str):
+        return security.pwd_context.verify_and_update(plain_password, hashed_password)
+    user_crud.verify_and_update_password_async = verify_inline
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure login throughput and event loop stalls during a login storm.")
+    parser.add_argument("--logins", type=int, default=200, help="Number of logins to perform.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins in flight at once.")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Seconds between /health probes.")
+    parser.add_argument("--inline-hashing", action="store_true", help="Verify passwords on the event loop for comparison.")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    if args.inline_hashing:
+        use_inline_hashing()
+    results = asyncio.run(run_benchmark(args.logins, args.concurrency, args.probe_interval))
+    results["inline_hashing"] = args.inline_hashing
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
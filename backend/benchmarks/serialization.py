@@ -0,0 +1,136 @@
+"""
+OPORD response serialization benchmark.
+
+Builds synthetic OPORD responses of increasing size (content length and number
+of analysis mentions) and times the ways an endpoint can turn one into JSON:
+
+    stdlib          response_model validation, jsonable_encoder and json.dumps
+                    (FastAPI with a custom JSONResponse class)
+    pydantic        response_model validation and Pydantic's dump_json
+                    (FastAPI's default path for routes with a response model)
+    trusted_orjson  no validation, orjson encoding (trusted_json_response)
+
+Every path is checked to produce the same JSON document before it is timed.
+
+Example:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 10 1000 --mentions-per-kb 5 --repeat 9
+
+Results are printed as JSON.
+"""
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+backend_root_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_root_path))
+
+from app.models.schemas import OPORD
+from app.utils.json_response import FastJSONResponse
+
+CATALOG_SIZE = 200
+
+def build_catalog() -> Dict[int, Dict[str, Any]]:
+    return {
+        task_id: {
+            "name": f"TASK {task_id}",
+            "definition": f"A tactical mission task definition number {task_id}. " * 8,
+            "page_number": f"B-{task_id}",
+            "image_path": f"/public/task_images/{task_id:032x}.png",
+        }
+        for task_id in range(1, CATALOG_SIZE + 1)
+    }
+
+def build_response(content_kb: int, mentions_per_kb: int, catalog: Dict[int, Dict[str, Any]], full: bool) -> Dict[str, Any]:
+    """Synthetic OPORD response shaped like the router's _opord_response."""
+    content = ("1. SITUATION. Enemy forces occupy OBJ ALPHA. " * 25)[:1024] * content_kb
+    mentions = []
+    tasks = {}
+    for index in range(content_kb * mentions_per_kb):
+        task_id = index % CATALOG_SIZE + 1
+        task = catalog[task_id]
+        mention = {"task": task["name"], "position": {"start": index * 100, "end": index * 100 + 5}, "id": task_id}
+        if full:
+            mention.update(definition=task["definition"], page_number=task["page_number"], image_path=task["image_path"])
+        else:
+            tasks[task_id] = task
+        mentions.append(mention)
+    now = datetime.now(timezone.utc)
+    return {
+        "title": "OPORD 24-01",
+        "content": content,
+        "analysis_results": mentions,
+        "id": 1,
+        "user_id": 1,
+        "created_at": now,
+        "updated_at": now,
+        "analysis_tasks": None if full else tasks,
+        "revision": 3,
+    }
+
+def best_time(fn: Callable[[], bytes], repeat: int) -> float:
+    """Best wall time of `repeat` runs, each averaged over enough calls to last ~20 ms."""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        if time.perf_counter() - started >= 0.02:
+            break
+        calls *= 2
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        timings.append((time.perf_counter() - started) / calls)
+    return min(timings)
+
+def run_benchmark(sizes: List[int], mentions_per_kb: int, repeat: int, full: bool) -> List[Dict[str, Any]]:
+    adapter = TypeAdapter(OPORD)
+    catalog = build_catalog()
+    trusted = FastJSONResponse(None)
+    results = []
+    for content_kb in sizes:
+        payload = build_response(content_kb, mentions_per_kb, catalog, full)
+        paths = {
+            "stdlib": lambda: json.dumps(jsonable_encoder(adapter.validate_python(payload))).encode("utf-8"),
+            "pydantic": lambda: adapter.dump_json(adapter.validate_python(payload)),
+            "trusted_orjson": lambda: trusted.render(payload),
+        }
+        documents = {name: json.loads(path()) for name, path in paths.items()}
+        if any(document != documents["pydantic"] for document in documents.values()):
+            raise SystemExit(f"Serialization paths disagree for {content_kb} KB")
+        timings = {name: best_time(path, repeat) for name, path in paths.items()}
+        results.append({
+            "content_kb": content_kb,
+            "mentions": len(payload["analysis_results"]),
+            "response_bytes": len(paths["trusted_orjson"]()),
+            **{f"{name}_us": round(seconds * 1e6, 1) for name, seconds in timings.items()},
+            "speedup_vs_pydantic": round(timings["pydantic"] / timings["trusted_orjson"], 2),
+            "speedup_vs_stdlib": round(timings["stdlib"] / timings["trusted_orjson"], 2),
+        })
+    return results
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare OPORD response serialization paths by response size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000], help="OPORD content sizes in KB.")
+    parser.add_argument("--mentions-per-kb", type=int, default=2, help="Analysis mentions per KB of content.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per path; the best is reported.")
+    parser.add_argument("--full", action="store_true", help="Use the analysis=full format (details repeated per mention).")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    results = run_benchmark(args.sizes, args.mentions_per_kb, args.repeat, args.full)
+    print(json.dumps({"analysis_format": "full" if args.full else "references", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
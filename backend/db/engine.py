@@ -0,0 +1,269 @@
+import os
+import time
+import threading
+import uuid
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, StatusCode
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.utils.metrics import DEFAULT_BUCKETS, record_db_query
+from app.utils.tracing import mark_error, tracing_enabled
+
+tracer = trace.get_tracer(__name__)
+
+# Statement text recorded on query spans is cut to this length
+DB_SPAN_STATEMENT_MAX_LENGTH = 2000
+
+# Pool configuration, shared by every engine the application builds
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()  # "queue" or "pgbouncer" (transaction pooling)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Statement execution time, from cursor execute to result",
+    ("engine",),
+    buckets=DEFAULT_BUCKETS,
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections handed out by the pool", ("engine",))
+DB_POOL_CHECKOUT_WAIT = Counter("db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ("engine",))
+DB_POOL_CHECKOUT_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("engine",))
+DB_POOL_CONNECTS = Counter("db_pool_connects_total", "New database connections opened", ("engine",))
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ("engine",),
+    multiprocess_mode="livesum",
+)
+
+class PoolMetrics:
+    """
+    Connection pool statistics for one engine.
+
+    Attributes:
+        checkouts: Number of connections handed out
+        checkout_wait_total: Total seconds spent waiting for a connection
+        checkout_wait_max: Longest single wait in seconds
+        checkout_timeouts: Checkouts that gave up after DB_POOL_TIMEOUT
+        connects: New DBAPI connections opened (churn)
+        disconnects: DBAPI connections closed (churn)
+        invalidations: Connections discarded as broken
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.invalidations = 0
+        self.pool = None
+        self._checkouts_metric = DB_POOL_CHECKOUTS.labels(name)
+        self._checkout_wait_metric = DB_POOL_CHECKOUT_WAIT.labels(name)
+        # Prometheus counters mirroring the attributes of the same name
+        self._counters = {
+            "checkout_timeouts": DB_POOL_CHECKOUT_TIMEOUTS.labels(name),
+            "connects": DB_POOL_CONNECTS.labels(name),
+        }
+
+    def observe_checkout_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+        self._checkouts_metric.inc()
+        self._checkout_wait_metric.inc(seconds)
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        if counter in self._counters:
+            self._counters[counter].inc()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counters plus live pool occupancy and saturation."""
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": (self.checkout_wait_total / self.checkouts * 1000) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": self.checkout_wait_max * 1000,
+                "checkout_timeouts": self.checkout_timeouts,
+                "connects": self.connects,
+                "disconnects": self.disconnects,
+                "invalidations": self.invalidations,
+            }
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            data.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": checked_out,
+                "idle": pool.checkedin(),
+                "saturation": checked_out / capacity if capacity else 0.0,
+            })
+        else:
+            data.update({"pool_size": 0, "checked_out": data["connects"] - data["disconnects"], "saturation": None})
+        return data
+
+# Metrics for every engine built through this module, keyed by engine name
+POOL_METRICS: Dict[str, PoolMetrics] = {}
+
+class _CheckoutTimingMixin:
+    """Times every pool checkout, including waits for a free slot."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.increment("checkout_timeouts")
+            raise
+        finally:
+            self.metrics.observe_checkout_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # Engine.dispose() swaps in a fresh pool; carry the metrics over to it
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        self.metrics.pool = new_pool
+        return new_pool
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _engine_options(url: str, queue_pool_class) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine according to the pool settings."""
+    if DB_POOL_MODE == "pgbouncer":
+        # PgBouncer in transaction mode owns pooling and cannot track server-side prepared statements
+        options: Dict[str, Any] = {"poolclass": NullPool}
+        driver = url.split("://", 1)[0]
+        if driver.endswith("+asyncpg"):
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        elif driver.endswith("+psycopg") or driver in ("postgresql", "postgres"):
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    return {
+        "poolclass": queue_pool_class,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def _instrument(sync_engine: Engine, name: str) -> None:
+    metrics = PoolMetrics(name)
+    metrics.pool = sync_engine.pool
+    if isinstance(sync_engine.pool, _CheckoutTimingMixin):
+        sync_engine.pool.metrics = metrics
+    else:
+        # NullPool has no waiting; record checkouts without timing
+        event.listen(sync_engine, "checkout", lambda *args: metrics.observe_checkout_wait(0.0))
+    event.listen(sync_engine, "connect", lambda *args: metrics.increment("connects"))
+    event.listen(sync_engine, "close", lambda *args: metrics.increment("disconnects"))
+    event.listen(sync_engine, "invalidate", lambda *args: metrics.increment("invalidations"))
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    event.listen(sync_engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(sync_engine, "checkin", lambda *args: checked_out.dec())
+    POOL_METRICS[name] = metrics
+
+    query_duration = DB_QUERY_DURATION.labels(name)
+
+    # Statement timing, globally per engine and against the request being handled, and a
+    # span per statement under the current span (the request, a service stage or a background job)
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = None
+        if tracing_enabled():
+            operation = statement.split(None, 1)[0].upper() if statement.strip() else "QUERY"
+            span = tracer.start_span(f"db {operation}", kind=SpanKind.CLIENT, attributes={
+                "db.system": "postgresql",
+                "db.name": conn.engine.url.database or "",
+                "db.operation": operation,
+                "db.statement": statement[:DB_SPAN_STATEMENT_MAX_LENGTH],
+                "db.engine": name,
+                "db.executemany": executemany,
+            })
+        conn.info.setdefault("query_started", []).append((time.perf_counter(), span))
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started, span = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        query_duration.observe(elapsed)
+        record_db_query(elapsed)
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        started = exception_context.connection.info.get("query_started") if exception_context.connection is not None else None
+        if started:
+            _, span = started.pop()
+            if span is not None:
+                mark_error(span, exception_context.original_exception)
+                span.end()
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+
+# A span per session commit, covering the final flush and the COMMIT itself
+@event.listens_for(Session, "before_commit")
+def _start_commit_span(session):
+    if tracing_enabled():
+        session.info["commit_span"] = tracer.start_span("db COMMIT", kind=SpanKind.CLIENT, attributes={"db.system": "postgresql"})
+
+@event.listens_for(Session, "after_commit")
+def _end_commit_span(session):
+    span = session.info.pop("commit_span", None)
+    if span is not None:
+        span.end()
+
+@event.listens_for(Session, "after_rollback")
+def _fail_commit_span(session):
+    span = session.info.pop("commit_span", None)
+    if span is not None:
+        span.set_status(StatusCode.ERROR, "Transaction rolled back")
+        span.end()
+
+def create_app_engine(url: str, name: str = "primary") -> Engine:
+    """Create a sync engine with the configured pool settings and pool metrics."""
+    db_engine = create_engine(url, **_engine_options(url, InstrumentedQueuePool))
+    _instrument(db_engine, name)
+    return db_engine
+
+def create_app_async_engine(url: str, name: str = "primary_async") -> AsyncEngine:
+    """Create an async engine with the configured pool settings and pool metrics."""
+    db_engine = create_async_engine(url, **_engine_options(url, InstrumentedAsyncAdaptedQueuePool))
+    _instrument(db_engine.sync_engine, name)
+    return db_engine
+
+def get_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of pool metrics for every engine."""
+    return {name: metrics.snapshot() for name, metrics in POOL_METRICS.items()}
@@ -0,0 +1,100 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from db.database import replica_async_engine
+
+logger = logging.getLogger(__name__)
+
+# Reads go to the primary while the replica lags by more than this many seconds
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# How long a replica health check result is reused
+REPLICA_HEALTH_TTL_SECONDS = float(os.getenv("REPLICA_HEALTH_TTL_SECONDS", "2"))
+# Upper bound on a single health check
+REPLICA_HEALTH_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_TIMEOUT_SECONDS", "1"))
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received,
+# or when the database is not in recovery (e.g. the replica URL points at the primary)
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+class ReplicaHealth:
+    """
+    Cached health of the read replica.
+
+    Attributes:
+        healthy: Whether the replica answered the last check and was within REPLICA_MAX_LAG_SECONDS
+        lag_seconds: Replay lag measured by the last successful check
+        error: Error of the last failed check
+        checked_at: Monotonic time of the last check
+        fallbacks: Read requests routed to the primary because the replica was unhealthy
+    """
+
+    def __init__(self):
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.fallbacks = 0
+        self._lock = asyncio.Lock()
+
+    async def _check(self) -> None:
+        try:
+            async with replica_async_engine.connect() as connection:
+                lag = await asyncio.wait_for(
+                    connection.scalar(REPLICA_LAG_QUERY),
+                    timeout=REPLICA_HEALTH_TIMEOUT_SECONDS
+                )
+            self.lag_seconds = float(lag or 0)
+            self.error = None
+            self.healthy = self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            if not self.healthy:
+                logger.warning(f"Read replica lags by {self.lag_seconds:.1f}s; routing reads to the primary.")
+        except Exception as e:
+            self.healthy = False
+            self.error = str(e) or type(e).__name__
+            logger.warning(f"Read replica health check failed: {self.error}; routing reads to the primary.")
+        self.checked_at = time.monotonic()
+
+    def _is_fresh(self) -> bool:
+        return self.checked_at is not None and time.monotonic() - self.checked_at < REPLICA_HEALTH_TTL_SECONDS
+
+    async def refresh(self) -> None:
+        """Recheck the replica unless the last check is younger than REPLICA_HEALTH_TTL_SECONDS."""
+        if replica_async_engine is None or self._is_fresh():
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                await self._check()
+
+    async def is_usable(self) -> bool:
+        """True if reads can be served by the replica; counts a fallback otherwise."""
+        if replica_async_engine is None:
+            return False
+        await self.refresh()
+        if not self.healthy:
+            self.fallbacks += 1
+        return self.healthy
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "configured": replica_async_engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+            "error": self.error,
+            "fallbacks": self.fallbacks,
+        }
+
+replica_health = ReplicaHealth()
@@ -1,11 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from pathlib import Path
 
-from app.routers import auth, opord, tactical_task, analysis, ai
+from app.routers import auth, opord, tactical_task, analysis, ai, figures, events, profiles
+from db.engine import get_pool_metrics
+from db.replica import replica_health
+from app.utils.cache import get_cache_stats
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.utils.metrics import CONTENT_TYPE_LATEST, mark_process_dead, render_metrics
+from app.services.figure_service import FIGURE_STORE_DIR
+from app.services.event_broker import event_broker
+from app.utils.tracing import tracer_provider
 
-app = FastAPI(title="OPORD Canvas Editor API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    mark_process_dead()
+    await event_broker.close()
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+
+def _untraced(scope) -> bool:
+    # Health checks and metrics scrapes would crowd out the traces worth reading
+    return scope.get("path", "").startswith(("/health", "/metrics"))
+
+# With TRACING_EXPORTER set, FastAPI's request, dependency, endpoint, serialization and
+# background task spans are recorded alongside the service, LLM and database spans
+app = FastAPI(
+    title="OPORD Canvas Editor API",
+    lifespan=lifespan,
+    telemetry={"tracer_provider": tracer_provider, "exclude": _untraced}
+)
 
 # Configure CORS
 app.add_middleware(
@@ -14,18 +43,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Current-Revision", "X-Profile-Id"],
 )
 
-# Determine base path for static files (assuming main.py is in backend/)
-# So, Path(__file__).resolve().parent is /Users/joshmeek/personal_code/mil/backend
-backend_dir = Path(__file__).resolve().parent
-static_files_dir = backend_dir / "scripts" / "public" / "task_images"
+# Compress large JSON/NDJSON responses for clients that accept br or gzip
+app.add_middleware(CompressionMiddleware)
+
+# Call-stack profiles of requests flagged by an admin or sampled at PROFILING_SAMPLE_RATE
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so request latency includes CORS handling and compression
+app.add_middleware(MetricsMiddleware)
+
+# Task figures live in the figure store (backend/scripts/public/task_images by default)
+static_files_dir = FIGURE_STORE_DIR
 
 # Create the directory if it doesn't exist, though the script should do this too
 static_files_dir.mkdir(parents=True, exist_ok=True)
 
-# Mount static files for task images
+# Mount static files for task images stored under legacy (non content-addressed) names
 # URL: /public/task_images/some_image.png -> serves from backend/scripts/public/task_images/some_image.png
+# Content-addressed figures and their resized variants are served with immutable caching by /figures
 app.mount("/public/task_images", StaticFiles(directory=static_files_dir), name="task_images")
 
 # Include routers
@@ -34,8 +72,42 @@ app.include_router(opord.router)
 app.include_router(tactical_task.router)
 app.include_router(analysis.router)
 app.include_router(ai.router)
+app.include_router(figures.router)
+app.include_router(events.router)
+app.include_router(profiles.router)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/db-pool")
+async def db_pool_metrics():
+    """Connection pool metrics: checkout waits, saturation and connection churn per engine."""
+    return get_pool_metrics() 
+
+@app.get("/health/db-replica")
+async def db_replica_health():
+    """Read replica status: replay lag, last check error and reads routed back to the primary."""
+    await replica_health.refresh()
+    return replica_health.snapshot()
+
+
+@app.get("/health/caches")
+async def cache_stats():
+    """In-process cache statistics: size, hit ratio, evictions and invalidations per cache."""
+    return get_cache_stats()
+
+@app.get("/health/events")
+async def event_broker_stats():
+    """Event push channel statistics: connected subscribers and events published, delivered and dropped."""
+    return event_broker.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics: request latency per route and status with a db/llm/serialization
+    breakdown, LLM latency, tokens and errors per prompt type, DB statement timing,
+    analysis job queue depth and duration, pool and cache statistics.
+    """
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
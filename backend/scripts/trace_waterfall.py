@@ -0,0 +1,127 @@
+"""
+Print waterfall views of traces exported with TRACING_EXPORTER=file.
+
+Each trace is shown as its span tree, one span per line with its start offset,
+duration and a bar placed on the trace's timeline, followed by the time spent
+per stage (span name, excluding time covered by child spans) so the dominant
+stage of a request stands out.
+
+Example:
+    python scripts/trace_waterfall.py                       # the 5 most recent traces
+    python scripts/trace_waterfall.py --route "/opords/{opord_id}" --limit 1
+    python scripts/trace_waterfall.py --trace-id 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+import sys
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+backend_root_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_root_path))
+
+from app.utils.tracing import TRACING_EXPORT_PATH
+
+def _attribute(span: Dict[str, Any], key: str) -> Optional[str]:
+    for attribute in span.get("attributes", []):
+        if attribute["key"] == key:
+            return next(iter(attribute["value"].values()))
+    return None
+
+def load_traces(path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """Spans from an OTLP/JSON lines file, grouped by trace id."""
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    for span in scope_spans["spans"]:
+                        span["start"] = int(span["startTimeUnixNano"])
+                        span["end"] = int(span["endTimeUnixNano"])
+                        traces[span["traceId"]].append(span)
+    return traces
+
+def _self_times(spans: List[Dict[str, Any]], children: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+    # Time in each span not covered by its children, summed per span name (milliseconds)
+    stages: Dict[str, float] = defaultdict(float)
+    for span in spans:
+        covered = 0
+        cursor = span["start"]
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: s["start"]):
+            start, end = max(child["start"], cursor), min(child["end"], span["end"])
+            if end > start:
+                covered += end - start
+                cursor = end
+        stages[span["name"]] += max(span["end"] - span["start"] - covered, 0) / 1e6
+    return stages
+
+def render_trace(trace_id: str, spans: List[Dict[str, Any]], width: int) -> str:
+    span_ids = {span["spanId"] for span in spans}
+    children: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    roots = []
+    for span in spans:
+        parent = span.get("parentSpanId")
+        if parent in span_ids:
+            children[parent].append(span)
+        else:
+            roots.append(span)
+    trace_start = min(span["start"] for span in spans)
+    trace_end = max(span["end"] for span in spans)
+    total = max(trace_end - trace_start, 1)
+
+    lines = [f"trace {trace_id}  {total / 1e6:.1f} ms  {len(spans)} spans"]
+
+    def walk(span: Dict[str, Any], depth: int) -> None:
+        offset = (span["start"] - trace_start) / total
+        length = (span["end"] - span["start"]) / total
+        bar_start = int(offset * width)
+        bar = " " * bar_start + "█" * max(1, int(length * width))
+        label = "  " * depth + span["name"]
+        route = _attribute(span, "http.route")
+        if route and route not in span["name"]:
+            label += f" {route}"
+        error = " ERROR" if span.get("status", {}).get("code") == 2 else ""
+        lines.append(
+            f"{label[:48]:<48} {(span['start'] - trace_start) / 1e6:>9.1f} {(span['end'] - span['start']) / 1e6:>9.1f}  |{bar:<{width}}|{error}"
+        )
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: s["start"]):
+            walk(child, depth + 1)
+
+    lines.append(f"{'span':<48} {'start ms':>9} {'dur ms':>9}")
+    for root in sorted(roots, key=lambda s: s["start"]):
+        walk(root, 0)
+
+    lines.append("self time by stage:")
+    for name, ms in sorted(_self_times(spans, children).items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<46} {ms:>9.1f} ms  {ms * 1e6 / total:>5.1%}")
+    return "\n".join(lines)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Print waterfall views of exported traces.")
+    parser.add_argument("--path", type=Path, default=TRACING_EXPORT_PATH, help="OTLP/JSON lines file written by the file exporter")
+    parser.add_argument("--trace-id", help="Show only this trace")
+    parser.add_argument("--route", help="Show only traces whose root request matches this route template")
+    parser.add_argument("--limit", type=int, default=5, help="Number of most recent traces to show")
+    parser.add_argument("--width", type=int, default=60, help="Width of the timeline in characters")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    traces = load_traces(args.path)
+    selected = []
+    for trace_id, spans in traces.items():
+        if args.trace_id and trace_id != args.trace_id:
+            continue
+        if args.route and not any(_attribute(span, "http.route") == args.route for span in spans):
+            continue
+        selected.append((min(span["start"] for span in spans), trace_id, spans))
+    selected.sort()
+    for _, trace_id, spans in selected[-args.limit:]:
+        print(render_trace(trace_id, spans, args.width))
+        print()
+
+if __name__ == "__main__":
+    main()
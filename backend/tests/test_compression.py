@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import (
+    CompressionMiddleware,
+    available_encodings,
+    negotiate_encoding,
+    negotiated_etag,
+)
+from app.utils.http_cache import etag_matches, not_modified
+
+PREFERRED = available_encodings()[0]
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("*", PREFERRED),
+    ("*;q=0, gzip", "gzip"),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+@pytest.mark.skipif(compression.brotli is None, reason="brotli is not installed")
+def test_negotiate_encoding_prefers_brotli():
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5") == "gzip"
+
+@pytest.mark.parametrize("etag, accept_encoding, media_type, expected", [
+    ('"x"', "gzip", "application/json", 'W/"x"'),
+    ('"x"', "gzip", "text/plain; charset=utf-8", 'W/"x"'),
+    ('W/"x"', "gzip", "application/json", 'W/"x"'),
+    ('"x"', "identity", "application/json", '"x"'),
+    ('"x"', "gzip", "image/png", '"x"'),
+])
+def test_negotiated_etag(etag, accept_encoding, media_type, expected):
+    assert negotiated_etag(etag, accept_encoding, media_type) == expected
+
+def _client(body: bytes) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/resource")
+    async def resource(request: Request):
+        etag = '"v1"'
+        if etag_matches(request, etag):
+            return not_modified(request, etag)
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    return TestClient(app)
+
+@pytest.mark.parametrize("size, compressed", [(10, False), (1000, True)])
+def test_304_repeats_the_etag_of_the_200(size, compressed):
+    client = _client(b"[" + b" " * size + b"]")
+    headers = {"Accept-Encoding": "gzip"}
+    response = client.get("/resource", headers=headers)
+    assert (response.headers.get("content-encoding") == "gzip") is compressed
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "accept-encoding" in response.headers["vary"].lower()
+
+    revalidated = client.get("/resource", headers={**headers, "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == response.headers["etag"]
+
+def test_identity_request_keeps_the_strong_etag():
+    client = _client(b"[" + b" " * 1000 + b"]")
+    headers = {"Accept-Encoding": "identity"}
+    response = client.get("/resource", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    revalidated = client.get("/resource", headers={**headers, "If-None-Match": '"v1"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"v1"'
+
+def test_gzip_body_round_trips():
+    body = b"[" + b"1," * 1000 + b"1]"
+    client = _client(body)
+    response = client.get("/resource", headers={"Accept-Encoding": "gzip"})
+    # The client decodes the body; Content-Length is that of the compressed bytes
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == body
+    assert int(response.headers["content-length"]) < len(body)
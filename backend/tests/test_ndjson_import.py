@@ -0,0 +1,52 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+import app.routers.opord as opord_router
+
+class _StreamingRequest:
+    """Stands in for a Request whose body arrives in the given chunks."""
+
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+def _lines(chunks: List[bytes]) -> List[Optional[bytes]]:
+    async def collect():
+        return [line async for line in opord_router._ndjson_lines(_StreamingRequest(chunks))]
+    return asyncio.run(collect())
+
+def test_splits_lines_within_a_chunk():
+    assert _lines([b'{"a":1}\n{"b":2}\n']) == [b'{"a":1}', b'{"b":2}']
+
+def test_joins_lines_across_chunks():
+    assert _lines([b'{"a"', b':1}\n{"b":', b"2", b"}\n"]) == [b'{"a":1}', b'{"b":2}']
+
+def test_last_line_without_newline():
+    assert _lines([b"one\ntwo"]) == [b"one", b"two"]
+
+def test_empty_lines_and_body():
+    assert _lines([]) == []
+    assert _lines([b"", b"\n\n"]) == [b"", b""]
+
+@pytest.fixture
+def max_line_bytes(monkeypatch):
+    monkeypatch.setattr(opord_router, "IMPORT_MAX_LINE_BYTES", 8)
+    return 8
+
+def test_line_at_the_cap_is_kept(max_line_bytes):
+    assert _lines([b"12345678\n"]) == [b"12345678"]
+    assert _lines([b"1234", b"5678\n"]) == [b"12345678"]
+
+def test_oversized_line_is_yielded_as_none(max_line_bytes):
+    assert _lines([b"ok\n123456789\nok\n"]) == [b"ok", None, b"ok"]
+
+def test_oversized_line_across_chunks(max_line_bytes):
+    assert _lines([b"ok\n12345", b"67890", b"12345", b"\nok\n"]) == [b"ok", None, b"ok"]
+
+def test_oversized_last_line(max_line_bytes):
+    assert _lines([b"ok\n1234567890"]) == [b"ok", None]
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import PG_INT_MAX, PG_INT_MIN, decode_cursor, encode_cursor
+
+def _raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+def test_round_trip():
+    updated_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(updated_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, datetime, int) == [updated_at, 42]
+
+@pytest.mark.parametrize("value", [PG_INT_MIN, 0, PG_INT_MAX])
+def test_integer_bounds_are_accepted(value):
+    assert decode_cursor(encode_cursor(value), int) == [value]
+
+@pytest.mark.parametrize("cursor, types", [
+    ("not base64 !", (int,)),
+    (_raw_cursor({"id": 1}), (int,)),
+    (_raw_cursor([1]), (int, int)),
+    (_raw_cursor([1, 2]), (int,)),
+    (_raw_cursor([True]), (int,)),
+    (_raw_cursor([1.5]), (int,)),
+    (_raw_cursor([PG_INT_MAX + 1]), (int,)),
+    (_raw_cursor([PG_INT_MIN - 1]), (int,)),
+    (_raw_cursor(["2024-05-01"]), (datetime,)),
+    (_raw_cursor([{"dt": "yesterday"}]), (datetime,)),
+    (_raw_cursor([{"dt": 1}]), (datetime,)),
+    (_raw_cursor(["x"]), (str,)),
+])
+def test_malformed_cursor_is_rejected(cursor, types):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor, *types)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from app.utils.text_delta import (
+    apply_delta,
+    apply_text_edits,
+    compress_delta,
+    decompress_delta,
+    make_delta,
+)
+
+def _random_text(rng: random.Random, lines: int) -> str:
+    words = ["alpha", "bravo", "charlie", "delta", ""]
+    text = "\n".join(" ".join(rng.choices(words, k=rng.randint(0, 3))) for _ in range(lines))
+    return text + ("\n" if rng.random() < 0.5 else "")
+
+@pytest.mark.parametrize("old, new", [
+    ("", ""),
+    ("", "one\ntwo\n"),
+    ("one\ntwo\n", ""),
+    ("one\ntwo\nthree\n", "one\ntwo\nthree\n"),
+    ("one\ntwo\nthree\n", "one\nTWO\nthree\n"),
+    ("one\ntwo", "one\ntwo\n"),
+    ("same\nsame\nsame\n", "same\nsame\n"),
+])
+def test_round_trip(old, new):
+    assert apply_delta(old, make_delta(old, new)) == new
+
+def test_random_round_trip():
+    rng = random.Random(0)
+    for _ in range(500):
+        old = _random_text(rng, rng.randint(0, 20))
+        new = _random_text(rng, rng.randint(0, 20))
+        ops = make_delta(old, new)
+        assert apply_delta(old, ops) == new
+        assert decompress_delta(compress_delta(ops)) == ops
+
+def test_common_prefix_and_suffix_are_copied():
+    old = "".join(f"line {i}\n" for i in range(1000))
+    new = old.replace("line 500\n", "line five hundred\n")
+    assert make_delta(old, new) == [["=", 500], ["-", 1], ["+", "line five hundred\n"], ["=", 499]]
+
+def test_apply_delta_rejects_unknown_operation():
+    with pytest.raises(ValueError):
+        apply_delta("text", [["?", 1]])
+
+def test_apply_text_edits_uses_original_offsets():
+    text = "We SEIZE the bridge and BYPASS the town"
+    edits = [(3, 8, "CLEAR"), (24, 30, "BLOCK")]
+    assert apply_text_edits(text, edits) == "We CLEAR the bridge and BLOCK the town"
+
+def test_apply_text_edits_insert_and_delete():
+    assert apply_text_edits("abc", [(0, 0, ">"), (1, 2, ""), (3, 3, "<")]) == ">ac<"
+    assert apply_text_edits("abc", []) == "abc"
+
+@pytest.mark.parametrize("edits", [
+    [(2, 1, "x")],
+    [(0, 4, "x")],
+    [(-1, 0, "x")],
+    [(2, 3, "x"), (0, 1, "y")],
+    [(0, 2, "x"), (1, 3, "y")],
+])
+def test_apply_text_edits_rejects_invalid_ranges(edits):
+    with pytest.raises(ValueError):
+        apply_text_edits("abc", edits)
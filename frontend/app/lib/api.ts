@@ -20,6 +20,20 @@ interface OPORDUpdate {
   analysis_results?: any[];
 }
 
+// Replacement of content[start, end) with text; offsets count code points, not UTF-16 units
+export interface TextEdit {
+  start: number;
+  end: number;
+  text: string;
+}
+
+export interface OPORDPatchResult {
+  id: number;
+  revision: number;
+  updated_at: string | null;
+  content_length: number;
+}
+
 export interface OPORD {
   id: number;
   title: string;
@@ -28,6 +42,53 @@ export interface OPORD {
   user_id: number;
   created_at: string;
   updated_at: string | null;
+  revision?: number;
+}
+
+export interface OPORDImportResult {
+  imported: number;
+  failed: number;
+  errors: { line: number; detail: string }[];
+}
+
+// Revision history entry (content is fetched per revision)
+export interface OPORDRevision {
+  revision: number;
+  kind: 'snapshot' | 'delta';
+  title: string | null;
+  content_length: number;
+  stored_bytes: number;
+  created_at: string;
+}
+
+export interface OPORDRevisionContent {
+  revision: number;
+  title: string | null;
+  content: string;
+  created_at: string;
+}
+
+// Task details sent once per distinct task alongside OPORD analysis results
+interface AnalysisTask {
+  name: string;
+  definition: string;
+  page_number: string;
+  image_path?: string | null;
+}
+
+interface OPORDResponse extends OPORD {
+  analysis_tasks?: Record<string, AnalysisTask> | null;
+}
+
+// Dashboard listing entry: no content or analysis, optional content preview
+export interface OPORDSummary {
+  id: number;
+  title: string;
+  user_id: number;
+  created_at: string;
+  updated_at: string | null;
+  task_count: number | null;
+  preview: string | null;
 }
 
 interface TextForAnalysis {
@@ -84,39 +145,163 @@ const apiFetch = async (url: string, options: RequestInit = {}) => {
   
   if (!response.ok) {
     const errorData = await response.json().catch(() => ({}));
-    throw new Error(errorData.detail || `API error: ${response.status}`);
+    throw Object.assign(new Error(errorData.detail || `API error: ${response.status}`), { status: response.status });
   }
   
   return response.json();
 };
 
+const isHighSurrogate = (code: number) => code >= 0xd800 && code <= 0xdbff;
+const isLowSurrogate = (code: number) => code >= 0xdc00 && code <= 0xdfff;
+const codePointLength = (text: string) => Array.from(text).length;
+
+// Edits turning `before` into `after`: one replacement of the span between their common
+// prefix and suffix, which for typing and pasting is proportional to what changed
+export const textEdits = (before: string, after: string): TextEdit[] => {
+  if (before === after) return [];
+  const shorter = Math.min(before.length, after.length);
+  let prefix = 0;
+  while (prefix < shorter && before.charCodeAt(prefix) === after.charCodeAt(prefix)) prefix++;
+  if (prefix > 0 && isHighSurrogate(before.charCodeAt(prefix - 1))) prefix--;
+  let suffix = 0;
+  while (suffix < shorter - prefix
+    && before.charCodeAt(before.length - 1 - suffix) === after.charCodeAt(after.length - 1 - suffix)) suffix++;
+  if (suffix > 0 && isLowSurrogate(before.charCodeAt(before.length - suffix))) suffix--;
+  const start = codePointLength(before.slice(0, prefix));
+  return [{
+    start,
+    end: start + codePointLength(before.slice(prefix, before.length - suffix)),
+    text: after.slice(prefix, after.length - suffix)
+  }];
+};
+
+// Apply edits (sorted, non-overlapping, offsets in code points of `text`), as PATCH /opords/{id} does
+export const applyTextEdits = (text: string, edits: TextEdit[]): string => {
+  const codePoints = Array.from(text);
+  const parts: string[] = [];
+  let position = 0;
+  for (const edit of edits) {
+    parts.push(codePoints.slice(position, edit.start).join(''), edit.text);
+    position = edit.end;
+  }
+  parts.push(codePoints.slice(position).join(''));
+  return parts.join('');
+};
+
+// Move `ours` onto a text that `theirs` (made against the same base) has already been applied to,
+// shifting each edit by the length change of their edits before it; null if any of the edits touch
+// the same range, which only the user can resolve
+export const rebaseTextEdits = (ours: TextEdit[], theirs: TextEdit[]): TextEdit[] | null => {
+  const rebased: TextEdit[] = [];
+  for (const edit of ours) {
+    let shift = 0;
+    for (const other of theirs) {
+      if (other.start === edit.start || (other.start < edit.end && edit.start < other.end)) return null;
+      if (other.end <= edit.start) shift += codePointLength(other.text) - (other.end - other.start);
+    }
+    rebased.push({ ...edit, start: edit.start + shift, end: edit.end + shift });
+  }
+  return rebased;
+};
+
+// A page of a keyset-paginated listing; nextCursor is null on the last page
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+const pageQuery = (limit: number, cursor?: string) => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  return params.toString();
+};
+
+// Fetch a listing page; the cursor for the next page arrives in the X-Next-Cursor header
+const apiFetchPage = async <T>(url: string): Promise<Page<T>> => {
+  const token = getLocalStorageItem('token');
+  const response = await fetch(url, {
+    headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.detail || `API error: ${response.status}`);
+  }
+
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor')
+  };
+};
+
+// Expand analysis mentions ({task, position, id}) with the task details from analysis_tasks
+const hydrateAnalysis = (results: any[], tasks: Record<string, AnalysisTask>): any[] => {
+  return results.map(result => {
+    const task = tasks[String(result.id)];
+    return task
+      ? { ...result, definition: task.definition, page_number: task.page_number, image_path: task.image_path ?? undefined }
+      : result;
+  });
+};
+
+const hydrateOpord = (opord: OPORDResponse): OPORD => {
+  const { analysis_tasks: tasks, ...rest } = opord;
+  if (!tasks || !rest.analysis_results) {
+    return rest;
+  }
+  return { ...rest, analysis_results: hydrateAnalysis(rest.analysis_results, tasks) };
+};
+
 // OPORD API functions
 export const opordApi = {
-  getAll: async (skip = 0, limit = 100): Promise<OPORD[]> => {
-    return apiFetch(`/opords/?skip=${skip}&limit=${limit}`);
+  // Most recently updated first; pass a cursor from getPage to continue listing
+  getAll: async (limit = 100, cursor?: string): Promise<OPORD[]> => {
+    return (await opordApi.getPage(limit, cursor)).items;
+  },
+
+  getPage: async (limit = 100, cursor?: string): Promise<Page<OPORD>> => {
+    const page = await apiFetchPage<OPORDResponse>(`/opords/?${pageQuery(limit, cursor)}`);
+    return { ...page, items: page.items.map(hydrateOpord) };
   },
   
+  getSummaries: async (limit = 100, cursor?: string, previewChars = 0): Promise<Page<OPORDSummary>> => {
+    return apiFetchPage(`/opords/summary?${pageQuery(limit, cursor)}&preview_chars=${previewChars}`);
+  },
+
   getById: async (id: number): Promise<OPORD> => {
-    return apiFetch(`/opords/${id}`);
+    return hydrateOpord(await apiFetch(`/opords/${id}`));
   },
   
   create: async (data: OPORDCreate): Promise<OPORD> => {
-    return apiFetch('/opords/', {
+    return hydrateOpord(await apiFetch('/opords/', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json'
       },
       body: JSON.stringify(data)
-    });
+    }));
   },
   
   update: async (id: number, data: OPORDUpdate): Promise<OPORD> => {
-    return apiFetch(`/opords/${id}`, {
+    return hydrateOpord(await apiFetch(`/opords/${id}`, {
       method: 'PUT',
       headers: {
         'Content-Type': 'application/json'
       },
       body: JSON.stringify(data)
+    }));
+  },
+  
+  // Send only the edited ranges; fails with status 409 if baseRevision is no longer current
+  patchContent: async (id: number, baseRevision: number, edits: TextEdit[], title?: string): Promise<OPORDPatchResult> => {
+    return apiFetch(`/opords/${id}`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ base_revision: baseRevision, edits, title })
     });
   },
   
@@ -124,6 +309,49 @@ export const opordApi = {
     return apiFetch(`/opords/${id}`, {
       method: 'DELETE'
     });
+  },
+
+  // All of the user's OPORDs as NDJSON (one OPORD per line)
+  exportAll: async (): Promise<Blob> => {
+    const token = getLocalStorageItem('token');
+    const response = await fetch('/opords/export', {
+      headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+    });
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+    return response.blob();
+  },
+
+  // Import an NDJSON file of {title, content} lines; the file is streamed as the request body
+  importNdjson: async (file: Blob): Promise<OPORDImportResult> => {
+    return apiFetch('/opords/import', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/x-ndjson'
+      },
+      body: file
+    });
+  },
+
+  // Revision history, newest first
+  getRevisions: async (id: number, limit = 100, cursor?: string): Promise<Page<OPORDRevision>> => {
+    return apiFetchPage(`/opords/${id}/revisions?${pageQuery(limit, cursor)}`);
+  },
+
+  getRevision: async (id: number, revision: number): Promise<OPORDRevisionContent> => {
+    return apiFetch(`/opords/${id}/revisions/${revision}`);
+  },
+
+  diffRevisions: async (id: number, fromRevision: number, toRevision: number): Promise<string> => {
+    const result = await apiFetch(`/opords/${id}/revisions/diff?from_revision=${fromRevision}&to_revision=${toRevision}`);
+    return result.diff;
+  },
+
+  restoreRevision: async (id: number, revision: number): Promise<OPORD> => {
+    return hydrateOpord(await apiFetch(`/opords/${id}/revisions/${revision}/restore`, {
+      method: 'POST'
+    }));
   }
 };
 
@@ -202,11 +430,68 @@ export const aiApi = {
 
 // Tactical Task API functions
 export const tacticalTaskApi = {
-  getAll: async (skip = 0, limit = 100): Promise<TacticalTask[]> => {
-    return apiFetch(`/tactical-tasks/?skip=${skip}&limit=${limit}`);
+  getAll: async (limit = 100, cursor?: string): Promise<TacticalTask[]> => {
+    return (await tacticalTaskApi.getPage(limit, cursor)).items;
+  },
+
+  getPage: async (limit = 100, cursor?: string): Promise<Page<TacticalTask>> => {
+    return apiFetchPage(`/tactical-tasks/?${pageQuery(limit, cursor)}`);
   },
   
   getById: async (id: number): Promise<TacticalTask> => {
     return apiFetch(`/tactical-tasks/${id}`);
   }
-}; 
\ No newline at end of file
+}; 
+
+// Pushed when background analysis of an OPORD finishes; truncated events carry no
+// results and the OPORD should be re-fetched
+export interface AnalysisEvent {
+  type: 'analysis.completed' | 'analysis.failed';
+  opord_id: number;
+  revision: number;
+  analysis_results?: AnalysisResult[] | null;
+  truncated?: boolean;
+}
+
+export type ServerEvent = AnalysisEvent | { type: 'ping' };
+
+// Server push channel for the current user's events
+export const eventsApi = {
+  // Opens the channel and reconnects after drops; returns a function that closes it
+  subscribe: (onEvent: (event: ServerEvent) => void): (() => void) => {
+    let socket: WebSocket | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let retryDelay = 1000;
+    let closed = false;
+
+    const connect = () => {
+      const token = getLocalStorageItem('token');
+      if (closed || !token || typeof window === 'undefined') return;
+      const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+      socket = new WebSocket(`${protocol}//${window.location.host}/events/ws?token=${encodeURIComponent(token)}`);
+      socket.onopen = () => {
+        retryDelay = 1000;
+      };
+      socket.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        if (event.analysis_results && event.analysis_tasks) {
+          event.analysis_results = hydrateAnalysis(event.analysis_results, event.analysis_tasks);
+        }
+        delete event.analysis_tasks;
+        onEvent(event);
+      };
+      socket.onclose = () => {
+        if (closed) return;
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      socket?.close();
+    };
+  }
+};
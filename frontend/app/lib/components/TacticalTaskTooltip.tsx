@@ -60,7 +60,14 @@ export function TacticalTaskTooltip({ task, className, onClose }: TacticalTaskTo
     if (!path.startsWith('/')) {
       path = '/' + path;
     }
-    
+
+    // Content-addressed figures ("<digest>.<ext>") are served by /figures with immutable
+    // caching, so after the first hover the display derivative comes from the browser cache
+    const contentAddressed = path.match(/\/([0-9a-f]{32})\.[a-z0-9]+$/);
+    if (contentAddressed) {
+      return `/figures/${contentAddressed[1]}.display.webp`;
+    }
+
     return path;
   };
   
@@ -1,7 +1,7 @@
-import { createContext, useContext, useState, useCallback } from "react";
+import { createContext, useContext, useState, useCallback, useEffect, useRef } from "react";
 import type { ReactNode } from "react";
 import type { OPORD, AnalysisResult } from "./api";
-import { opordApi, analysisApi } from "./api";
+import { opordApi, analysisApi, eventsApi, textEdits, applyTextEdits, rebaseTextEdits } from "./api";
 
 interface OpordContextType {
   currentOpord: OPORD | null;
@@ -16,6 +16,9 @@ interface OpordContextType {
   clearOpord: () => void;
 }
 
+// Times a content save is rebased onto another session's save and retried before giving up
+const MAX_SAVE_REBASES = 3;
+
 const OpordContext = createContext<OpordContextType | undefined>(undefined);
 
 export function OpordProvider({ children }: { children: ReactNode }) {
@@ -45,6 +48,25 @@ export function OpordProvider({ children }: { children: ReactNode }) {
     }
   }, []);
 
+  // Background analysis results arrive over the event channel instead of by re-fetching
+  // (results for a revision older than the one being edited are ignored)
+  const currentOpordId = currentOpord?.id;
+  const currentRevision = useRef(0);
+  currentRevision.current = currentOpord?.revision ?? 0;
+  useEffect(() => {
+    if (currentOpordId === undefined) return;
+    return eventsApi.subscribe(event => {
+      if (event.type === 'ping' || event.opord_id !== currentOpordId || event.revision < currentRevision.current) {
+        return;
+      }
+      if (event.truncated) {
+        getOpordById(currentOpordId);
+      } else if (event.analysis_results) {
+        setAnalysisResults(event.analysis_results);
+      }
+    });
+  }, [currentOpordId, getOpordById]);
+
   const createOpord = useCallback(async (title: string, content: string) => {
     setIsLoading(true);
     setError(null);
@@ -67,6 +89,38 @@ export function OpordProvider({ children }: { children: ReactNode }) {
     setError(null);
     
     try {
+      // Content saves of the open OPORD send only the changed range against the revision it was
+      // loaded at. If another session saved in between (409), the edits are rebased onto the latest
+      // content and sent again; edits overlapping the other session's are left for the user to resolve
+      let base = currentOpord;
+      let baseRevision = base?.revision;
+      if (base && base.id === id && baseRevision && data.content !== undefined) {
+        let edits = textEdits(base.content, data.content);
+        for (let attempt = 0; ; attempt++) {
+          try {
+            const result = await opordApi.patchContent(id, baseRevision, edits, data.title);
+            setCurrentOpord({
+              ...base,
+              content: applyTextEdits(base.content, edits),
+              title: data.title ?? base.title,
+              revision: result.revision,
+              updated_at: result.updated_at
+            });
+            return;
+          } catch (err) {
+            if ((err as { status?: number }).status !== 409 || attempt >= MAX_SAVE_REBASES) throw err;
+          }
+          const latest = await opordApi.getById(id);
+          const rebased = rebaseTextEdits(edits, textEdits(base.content, latest.content));
+          if (rebased === null || !latest.revision) {
+            setError('Another session changed the part of this OPORD you edited. Your changes were not saved: copy them, reload the OPORD and apply them again.');
+            return;
+          }
+          base = latest;
+          baseRevision = latest.revision;
+          edits = rebased;
+        }
+      }
       const opord = await opordApi.update(id, data);
       setCurrentOpord(opord);
     } catch (err) {
@@ -75,7 +129,7 @@ export function OpordProvider({ children }: { children: ReactNode }) {
     } finally {
       setIsLoading(false);
     }
-  }, []);
+  }, [currentOpord]);
 
   const analyzeOpord = useCallback(async (text: string) => {
     setIsAnalyzing(true);
@@ -4,7 +4,7 @@ import type { Route } from './+types/dashboard';
 import { Navbar, MainLayout, Logo, Button, Card, CardHeader, CardTitle, CardContent, CardFooter, Input } from '../lib/components';
 import { useAuth } from '../lib/auth';
 import { useOpord } from '../lib/opord-context';
-import { opordApi, type OPORD } from '../lib/api';
+import { opordApi, type OPORDSummary } from '../lib/api';
 
 export function meta({}: Route.MetaArgs) {
   return [
@@ -29,14 +29,14 @@ export default function Dashboard() {
   const { isAuthenticated, user, logout } = useAuth();
   const { createOpord } = useOpord();
   const navigate = useNavigate();
-  const [opords, setOpords] = useState<OPORD[]>([]);
+  const [opords, setOpords] = useState<OPORDSummary[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [showQuickCreate, setShowQuickCreate] = useState(false);
   const [quickTitle, setQuickTitle] = useState('');
   const [isCreating, setIsCreating] = useState(false);
   const [showWelcome, setShowWelcome] = useState(false);
-  const [opordToDelete, setOpordToDelete] = useState<OPORD | null>(null);
+  const [opordToDelete, setOpordToDelete] = useState<OPORDSummary | null>(null);
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
 
   useEffect(() => {
@@ -55,7 +55,8 @@ export default function Dashboard() {
     setError(null);
     
     try {
-      const data = await opordApi.getAll();
+      // One extra preview character tells us whether to show an ellipsis
+      const { items: data } = await opordApi.getSummaries(100, undefined, 101);
       setOpords(data);
       
       // Show welcome message if user has no OPORDs
@@ -101,7 +102,7 @@ export default function Dashboard() {
     }
   };
   
-  const handleConfirmDelete = (opord: OPORD) => {
+  const handleConfirmDelete = (opord: OPORDSummary) => {
     setOpordToDelete(opord);
     setShowDeleteConfirm(true);
   };
@@ -305,8 +306,8 @@ export default function Dashboard() {
                   
                   <CardContent>
                     <p className="text-zinc-400 truncate line-clamp-2 h-10">
-                      {opord.content.substring(0, 100)}
-                      {opord.content.length > 100 ? '...' : ''}
+                      {(opord.preview ?? '').substring(0, 100)}
+                      {(opord.preview ?? '').length > 100 ? '...' : ''}
                     </p>
                   </CardContent>
                 </div>
@@ -27,6 +27,15 @@ export default defineConfig({
         target: 'http://localhost:8000',
         changeOrigin: true,
       },
+      '/figures': {
+        target: 'http://localhost:8000',
+        changeOrigin: true,
+      },
+      '/events': {
+        target: 'http://localhost:8000',
+        changeOrigin: true,
+        ws: true,
+      },
     },
   },
 });